@@ -0,0 +1,170 @@
+# calibration.py
+import numpy as np
+
+
+class DMCalibration:
+    """
+    Per-actuator calibration: flat map and displacement → command lookup tables.
+
+    PatternGenerator commands assume a linear mapping
+    ``surface = command · stroke_um``.  BMC MEMS actuators are closer to
+    quadratic in voltage and each has its own bias, so the calibration maps
+    the surface a linear command asks for to the command that produces it on
+    every actuator:
+
+        displacement_um = (linear_command - flat_level) · stroke_um
+        command[a]      = LUT_a(displacement_um)
+
+    i.e. a linear command of ``flat_level`` everywhere sends the flat map.
+
+    The tables share one uniformly spaced displacement axis
+    (``disp_min_um + k · disp_step_um``), so evaluation is a single gather
+    and linear interpolation, vectorised over any ``(..., n_act)`` stack.
+    Displacements beyond the axis are clamped to its ends.
+
+    Parameters
+    ----------
+    flat_map : np.ndarray, shape (n_act,)
+        Commands giving a flat surface.
+    tables : np.ndarray, shape (n_act, L)
+        Command of every actuator at every displacement of the axis,
+        monotonic and within [0, 1].
+    disp_min_um, disp_step_um : float
+        Displacement axis (relative to the flat surface).
+    stroke_um : float
+        Stroke assumed by the linear commands (PatternGenerator.stroke_um).
+    flat_level : float
+        Linear command corresponding to the flat map.
+    """
+
+    def __init__(self, flat_map, tables, disp_min_um, disp_step_um,
+                 stroke_um=1.5, flat_level=0.5):
+        # type: (np.ndarray, np.ndarray, float, float, float, float) -> None
+        self.flat_map = np.asarray(flat_map, dtype=float)
+        self.tables = np.ascontiguousarray(tables, dtype=float)
+        self.disp_min_um = float(disp_min_um)
+        self.disp_step_um = float(disp_step_um)
+        self.stroke_um = float(stroke_um)
+        self.flat_level = float(flat_level)
+
+        self.n_act, self.n_points = self.tables.shape
+        if self.flat_map.shape != (self.n_act,):
+            raise ValueError("flat_map has {} entries, tables have {} actuators".format(
+                self.flat_map.size, self.n_act))
+        if self.n_points < 2 or self.disp_step_um <= 0:
+            raise ValueError("Lookup tables need at least 2 points and a positive step")
+        if np.any(self.tables < 0.0) or np.any(self.tables > 1.0):
+            raise ValueError("Lookup table commands must lie in [0, 1]")
+
+        # flat index of each actuator's first table entry
+        self._row_start = np.arange(self.n_act) * self.n_points
+        # displacement range each actuator can actually reach
+        disp = self.displacement_axis()
+        moving = np.diff(self.tables, axis=1) != 0
+        first = np.argmax(moving, axis=1)
+        last = self.n_points - 1 - np.argmax(moving[:, ::-1], axis=1)
+        self.reach_um = np.stack([disp[first], disp[last]], axis=1)
+
+    def __repr__(self):
+        return "DMCalibration(n_act={}, {} points over [{:.3f}, {:.3f}] um)".format(
+            self.n_act, self.n_points, self.disp_min_um,
+            self.disp_min_um + (self.n_points - 1) * self.disp_step_um)
+
+    def displacement_axis(self):
+        return self.disp_min_um + self.disp_step_um * np.arange(self.n_points)
+
+    # ─────────────────────────────────────────────
+    # Evaluation
+    # ─────────────────────────────────────────────
+    def lookup(self, displacement_um):
+        """
+        Commands for per-actuator displacements (µm, relative to flat),
+        shape ``(..., n_act)``.
+        """
+        d = np.asarray(displacement_um, dtype=float)
+        x = (d - self.disp_min_um) / self.disp_step_um
+        i = np.clip(np.floor(x), 0, self.n_points - 2).astype(np.intp)
+        t = np.clip(x - i, 0.0, 1.0)
+        idx = i + self._row_start
+        lo = self.tables.ravel()[idx]
+        return lo + t * (self.tables.ravel()[idx + 1] - lo)
+
+    def apply(self, linear_commands, check=True):
+        """
+        Hardware commands for linear (PatternGenerator) commands.
+
+        Works on a single ``(n_act,)`` vector or a whole ``(..., n_act)``
+        stack, e.g. a scan sequence before playback.  With ``check``, a
+        warning is printed when displacements fall outside an actuator's
+        reach (those actuators saturate).
+        """
+        cmd = np.asarray(linear_commands, dtype=float)
+        if cmd.shape[-1] != self.n_act:
+            raise ValueError("Expected {} actuators, got {}".format(self.n_act, cmd.shape[-1]))
+
+        d = (cmd - self.flat_level) * self.stroke_um
+        if check:
+            n_out = np.count_nonzero((d < self.reach_um[:, 0]) | (d > self.reach_um[:, 1]))
+            if n_out:
+                print("[DMCalibration WARNING] {} actuator values outside the "
+                      "calibrated reach, saturated.".format(n_out))
+        return self.lookup(d)
+
+    # ─────────────────────────────────────────────
+    # Construction / storage
+    # ─────────────────────────────────────────────
+    @classmethod
+    def from_quadratic(cls, gain_um, bias_um=0.0, stroke_um=1.5, flat_level=0.5,
+                       n_points=256):
+        # type: (np.ndarray, np.ndarray, float, float, int) -> DMCalibration
+        """
+        Tables for actuators following ``surface = bias + gain · command²`` (µm).
+
+        The flat surface sits at ``flat_level · stroke_um`` above the mean
+        bias, as the linear model assumes, clamped to the range every
+        actuator can reach; the displacement axis spans the union of all
+        actuator ranges.
+        """
+        gain = np.asarray(gain_um, dtype=float)
+        bias = np.broadcast_to(np.asarray(bias_um, dtype=float), gain.shape)
+
+        lo, hi = bias.max(), (bias + gain).min()
+        if lo > hi:
+            raise ValueError("Actuators share no common height, cannot define a flat")
+        height = float(np.clip(bias.mean() + flat_level * stroke_um, lo, hi))
+
+        d_min = (bias - height).min()
+        d_max = (bias + gain - height).max()
+        step = (d_max - d_min) / (n_points - 1)
+        disp = d_min + step * np.arange(n_points)
+
+        tables = np.sqrt(np.clip((height + disp[None, :] - bias[:, None]) / gain[:, None],
+                                 0.0, 1.0))
+        flat = np.sqrt((height - bias) / gain)
+        return cls(flat, tables, d_min, step, stroke_um, flat_level)
+
+    def save(self, path):
+        np.savez(
+            path,
+            flat_map=self.flat_map,
+            tables=self.tables,
+            disp_min_um=self.disp_min_um,
+            disp_step_um=self.disp_step_um,
+            stroke_um=self.stroke_um,
+            flat_level=self.flat_level,
+        )
+        print("[INFO] Saved DM calibration ({} actuators) to {}".format(self.n_act, path))
+
+    @classmethod
+    def load(cls, path):
+        # type: (str) -> DMCalibration
+        with np.load(path) as data:
+            return cls(
+                data["flat_map"],
+                data["tables"],
+                float(data["disp_min_um"]),
+                float(data["disp_step_um"]),
+                float(data["stroke_um"]),
+                float(data["flat_level"]),
+            )
+
@@ -0,0 +1,377 @@
+# closed_loop.py
+import hashlib
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from modal_basis import actuator_mask
+
+# (matrix digest, n_modes, rcond) -> (reconstructor, singular values)
+_RECONSTRUCTOR_CACHE = {}  # type: Dict[Tuple[str, Optional[int], float], Tuple[np.ndarray, np.ndarray]]
+
+STAGES = ("read", "reconstruct", "update", "send")
+
+
+def reconstructor(matrix, n_modes=None, rcond=1e-3):
+    # type: (np.ndarray, Optional[int], float) -> Tuple[np.ndarray, np.ndarray]
+    """
+    Truncated-SVD pseudo-inverse of an interaction matrix.
+
+    Parameters
+    ----------
+    matrix : np.ndarray, shape (n_measurements, n_act)
+        E.g. ``HadamardCalibration.load(path)["matrix"]``.
+    n_modes : int or None
+        Number of singular modes kept (all above ``rcond`` if None).
+    rcond : float
+        Modes with singular value below ``rcond · s_max`` are always dropped.
+
+    Returns
+    -------
+    R : np.ndarray, shape (n_act, n_measurements)
+        Commands per unit measurement.
+    s : np.ndarray
+        All singular values, for choosing ``n_modes``.
+
+    Results are cached per (matrix content, n_modes, rcond).
+    """
+    matrix = np.ascontiguousarray(matrix, dtype=float)
+    key = (hashlib.sha1(matrix.tobytes() + str(matrix.shape).encode()).hexdigest(),
+           n_modes, float(rcond))
+    if key in _RECONSTRUCTOR_CACHE:
+        return _RECONSTRUCTOR_CACHE[key]
+
+    U, s, Vt = np.linalg.svd(matrix, full_matrices=False)
+    keep = int(np.count_nonzero(s > rcond * s[0]))
+    if n_modes is not None:
+        keep = min(keep, int(n_modes))
+    if keep < 1:
+        raise ValueError("No singular mode kept (n_modes={}, rcond={}, s_max={:.3g})".format(
+            n_modes, rcond, s[0] if s.size else 0.0))
+    R = (Vt[:keep].T / s[:keep]) @ U[:, :keep].T
+    print("[INFO] Reconstructor: {} of {} modes kept (condition {:.1f})".format(
+        keep, s.size, s[0] / s[keep - 1]))
+    _RECONSTRUCTOR_CACHE[key] = (R, s)
+    return R, s
+
+
+class SimulatedShackHartmann:
+    """
+    Shack–Hartmann stand-in for testing the loop without hardware.
+
+    The DM surface (commands sent to a ``SimulatedBmcDm``, bilinearly
+    interpolated between actuators) plus a slowly drifting aberration is
+    seen through ``n_sub × n_sub`` square subapertures spanning the
+    aperture; each subaperture reports its mean x and y slope.  Noise is
+    drawn once into a table that is cycled through, so ``read_into`` does
+    not allocate.
+
+    Parameters
+    ----------
+    backend : SimulatedBmcDm
+    grid_size : int
+        Actuator grid side of the backend.
+    n_sub : int
+        Subapertures across the aperture.
+    noise_std : float
+        Slope noise (command units per actuator pitch).
+    drift_std : float
+        Random-walk step of the aberration per read (command units, per
+        actuator); 0 for a static aberration.  May be changed between
+        reads (e.g. static during calibration, drifting in the loop).
+    aberration_std : float
+        RMS of the initial aberration.
+    seed : int
+    """
+
+    def __init__(self, backend, grid_size=13, n_sub=10, noise_std=1e-3, drift_std=1e-4,
+                 aberration_std=0.02, seed=0, n_noise_frames=1024):
+        # type: (object, int, int, float, float, float, int, int) -> None
+        self.backend = backend
+        n_act = backend.num_actuators()
+        if int(actuator_mask(grid_size).sum()) != n_act:
+            raise ValueError("grid_size={} does not match the backend's {} actuators".format(
+                grid_size, n_act))
+        self.matrix = self._slope_matrix(int(grid_size), int(n_sub))
+        self.n_measurements = self.matrix.shape[0]
+
+        rng = np.random.RandomState(seed)
+        self.aberration = rng.normal(0.0, aberration_std, n_act)
+        self.drift_std = float(drift_std)
+        self._drift = rng.normal(0.0, 1.0, (n_noise_frames, n_act))  # unit steps
+        self._step = np.empty(n_act)
+        self._noise = rng.normal(0.0, noise_std, (n_noise_frames, self.n_measurements))
+        self._surface = np.empty(n_act)
+        self.n_reads = 0
+
+    @staticmethod
+    def _slope_matrix(N, n_sub):
+        """(2 n_sub_inside, n_act) matrix of subaperture x/y slopes."""
+        mask = actuator_mask(N)
+        c = (N - 1) / 2
+        # nearest-actuator fill for masked cells, so edge subapertures see the surface
+        iy, ix = np.nonzero(mask)
+        yy, xx = np.indices((N, N))
+        nearest = np.argmin((yy.ravel()[:, None] - iy) ** 2 + (xx.ravel()[:, None] - ix) ** 2, axis=1)
+        fold = np.zeros((N * N, iy.size))
+        fold[np.arange(N * N), nearest] = 1.0
+
+        edges = np.linspace(-N / 2, N / 2, n_sub + 1)          # subaperture corners (pitches)
+        centres = 0.5 * (edges[1:] + edges[:-1])
+        keep = (centres[:, None] ** 2 + centres[None, :] ** 2) <= (N / 2) ** 2
+
+        def interp_1d(pos):
+            p = np.clip(pos + c, 0.0, N - 1.0)
+            p0 = np.minimum(np.floor(p).astype(int), N - 2)
+            W = np.zeros((pos.size, N))
+            W[np.arange(pos.size), p0] = 1.0 - (p - p0)
+            W[np.arange(pos.size), p0 + 1] = p - p0
+            return W
+
+        Wc = interp_1d(edges)                                   # (n_sub + 1, N)
+        # surface at every corner: Wc[y] ⊗ Wc[x], as (n_sub+1, n_sub+1, N*N)
+        corners = np.einsum("ai,bj->abij", Wc, Wc).reshape(n_sub + 1, n_sub + 1, N * N)
+        width = edges[1] - edges[0]
+        sx = 0.5 * ((corners[:-1, 1:] + corners[1:, 1:]) - (corners[:-1, :-1] + corners[1:, :-1])) / width
+        sy = 0.5 * ((corners[1:, :-1] + corners[1:, 1:]) - (corners[:-1, :-1] + corners[:-1, 1:])) / width
+        G = np.concatenate([sx[keep], sy[keep]]) @ fold
+        return G
+
+    def read_into(self, out):
+        """Write one slope frame into ``out`` (n_measurements,)."""
+        k = self.n_reads % len(self._noise)
+        if self.drift_std:
+            np.multiply(self._drift[k], self.drift_std, out=self._step)
+            self.aberration += self._step
+        np.add(self.backend.last_command, self.aberration, out=self._surface)
+        np.dot(self.matrix, self._surface, out=out)
+        out += self._noise[k]
+        self.n_reads += 1
+        return out
+
+    def __call__(self):
+        return self.read_into(np.empty(self.n_measurements))
+
+
+class ClosedLoop:
+    """
+    Leaky-integrator control loop around a DMClass.
+
+    Every iteration::
+
+        e    = y - reference                 (slopes)
+        u    = leak · u - gain · R e         (integrator, around the bias)
+        cmd  = clip(bias + u, 0, 1)          sent with DMClass.send_fast
+
+    with R the truncated-SVD reconstructor of the interaction matrix.  The
+    integrator is reset to the clipped command (anti-windup).  All buffers
+    are allocated once; an iteration only writes into them.
+
+    Configuration dictionary::
+
+        {
+            "gain": 0.3,
+            "leak": 0.99,          # 1: pure integrator
+            "n_modes": None,       # reconstructor truncation
+            "rcond": 1e-3,
+            "bias": 0.5,           # command the integrator is centred on
+        }
+
+    Parameters
+    ----------
+    dm : DMClass
+        Opened DM.  Commands bypass the calibration (``send_fast``), so with
+        a calibration set the interaction matrix must have been measured
+        with ``raw`` pokes (HadamardCalibration config ``"raw": True``);
+        a dict without ``raw`` raises, a bare matrix warns.
+    sensor : object
+        Frame source: ``read_into(out)`` (preferred) or a callable returning
+        the measurement vector (e.g. hadamard_calibration.SimulatedSensor).
+    interaction : dict or np.ndarray
+        ``HadamardCalibration.load`` result (``matrix``, ``reference``,
+        ``bias``, ``raw``) or a bare (n_measurements, n_act) matrix.
+    config : dict
+    """
+
+    def __init__(self, dm, sensor, interaction, config=None):
+        # type: (object, object, object, Optional[Dict]) -> None
+        config = config or {}
+        if isinstance(interaction, dict):
+            matrix = interaction["matrix"]
+            reference = interaction.get("reference")
+            bias = interaction.get("bias", 0.5)
+        else:
+            matrix, reference, bias = interaction, None, 0.5
+        if dm.n_act is None:
+            raise RuntimeError("DM is not open — call dm.open() first")
+        if dm.calibration is not None:
+            if isinstance(interaction, dict) and not interaction.get("raw", False):
+                raise ValueError(
+                    "DM has a calibration but the interaction matrix was measured through "
+                    "it; the loop sends raw commands — recalibrate with 'raw': True")
+            if not isinstance(interaction, dict):
+                print("[ClosedLoop WARNING] DM has a calibration; the loop sends raw "
+                      "commands, so the matrix must have been measured with raw pokes.")
+
+        self.dm = dm
+        self.sensor = sensor
+        self.gain = float(config.get("gain", 0.3))
+        self.leak = float(config.get("leak", 0.99))
+        self.bias = float(config.get("bias", bias))
+        self.R, self.singular_values = reconstructor(
+            matrix, config.get("n_modes"), config.get("rcond", 1e-3))
+        n_act, n_meas = self.R.shape
+        if n_act != dm.n_act:
+            raise ValueError("Interaction matrix has {} actuators, DM has {}".format(
+                n_act, dm.n_act))
+
+        self.reference = np.zeros(n_meas) if reference is None \
+            else np.asarray(reference, dtype=float).copy()
+        self._read = getattr(sensor, "read_into", None)
+
+        # preallocated state
+        self.y = np.empty(n_meas)
+        self.error = np.empty(n_meas)
+        self.delta = np.empty(n_act)
+        self.u = np.zeros(n_act)
+        self.command = np.full(n_act, self.bias)
+        self.timings = np.empty((0, len(STAGES)))
+        self.residual_rms = np.empty(0)
+
+    def __repr__(self):
+        return "ClosedLoop(gain={}, leak={}, {} actuators x {} measurements)".format(
+            self.gain, self.leak, *self.R.shape)
+
+    def set_reference(self, reference):
+        """Slopes the loop drives to (e.g. the reference of a target shape)."""
+        self.reference[:] = reference
+
+    def reset(self):
+        """Integrator back to the bias command."""
+        self.u[:] = 0.0
+        self.command[:] = self.bias
+
+    # ─────────────────────────────────────────────
+    # Loop
+    # ─────────────────────────────────────────────
+    def run(self, n_iter):
+        # type: (int) -> Dict
+        """
+        Run ``n_iter`` iterations; returns ``stats()``.
+
+        Per-stage times (read, reconstruct, update, send) and the residual
+        RMS of every iteration are kept in ``timings`` and ``residual_rms``.
+        """
+        n_iter = int(n_iter)
+        timings = np.empty((n_iter, len(STAGES)))
+        residual = np.empty(n_iter)
+        y, e, d, u, cmd = self.y, self.error, self.delta, self.u, self.command
+        R, ref, read = self.R, self.reference, self._read
+        send, clock = self.dm.send_fast, time.perf_counter
+        gain, leak, bias = self.gain, self.leak, self.bias
+
+        t_loop = clock()
+        for k in range(n_iter):
+            t0 = clock()
+            if read is not None:
+                read(y)
+            else:
+                y[:] = self.sensor()
+            t1 = clock()
+            np.subtract(y, ref, out=e)
+            np.dot(R, e, out=d)
+            t2 = clock()
+            u *= leak
+            d *= gain
+            u -= d
+            np.add(u, bias, out=cmd)
+            np.clip(cmd, 0.0, 1.0, out=cmd)
+            np.subtract(cmd, bias, out=u)  # anti-windup
+            t3 = clock()
+            send(cmd)
+            t4 = clock()
+            timings[k, 0] = t1 - t0
+            timings[k, 1] = t2 - t1
+            timings[k, 2] = t3 - t2
+            timings[k, 3] = t4 - t3
+            residual[k] = np.sqrt(np.dot(e, e) / e.size)
+        self.elapsed_s = clock() - t_loop
+
+        self.timings, self.residual_rms = timings, residual
+        stats = self.stats()
+        print("[INFO] Closed loop: {} iterations at {:.0f} Hz, residual RMS {:.2e} -> {:.2e}".format(
+            n_iter, stats["rate_Hz"], residual[0] if n_iter else np.nan,
+            stats["final_residual_rms"]))
+        return stats
+
+    # ─────────────────────────────────────────────
+    # Reporting
+    # ─────────────────────────────────────────────
+    def stats(self):
+        # type: () -> Dict
+        """
+        Loop rate and per-stage latency of the last ``run``: median, 99th
+        percentile and maximum in microseconds, per stage and in total.
+        """
+        n = len(self.timings)
+        total = self.timings.sum(axis=1)
+        out = {
+            "n_iter": n,
+            "rate_Hz": n / self.elapsed_s if n else float("nan"),
+            "final_residual_rms": float(self.residual_rms[-min(n, 100):].mean()) if n else float("nan"),
+        }
+        for name, t in zip(STAGES + ("total",), list(self.timings.T) + [total]):
+            if n:
+                p50, p99 = np.percentile(t, [50, 99]) * 1e6
+                out[name + "_us"] = {"median": p50, "p99": p99, "max": 1e6 * t.max()}
+        return out
+
+    def latency_histogram(self, bins=None):
+        """
+        Histogram of the per-stage latencies of the last ``run``.
+
+        Returns ``(edges_us, counts)`` with counts of shape
+        (len(STAGES) + 1, len(edges_us) - 1), the last row for the total.
+        Default bins: log-spaced from 1 µs to 100 ms.
+        """
+        if bins is None:
+            bins = np.logspace(0, 5, 51)
+        t_us = 1e6 * np.column_stack([self.timings, self.timings.sum(axis=1)])
+        counts = np.array([np.histogram(col, bins=bins)[0] for col in t_us.T])
+        return np.asarray(bins), counts
+
+    def print_latency(self):
+        """Per-stage latency table of the last ``run``."""
+        stats = self.stats()
+        if not stats["n_iter"]:
+            print("[INFO] Closed loop: no iterations yet — call run() first")
+            return
+        print("[INFO] Loop rate {:.0f} Hz over {} iterations".format(
+            stats["rate_Hz"], stats["n_iter"]))
+        for name in STAGES + ("total",):
+            s = stats[name + "_us"]
+            print("       {:<12s} median {:8.1f} µs   p99 {:8.1f} µs   max {:8.1f} µs".format(
+                name, s["median"], s["p99"], s["max"]))
+
+
+if __name__ == "__main__":
+    from dm_wrapper import DMClass
+    from hadamard_calibration import HadamardCalibration
+    from sim_backend import SimulatedBmcDm
+
+    backend = SimulatedBmcDm(13)
+    dm = DMClass(serial="simulated", grid_size=13, backend=backend)
+    dm.open()
+    wfs = SimulatedShackHartmann(backend, grid_size=13, n_sub=10, drift_std=0.0)
+
+    calib = HadamardCalibration(dm, wfs, {"bias": 0.5, "amplitude": 0.05, "raw": True})
+    calib.run()
+    wfs.drift_std = 1e-4  # let the aberration drift while the loop holds the shape
+
+    loop = ClosedLoop(dm, wfs, {"matrix": calib.matrix, "reference": calib.reference,
+                                "bias": calib.bias, "raw": calib.raw},
+                      {"gain": 0.4, "leak": 0.995, "n_modes": 100})
+    loop.run(5000)
+    loop.print_latency()
+    dm.close()
@@ -0,0 +1,179 @@
+# dac_frames.py
+import struct
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Resolution of the BMC driver DAC
+DAC_BITS = 14
+
+# to_bytes header: magic, version, bits, n_frames, n_act, offset, scale
+_HEADER = struct.Struct("<4sHHIIdd")
+_MAGIC = b"DACF"
+_VERSION = 1
+
+
+class DACFrames:
+    """
+    Stack of actuator frames stored as uint16 DAC codes.
+
+    A code maps to a hardware command as
+
+        command = offset + scale · code,    code in [0, 2^bits - 1]
+
+    (by default ``offset = 0`` and ``scale = 1 / (2^bits - 1)``, i.e. the
+    full DAC range spans commands [0, 1]).  Conversion from float rounds to
+    the nearest code (``np.rint``), so two frames are equal as DACFrames
+    exactly when the driver would output the same voltages, and
+    ``from_float(to_float())`` returns the same codes.  Frames take 2 bytes
+    per actuator instead of 8, and duplicates can be removed exactly.
+
+    Frames hold hardware commands: a calibration (DMClass.set_calibration)
+    must be applied before ``from_float``; DMClass.send_dac sends them as is.
+
+    Parameters
+    ----------
+    codes : np.ndarray, shape (n_frames, n_act) or (n_act,)
+        Integer DAC codes.
+    bits : int
+        DAC resolution.
+    offset, scale : float or None
+        Code → command mapping (``scale`` None: full range over [0, 1]).
+    """
+
+    def __init__(self, codes, bits=DAC_BITS, offset=0.0, scale=None):
+        # type: (np.ndarray, int, float, Optional[float]) -> None
+        self.bits = int(bits)
+        if not 1 <= self.bits <= 16:
+            raise ValueError("DAC resolution must be 1..16 bits, got {}".format(bits))
+        self.max_code = 2 ** self.bits - 1
+        self.offset = float(offset)
+        self.scale = 1.0 / self.max_code if scale is None else float(scale)
+        if self.offset < 0.0 or self.offset + self.scale * self.max_code > 1.0 + 1e-12:
+            raise ValueError(
+                "Code range maps to [{:.4f}, {:.4f}], outside the command range [0, 1]".format(
+                    self.offset, self.offset + self.scale * self.max_code))
+
+        codes = np.asarray(codes)
+        if codes.size and (codes.min() < 0 or codes.max() > self.max_code):
+            raise ValueError("DAC codes must lie in [0, {}]".format(self.max_code))
+        self.codes = np.ascontiguousarray(np.atleast_2d(codes), dtype=np.uint16)
+
+    def __len__(self):
+        return self.codes.shape[0]
+
+    def __repr__(self):
+        return "DACFrames({} frames x {} actuators, {} bits, {:.1f} kB)".format(
+            len(self), self.n_act, self.bits, self.nbytes / 1024)
+
+    def __getitem__(self, index):
+        """Frames selected by an int, slice, mask or index array, as DACFrames."""
+        codes = self.codes[index]
+        return DACFrames(codes, self.bits, self.offset, self.scale)
+
+    def __eq__(self, other):
+        return (isinstance(other, DACFrames) and self.bits == other.bits
+                and self.offset == other.offset and self.scale == other.scale
+                and np.array_equal(self.codes, other.codes))
+
+    @property
+    def n_act(self):
+        return self.codes.shape[1]
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes
+
+    # ─────────────────────────────────────────────
+    # Conversion
+    # ─────────────────────────────────────────────
+    @classmethod
+    def from_float(cls, commands, bits=DAC_BITS, offset=0.0, scale=None, clip=False):
+        # type: (np.ndarray, int, float, Optional[float], bool) -> DACFrames
+        """
+        Quantise hardware commands ``(n_frames, n_act)`` (or one vector) to
+        the nearest DAC codes.
+
+        Commands outside the code range raise a ValueError, or are clipped
+        with a warning when ``clip`` is set (as _check_command_validity).
+        """
+        max_code = 2 ** int(bits) - 1
+        scale = 1.0 / max_code if scale is None else float(scale)
+        cmd = np.atleast_2d(np.asarray(commands, dtype=float))
+        x = (cmd - offset) / scale
+        below, above = x < -0.5, x > max_code + 0.5
+        if np.any(below) or np.any(above):
+            print("[DACFrames WARNING] {} commands below, {} above the DAC range.".format(
+                np.count_nonzero(below), np.count_nonzero(above)))
+            if not clip:
+                raise ValueError("Commands out of the DAC range (min={:.4f}, max={:.4f})".format(
+                    cmd.min(), cmd.max()))
+        return cls(np.clip(np.rint(x), 0, max_code).astype(np.uint16), bits, offset, scale)
+
+    def to_float(self, out=None):
+        # type: (Optional[np.ndarray]) -> np.ndarray
+        """Hardware commands ``(n_frames, n_act)`` (float64, into ``out`` if given)."""
+        if out is None:
+            out = np.empty(self.codes.shape)
+        np.multiply(self.codes, self.scale, out=out)
+        out += self.offset
+        return out
+
+    def frame(self, index):
+        # type: (int) -> np.ndarray
+        """Hardware command vector of one frame."""
+        return self.offset + self.scale * self.codes[index].astype(float)
+
+    # ─────────────────────────────────────────────
+    # Exact comparisons
+    # ─────────────────────────────────────────────
+    def deduplicate(self):
+        # type: () -> Tuple[DACFrames, np.ndarray]
+        """
+        Distinct frames in order of first appearance, and for every original
+        frame the index of its distinct frame (``unique[inverse] == self``).
+        """
+        _, first, inverse = np.unique(self.codes, axis=0, return_index=True,
+                                      return_inverse=True)
+        order = np.argsort(first)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(order.size)
+        return self[first[order]], rank[np.ravel(inverse)]
+
+    def changes(self):
+        # type: () -> np.ndarray
+        """Boolean per frame: differs from the previous frame (first frame: True)."""
+        diff = np.ones(len(self), dtype=bool)
+        diff[1:] = np.any(self.codes[1:] != self.codes[:-1], axis=1)
+        return diff
+
+    # ─────────────────────────────────────────────
+    # Storage / transfer
+    # ─────────────────────────────────────────────
+    def save(self, path):
+        np.savez(path, codes=self.codes, bits=self.bits, offset=self.offset, scale=self.scale)
+        print("[INFO] Saved {} DAC frames ({:.1f} kB) to {}".format(
+            len(self), self.nbytes / 1024, path))
+
+    @classmethod
+    def load(cls, path):
+        # type: (str) -> DACFrames
+        with np.load(path) as data:
+            return cls(data["codes"], int(data["bits"]), float(data["offset"]),
+                       float(data["scale"]))
+
+    def to_bytes(self):
+        # type: () -> bytes
+        """Header + little-endian codes, e.g. for a pipe or socket to another process."""
+        header = _HEADER.pack(_MAGIC, _VERSION, self.bits, len(self), self.n_act,
+                              self.offset, self.scale)
+        return header + self.codes.astype("<u2", copy=False).tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        # type: (bytes) -> DACFrames
+        magic, version, bits, n_frames, n_act, offset, scale = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Not a DACFrames v{} buffer".format(_VERSION))
+        codes = np.frombuffer(data, dtype="<u2", count=n_frames * n_act, offset=_HEADER.size)
+        return cls(codes.reshape(n_frames, n_act), bits, offset, scale)
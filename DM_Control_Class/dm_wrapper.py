@@ -2,23 +2,45 @@
 from typing import Dict, Optional
 
 import numpy as np
-import matplotlib.pyplot as plt
-import bmc
 import copy
+import time
+
+try:
+    import bmc
+except ImportError:  # venv_main: no BMC SDK, only simulated backends
+    bmc = None
 
 
 class DMClass:
     """
     Hardware + geometry wrapper for the DM.
+
+    ``backend`` replaces ``bmc.BmcDm()`` with any object exposing the same
+    interface (e.g. ``sim_backend.SimulatedBmcDm``) so the send path can be
+    run without the hardware.
+
+    With a calibration set (``set_calibration``), every vector passed to
+    ``send`` / ``send_grid`` is treated as a linear PatternGenerator command
+    and mapped through the flat map and per-actuator lookup tables before
+    it reaches the hardware.
     """
 
-    def __init__(self, serial, grid_size=13, cmap="jet"):
+    def __init__(self, serial, grid_size=13, cmap="jet", backend=None):
         self.serial = serial
         self.grid_size = grid_size
         self.cmap = cmap
 
-        self.dm = bmc.BmcDm()
+        if backend is None:
+            if bmc is None:
+                raise RuntimeError(
+                    "BMC SDK not importable — activate venv_bmc_py36 "
+                    "or pass a simulated backend"
+                )
+            backend = bmc.BmcDm()
+        self.dm = backend
         self.n_act = None
+        self.calibration = None
+        self.send_log = None
 
         self._last_vector = None
         self._last_grid_masked = None
@@ -40,10 +62,37 @@ class DMClass:
         self.dm.close_dm()
         print("[DM] Closed DM")
 
+    # ──────────────────────────────
+    # Calibration
+    # ──────────────────────────────
+    def set_calibration(self, calibration):
+        """
+        Apply *calibration* (calibration.DMCalibration, or None to remove it)
+        on every subsequent send.
+        """
+        if calibration is not None and self.n_act is not None \
+                and calibration.n_act != self.n_act:
+            raise ValueError("Calibration has {} actuators, DM has {}".format(
+                calibration.n_act, self.n_act))
+        self.calibration = calibration
+
+    def send_flat(self):
+        """Send the calibrated flat map."""
+        if self.calibration is None:
+            raise RuntimeError("No calibration set")
+        self.send(self.calibration.flat_map, raw=True)
+
     # ──────────────────────────────
     # Low-level send
     # ──────────────────────────────
-    def send(self, vector):
+    def send(self, vector, raw=False):
+        """
+        Send one actuator vector.
+
+        ``raw=True`` bypasses the calibration, for vectors that already are
+        hardware commands (e.g. a stack passed through
+        ``DMCalibration.apply`` ahead of playback).
+        """
         vector = np.asarray(vector, dtype=float)
 
         if len(vector) != self.n_act:
@@ -52,13 +101,55 @@ class DMClass:
         if np.any(vector < 0) or np.any(vector > 1):
             raise ValueError("DM values must be in [0,1]")
 
+        if self.calibration is not None and not raw:
+            vector = self.calibration.apply(vector)
+
         self.dm.send_data(vector.tolist())
         self._last_vector = vector.copy()
+        if self.send_log is not None:
+            self.send_log.append((time.time(), self._last_vector.copy()))
+
+    def send_fast(self, vector):
+        """
+        Send a hardware command without validation, calibration or copies.
+
+        For control loops that keep ``vector`` (float, length n_act) in
+        [0, 1] themselves; only the copy into ``_last_vector`` is made, in
+        place.
+        """
+        self.dm.send_data(vector.tolist())
+        self._last_vector[:] = vector
+        if self.send_log is not None:
+            self.send_log.append((time.time(), self._last_vector.copy()))
+
+    def send_dac(self, frames, index=0):
+        """
+        Send frame ``index`` of a dac_frames.DACFrames.
+
+        DAC frames are hardware commands already quantised within [0, 1],
+        so they go through ``send_fast`` (no calibration, no range check).
+        """
+        if frames.n_act != self.n_act:
+            raise ValueError(f"Expected {self.n_act} actuators, got {frames.n_act}")
+        self.send_fast(frames.frame(index))
+
+    def start_send_log(self):
+        """
+        Record ``(time.time(), hardware vector)`` after every subsequent send,
+        to align commands with scope captures (see RIN_analysis/dm_settling.py).
+        """
+        self.send_log = []
+        return self.send_log
+
+    def stop_send_log(self):
+        """Stop recording and return the log."""
+        log, self.send_log = self.send_log, None
+        return log
 
     # ──────────────────────────────
     # Grid interface
     # ──────────────────────────────
-    def send_grid(self, grid):
+    def send_grid(self, grid, raw=False):
         grid = np.asarray(grid, dtype=float)
 
         if grid.shape != (self.grid_size, self.grid_size):
@@ -71,13 +162,15 @@ class DMClass:
             raise ValueError("Masked grid does not match actuator count")
 
         self._last_grid_masked = masked.copy()
-        self.send(vector)
+        self.send(vector, raw=raw)
 
     # ──────────────────────────────
     # Visualization
     # ──────────────────────────────
     def plot_last(self, params=None, save_path=None):
         # type: (Optional[Dict], Optional[str]) -> None
+        import matplotlib.pyplot as plt  # only needed for plotting, keeps send-only scripts light
+
         if self._last_grid_masked is None:
             raise RuntimeError("No grid has been sent yet")
 
@@ -0,0 +1,174 @@
+# feasibility.py
+import ast
+import copy
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from modal_basis import actuator_mask
+from patterns import PatternGenerator
+
+
+class FeasibilityEnvelope:
+    """
+    Feasible region of sup_zernike amplitudes for a fixed geometry.
+
+    For a sup_zernike parameter dict (``"general"`` + ``"zernike_amplitudes"``)
+    the actuator commands are affine in the amplitudes::
+
+        command = base + B @ a        (n_act,), a in waves
+
+    where ``base`` is the command with every amplitude at zero (offsets
+    only) and column ``k`` of B is mode ``k`` at unit amplitude.  The
+    feasible set ``{a : 0 <= base + B a <= 1}`` is a polytope; all queries
+    below are closed-form ray casts through it, evaluated for many
+    amplitude vectors or directions in one matrix product, so sweeps can be
+    planned without generating a single clipped frame.
+
+    Parameters
+    ----------
+    zernike_superpos_params : dict
+        Template in the sup_zernike format.  Its amplitudes are the default
+        centre of every query; its keys define the coefficient space.
+    N, wavelength_nm, stroke_um :
+        As in PatternGenerator.
+    """
+
+    chunk_size = 8192
+
+    def __init__(self, zernike_superpos_params, N=13, wavelength_nm=632.8, stroke_um=1.5):
+        # type: (Dict, int, float, float) -> None
+        self.params = copy.deepcopy(zernike_superpos_params)
+        self.patterns = PatternGenerator(N=N, wavelength_nm=wavelength_nm, stroke_um=stroke_um)
+        self.mask = actuator_mask(int(N))
+
+        amps = self.params["zernike_amplitudes"]
+        self.keys = list(amps)                                  # type: List[str]
+        self.center = np.array([float(v) for v in amps.values()])
+
+        zero = copy.deepcopy(self.params)
+        zero["zernike_amplitudes"] = {k: 0.0 for k in self.keys}
+        self.base = self.patterns.sup_zernike(zero, clip=False)[self.mask]
+
+        general = self.params["general"]
+        radius_px = float(general["radius_px"])
+        offset_radius_px = float(general.get("offset_radius_px", radius_px))
+        self.B = np.empty((self.base.size, len(self.keys)))
+        for k, key in enumerate(self.keys):
+            n, m = ast.literal_eval(key)
+            r = offset_radius_px if (n == 0 and m == 0) else radius_px
+            mode = self.patterns.zernike({"n": n, "m": m, "amplitude_lambda": 1.0,
+                                          "offset_lambda": 0.0, "radius_px": r},
+                                         Check_ampl=False)
+            self.B[:, k] = mode[self.mask]
+
+        if np.any(self.base < 0.0) or np.any(self.base > 1.0):
+            print("[Feasibility WARNING] Offsets alone are out of range "
+                  "(min={:.3f}, max={:.3f}); no amplitude is feasible.".format(
+                      self.base.min(), self.base.max()))
+
+    def __repr__(self):
+        return "FeasibilityEnvelope({} modes, {} actuators)".format(
+            len(self.keys), self.base.size)
+
+    def _center(self, center):
+        return self.center if center is None else np.asarray(center, dtype=float)
+
+    # ─────────────────────────────────────────────
+    # Evaluation
+    # ─────────────────────────────────────────────
+    def commands(self, amplitudes):
+        """Unclipped actuator commands ``(..., n_act)`` for amplitudes ``(..., n_modes)``."""
+        return self.base + np.asarray(amplitudes, dtype=float) @ self.B.T
+
+    def is_feasible(self, amplitudes, tol=0.0):
+        """Boolean ``(...)``: every actuator within [0, 1] (± tol)."""
+        cmd = self.commands(amplitudes)
+        return np.all((cmd >= -tol) & (cmd <= 1.0 + tol), axis=-1)
+
+    def _ray_limits(self, c, slopes):
+        """
+        Largest t >= 0 with ``0 <= c + t · slopes <= 1`` for every row of
+        ``slopes`` (shape (D, n_act)), and likewise towards negative t.
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            up = np.where(slopes > 0, (1.0 - c) / slopes,
+                          np.where(slopes < 0, -c / slopes, np.inf))
+            down = np.where(slopes > 0, c / slopes,
+                            np.where(slopes < 0, (c - 1.0) / slopes, np.inf))
+        return up.min(axis=-1), down.min(axis=-1)
+
+    def radial(self, directions, center=None):
+        # type: (np.ndarray, Optional[np.ndarray]) -> np.ndarray
+        """
+        Distance from ``center`` to the boundary along each direction.
+
+        Parameters
+        ----------
+        directions : np.ndarray, shape (D, n_modes)
+            Need not be normalised; the result is in units of each row's
+            length (for unit rows: waves along that direction).
+
+        Returns
+        -------
+        np.ndarray, shape (D,)
+            ``t_max`` such that ``center + t · d`` is feasible for
+            ``0 <= t <= t_max``; 0 if ``center`` itself is infeasible.
+        """
+        center = self._center(center)
+        c = self.commands(center)
+        if np.any(c < 0.0) or np.any(c > 1.0):
+            return np.zeros(len(directions))
+        directions = np.asarray(directions, dtype=float)
+        t_max = np.empty(len(directions))
+        for start in range(0, len(directions), self.chunk_size):  # bounds (D, n_act) temporaries
+            block = directions[start:start + self.chunk_size]
+            t_max[start:start + len(block)] = self._ray_limits(c, block @ self.B.T)[0]
+        return t_max
+
+    def mode_limits(self, center=None):
+        # type: (Optional[np.ndarray]) -> Dict[str, Tuple[float, float]]
+        """
+        Feasible range of every amplitude on its own, the others held at
+        ``center``: ``{key: (min_amplitude, max_amplitude)}``.
+        """
+        center = self._center(center)
+        c = self.commands(center)
+        t_up, t_down = self._ray_limits(c, self.B.T)
+        if np.any(c < 0.0) or np.any(c > 1.0):
+            t_up = t_down = np.full(len(self.keys), np.nan)
+        return {key: (center[k] - t_down[k], center[k] + t_up[k])
+                for k, key in enumerate(self.keys)}
+
+    def max_scale(self, amplitudes, center=None):
+        """
+        For planned frames ``(F, n_modes)``: largest s such that
+        ``center + s · (frame - center)`` is feasible.  s >= 1 means the
+        frame is sent unclipped; ``center + s · (frame - center)`` with the
+        returned s is the largest feasible frame in the same direction.
+        """
+        center = self._center(center)
+        return self.radial(np.atleast_2d(amplitudes) - center, center)
+
+    def plan_sweep(self, key, values, center=None):
+        """
+        Feasibility of a one-mode sweep: returns ``(values, feasible)`` with
+        the feasible mask over ``values`` of amplitude ``key`` (others at
+        ``center``).
+        """
+        center = self._center(center)
+        values = np.asarray(values, dtype=float)
+        frames = np.repeat(center[None, :], len(values), axis=0)
+        frames[:, self.keys.index(key)] = values
+        return values, self.is_feasible(frames)
+
+    def random_directions(self, n, modes=None, seed=0):
+        """
+        ``n`` unit directions uniformly distributed over the sphere spanned
+        by the mode keys in ``modes`` (all modes if None).
+        """
+        rng = np.random.RandomState(seed)
+        idx = [self.keys.index(k) for k in (self.keys if modes is None else modes)]
+        d = np.zeros((n, len(self.keys)))
+        d[:, idx] = rng.normal(size=(n, len(idx)))
+        return d / np.linalg.norm(d, axis=1, keepdims=True)
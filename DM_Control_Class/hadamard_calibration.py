@@ -0,0 +1,217 @@
+# hadamard_calibration.py
+import time
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+
+def hadamard_matrix(order):
+    """
+    Sylvester Hadamard matrix of size ``order`` (a power of two), entries ±1,
+    with ``H.T @ H == order * I``.
+    """
+    order = int(order)
+    if order < 1 or order & (order - 1):
+        raise ValueError("Hadamard order must be a power of two, got {}".format(order))
+    H = np.ones((1, 1))
+    while H.shape[0] < order:
+        H = np.vstack([np.hstack([H, H]), np.hstack([H, -H])])
+    return H
+
+
+def hadamard_patterns(n_act):
+    """
+    ±1 sign patterns for ``n_act`` actuators, shape (K, n_act).
+
+    K is the smallest power of two above ``n_act`` (256 for 137 actuators).
+    The all-ones column of the Hadamard matrix is skipped, so every actuator
+    column sums to zero and the response to the bias cancels on inversion.
+    """
+    K = 1
+    while K < n_act + 1:
+        K *= 2
+    return hadamard_matrix(K)[:, 1:n_act + 1]
+
+
+class HadamardCalibration:
+    """
+    Interaction-matrix acquisition with Hadamard-multiplexed actuator pokes.
+
+    Every pattern drives all actuators to ``bias ± amplitude`` with the signs
+    of one Hadamard row; the measurement for each pattern is whatever the
+    user-supplied ``measure()`` returns (wavefront-sensor slopes, camera
+    pixels, ...) as a 1-D array.  With K patterns the interaction matrix is
+
+        D = Yᵀ S / (K · amplitude)          (n_measurements × n_act)
+
+    where S is the (K, n_act) sign matrix and Y the (K, n_measurements)
+    measurements.  Each column uses all K exposures, so for the same number
+    of exposures the noise on D is sqrt(K / 2) lower than with push-pull
+    single-actuator pokes.
+
+    Configuration dictionary::
+
+        {
+            "bias": 0.5,          # command around which actuators are poked
+            "amplitude": 0.05,    # poke amplitude (command units)
+            "n_repeats": 1,       # optional, passes over the full pattern set
+            "settle_s": 0.0,      # optional, wait after each send
+            "raw": False,         # optional, send without the DMClass calibration
+        }
+
+    Set ``raw`` when the matrix is for closed_loop.ClosedLoop, which sends
+    with ``send_fast`` (no calibration): the pokes then drive the same
+    actuator map as the loop.
+
+    Parameters
+    ----------
+    dm : DMClass
+        Opened DM.
+    measure : callable
+        ``measure() -> np.ndarray`` called once per pattern after the send.
+    config : dict
+    """
+
+    def __init__(self, dm, measure, config):
+        # type: (object, Callable[[], np.ndarray], Dict) -> None
+        self.dm = dm
+        self.measure = measure
+        self.bias = float(config.get("bias", 0.5))
+        self.amplitude = float(config.get("amplitude", 0.05))
+        self.n_repeats = int(config.get("n_repeats", 1))
+        self.settle_s = float(config.get("settle_s", 0.0))
+        self.raw = bool(config.get("raw", False))
+
+        if not 0.0 <= self.bias - self.amplitude <= self.bias + self.amplitude <= 1.0:
+            raise ValueError(
+                "bias ± amplitude must lie in [0, 1] "
+                "(bias={}, amplitude={})".format(self.bias, self.amplitude)
+            )
+
+        self.signs = None
+        self.matrix = None      # (n_measurements, n_act)
+        self.reference = None   # mean measurement at the bias
+        self.n_exposures = 0
+
+    # ─────────────────────────────────────────────
+    # Acquisition
+    # ─────────────────────────────────────────────
+    def patterns(self):
+        """Actuator commands for every Hadamard pattern, shape (K, n_act)."""
+        if self.dm.n_act is None:
+            raise RuntimeError("DM is not open — call dm.open() first")
+        self.signs = hadamard_patterns(self.dm.n_act)
+        return self.bias + self.amplitude * self.signs
+
+    def acquire(self):
+        """
+        Send every pattern ``n_repeats`` times and record the measurements.
+
+        Returns
+        -------
+        np.ndarray, shape (K, n_measurements)
+            Measurements averaged over the repeats.
+        """
+        commands = self.patterns()
+        K = len(commands)
+        Y = None
+
+        t0 = time.perf_counter()
+        for _ in range(self.n_repeats):
+            for k in range(K):
+                self.dm.send(commands[k], raw=self.raw)
+                if self.settle_s:
+                    time.sleep(self.settle_s)
+                y = np.asarray(self.measure(), dtype=float).ravel()
+                if Y is None:
+                    Y = np.zeros((K, y.size))
+                Y[k] += y
+        Y /= self.n_repeats
+        self.n_exposures = K * self.n_repeats
+
+        print(
+            "[INFO] Hadamard calibration: {} patterns x {} repeats, {} measurements, "
+            "{:.2f} s".format(K, self.n_repeats, Y.shape[1], time.perf_counter() - t0)
+        )
+        return Y
+
+    def invert(self, Y):
+        """Interaction matrix (n_measurements, n_act) from (K, n_measurements) data."""
+        Y = np.asarray(Y, dtype=float)
+        K = len(self.signs)
+        self.matrix = Y.T @ self.signs / (K * self.amplitude)
+        self.reference = Y.mean(axis=0)
+        return self.matrix
+
+    def run(self):
+        """Acquire and invert; returns the interaction matrix."""
+        return self.invert(self.acquire())
+
+    # ─────────────────────────────────────────────
+    # Storage
+    # ─────────────────────────────────────────────
+    def save(self, path):
+        """Store the interaction matrix and acquisition settings as .npz."""
+        if self.matrix is None:
+            raise RuntimeError("No interaction matrix yet — call run() first")
+        np.savez(
+            path,
+            matrix=self.matrix,
+            reference=self.reference,
+            bias=self.bias,
+            amplitude=self.amplitude,
+            n_exposures=self.n_exposures,
+            raw=self.raw,
+            serial=str(self.dm.serial),
+        )
+        print("[INFO] Saved interaction matrix {} to {}".format(self.matrix.shape, path))
+
+    @staticmethod
+    def load(path):
+        # type: (str) -> Dict
+        """Load a saved calibration: dict with ``matrix``, ``reference``, settings."""
+        with np.load(path) as data:
+            return {
+                "matrix": data["matrix"],
+                "reference": data["reference"],
+                "bias": float(data["bias"]),
+                "amplitude": float(data["amplitude"]),
+                "n_exposures": int(data["n_exposures"]),
+                "raw": bool(data["raw"]) if "raw" in data.files else False,
+                "serial": str(data["serial"]),
+            }
+
+
+class SimulatedSensor:
+    """
+    Linear sensor stand-in for testing: reads the command last sent to a
+    ``SimulatedBmcDm`` and returns ``G @ command + noise``.
+
+    Parameters
+    ----------
+    backend : SimulatedBmcDm
+        The backend passed to DMClass.
+    n_measurements : int
+        Length of every measurement (e.g. 2 × number of lenslets).
+    noise_std : float
+        Gaussian read noise per measurement.
+    matrix : np.ndarray or None
+        True (n_measurements, n_act) response; random if None.
+    seed : int
+    """
+
+    def __init__(self, backend, n_measurements=274, noise_std=1e-3, matrix=None, seed=0):
+        # type: (object, int, float, Optional[np.ndarray], int) -> None
+        self.backend = backend
+        self._rng = np.random.RandomState(seed)
+        n_act = backend.num_actuators()
+        if matrix is None:
+            matrix = self._rng.normal(0.0, 1.0, (n_measurements, n_act))
+        self.matrix = np.asarray(matrix, dtype=float)
+        self.noise_std = float(noise_std)
+        self.n_reads = 0
+
+    def __call__(self):
+        self.n_reads += 1
+        y = self.matrix @ self.backend.last_command
+        return y + self._rng.normal(0.0, self.noise_std, y.shape)
@@ -0,0 +1,188 @@
+# modal_basis.py
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from patterns import PatternGenerator
+
+# (N, radius_px, n_max) -> (mode keys, raw modes, orthonormal modes)
+_BASIS_CACHE = {}  # type: Dict[Tuple[int, float, int], Tuple[List[str], np.ndarray, np.ndarray]]
+
+
+def actuator_mask(N):
+    """Actuator sites of DMClass._apply_circular_mask (r² <= (N/2)²)."""
+    y, x = np.indices((N, N))
+    c = (N - 1) / 2
+    return (x - c) ** 2 + (y - c) ** 2 <= (N / 2) ** 2
+
+
+def mode_keys(n_max):
+    # type: (int) -> List[str]
+    """sup_zernike keys ``"(n,m)"`` up to radial order n_max, in dict order."""
+    return ["({},{})".format(n, m) for n in range(n_max + 1) for m in range(-n, n + 1, 2)]
+
+
+def _build_basis(N, radius_px, n_max):
+    """Raw sampled Zernikes on the actuator sites and their QR orthonormalisation."""
+    patterns = PatternGenerator(N=N)
+    mask = actuator_mask(N)
+    keys = mode_keys(n_max)
+
+    raw = np.empty((int(mask.sum()), len(keys)))
+    for k, key in enumerate(keys):
+        n, m = (int(v) for v in key.strip("()").split(","))
+        cmd = patterns.zernike({"n": n, "m": m, "amplitude_lambda": 1.0,
+                                "offset_lambda": 0.0, "radius_px": radius_px},
+                               Check_ampl=False)
+        raw[:, k] = cmd[mask] / patterns._lambda_to_command(1.0)
+
+    # Gram–Schmidt in mode order == QR; mode k spans raw modes 0..k
+    Q, R = np.linalg.qr(raw)
+    d = np.diag(R)
+    if np.min(np.abs(d)) < 1e-9 * np.max(np.abs(d)):
+        raise ValueError(
+            "Sampled Zernikes up to n={} are linearly dependent on the {} actuators "
+            "inside radius_px={}".format(n_max, int(np.count_nonzero(raw.any(axis=1))),
+                                         radius_px)
+        )
+    Q *= np.sign(d)
+    n_inside = np.count_nonzero(raw.any(axis=1))
+    ortho = Q * np.sqrt(n_inside)  # unit RMS over the actuators inside the radius
+    return keys, raw, ortho
+
+
+class ModalBasis:
+    """
+    Discrete orthonormal Zernike basis on the actual actuator sites.
+
+    Sampled Zernikes on the masked 13×13 grid with the hard ``radius_px``
+    cut are not orthogonal, so ``sup_zernike`` amplitudes cross-talk.  This
+    basis orthonormalises them (QR, in the ``"(n,m)"`` order of the
+    sup_zernike dictionaries) so that
+
+        surface_lambda = coeffs @ modes.T          (synthesis)
+        coeffs         = surface_lambda @ modes / n_inside   (projection)
+
+    are single matrix products over any stack ``(..., n_act)``.  Modes have
+    unit RMS over the actuators inside the radius, so a coefficient is the
+    RMS surface of that mode in waves.  Mode ``k`` is the part of raw mode
+    ``k`` orthogonal to modes ``0..k-1``.
+
+    Basis matrices are cached per (N, radius_px, n_max); wavelength and
+    stroke only set the command ↔ wave conversion.
+
+    Parameters
+    ----------
+    N : int
+        Actuator grid side.
+    radius_px : float
+        Zernike radius in actuator pitches (as in PatternGenerator).
+    n_max : int
+        Highest radial order.
+    wavelength_nm, stroke_um : float
+        As in PatternGenerator.
+    """
+
+    def __init__(self, N=13, radius_px=6.5, n_max=4, wavelength_nm=632.8, stroke_um=1.5):
+        # type: (int, float, int, float, float) -> None
+        self.N = int(N)
+        self.radius_px = float(radius_px)
+        self.n_max = int(n_max)
+        self.wavelength_um = float(wavelength_nm) * 1e-3
+        self.stroke_um = float(stroke_um)
+
+        key = (self.N, self.radius_px, self.n_max)
+        if key not in _BASIS_CACHE:
+            _BASIS_CACHE[key] = _build_basis(*key)
+        self.keys, self.raw_modes, self.modes = _BASIS_CACHE[key]
+
+        self.mask = actuator_mask(self.N)
+        self.n_act = self.modes.shape[0]
+        self.n_inside = int(np.count_nonzero(self.raw_modes.any(axis=1)))
+        # command units per wave of surface
+        self.command_per_lambda = self.wavelength_um / self.stroke_um
+
+    def __repr__(self):
+        return "ModalBasis(N={}, radius_px={}, n_max={}: {} modes on {} actuators)".format(
+            self.N, self.radius_px, self.n_max, len(self.keys), self.n_inside)
+
+    # ─────────────────────────────────────────────
+    # Shape handling
+    # ─────────────────────────────────────────────
+    def to_vector(self, commands):
+        """Actuator vectors ``(..., n_act)`` from grids ``(..., N, N)`` or vectors."""
+        cmd = np.asarray(commands, dtype=float)
+        if cmd.shape[-2:] == (self.N, self.N):
+            return cmd[..., self.mask]
+        if cmd.shape[-1] == self.n_act:
+            return cmd
+        raise ValueError("Expected (..., {0}, {0}) grids or (..., {1}) vectors, "
+                         "got shape {2}".format(self.N, self.n_act, cmd.shape))
+
+    def to_grid(self, vectors):
+        """DMClass-style grids with masked cells set to -1."""
+        vec = np.asarray(vectors, dtype=float)
+        grid = np.full(vec.shape[:-1] + (self.N, self.N), -1.0)
+        grid[..., self.mask] = vec
+        return grid
+
+    # ─────────────────────────────────────────────
+    # Synthesis / projection
+    # ─────────────────────────────────────────────
+    def synthesize(self, coeffs, offset_lambda=0.0):
+        """
+        Command vectors ``(..., n_act)`` for orthonormal coefficients
+        ``(..., n_modes)`` (waves RMS), plus a uniform ``offset_lambda``.
+        """
+        surface = offset_lambda + np.asarray(coeffs, dtype=float) @ self.modes.T
+        return surface * self.command_per_lambda
+
+    def project(self, commands):
+        """
+        Orthonormal coefficients ``(..., n_modes)`` of command grids or vectors.
+
+        Only actuators inside ``radius_px`` contribute; a uniform offset
+        appears in the ``"(0,0)"`` coefficient.
+        """
+        surface = self.to_vector(commands) / self.command_per_lambda
+        return surface @ self.modes / self.n_inside
+
+    def residual(self, commands):
+        """Part of the commands (inside the radius) not spanned by the basis."""
+        vec = self.to_vector(commands)
+        fit = self.synthesize(self.project(vec))
+        inside = self.raw_modes.any(axis=1)
+        return np.where(inside, vec - fit, 0.0)
+
+    def from_sup_zernike(self, zernike_superpos_params):
+        # type: (Dict) -> np.ndarray
+        """
+        Orthonormal coefficients of the (unclipped) command that
+        PatternGenerator.sup_zernike builds from a parameter dict.
+        """
+        patterns = PatternGenerator(N=self.N, wavelength_nm=self.wavelength_um * 1e3,
+                                    stroke_um=self.stroke_um)
+        return self.project(patterns.sup_zernike(zernike_superpos_params, clip=False))
+
+    def raw_to_coefficients(self, raw_amplitudes):
+        """
+        Orthonormal coefficients of peak-normalised raw Zernike amplitudes
+        ``(..., n_modes)`` (the sup_zernike amplitudes), showing cross-talk.
+        """
+        return np.asarray(raw_amplitudes, dtype=float) @ (self.raw_modes.T @ self.modes) \
+            / self.n_inside
+
+
+def load_pattern_csv(path):
+    """Grid or vector from a saved dm_pattern / DMShape CSV."""
+    return np.loadtxt(path, delimiter=",", ndmin=1)
+
+
+def decompose_archive(paths, basis):
+    # type: (List[str], ModalBasis) -> np.ndarray
+    """
+    Coefficients ``(len(paths), n_modes)`` of a scan archive of saved
+    patterns, in one projection.
+    """
+    stack = np.stack([basis.to_vector(load_pattern_csv(p)) for p in paths])
+    return basis.project(stack)
@@ -1,8 +1,43 @@
 import ast
-from typing import Dict
+import os
+from typing import Dict, Tuple
 import numpy as np
 from zernike import RZern
 
+# (target shape, N, radius_px, method) -> (columns, weights) of the sparse
+# resampling operator onto the pupil sites, see PatternGenerator._target_operator
+_TARGET_OPERATORS = {}  # type: Dict[Tuple, Tuple[np.ndarray, np.ndarray]]
+
+
+def _axis_weights(n_pixels: int, centres_px: np.ndarray, radius_px: float,
+                  method: str) -> np.ndarray:
+    """
+    Dense 1-D resampling weights (len(centres_px), n_pixels) from an image
+    axis spanning [-radius_px, radius_px] onto actuator centres.
+    """
+    scale = n_pixels / (2.0 * radius_px)          # image pixels per actuator pitch
+    if n_pixels == 1:
+        return np.ones((centres_px.size, 1))
+    if method == "bilinear":
+        p = np.clip((centres_px + radius_px) * scale - 0.5, 0.0, n_pixels - 1.0)
+        p0 = np.minimum(np.floor(p).astype(int), n_pixels - 2)
+        rows = np.arange(centres_px.size)
+        W = np.zeros((centres_px.size, n_pixels))
+        W[rows, p0] = 1.0 - (p - p0)
+        W[rows, p0 + 1] = p - p0
+    elif method == "area":
+        # overlap of the actuator cell [c - 1/2, c + 1/2] with every pixel
+        lo = (centres_px - 0.5 + radius_px) * scale
+        hi = (centres_px + 0.5 + radius_px) * scale
+        edges = np.arange(n_pixels)
+        W = np.clip(np.minimum(hi[:, None], edges + 1) - np.maximum(lo[:, None], edges), 0.0, None)
+        empty = W.sum(axis=1) == 0               # cell fully outside the image
+        nearest = np.clip(np.rint(0.5 * (lo + hi) - 0.5).astype(int), 0, n_pixels - 1)
+        W[empty, nearest[empty]] = 1.0
+    else:
+        raise ValueError(f"Unknown resampling method {method!r} (use 'area' or 'bilinear')")
+    return W / W.sum(axis=1, keepdims=True)
+
 
 class PatternGenerator:
     """
@@ -109,7 +144,8 @@ class PatternGenerator:
                                   offset_lambda)
 
         cmd = self._lambda_to_command(surface_lambda)
-        cmd = self._check_command_validity(cmd)
+        if clip:
+            cmd = self._check_command_validity(cmd)
         return cmd
 
     # ─────────────────────────────────────────────
@@ -217,6 +253,124 @@ class PatternGenerator:
             cmd = self._check_command_validity(cmd)
         return cmd
 
+    # ─────────────────────────────────────────────
+    # Arbitrary target surface
+    # ─────────────────────────────────────────────
+    @staticmethod
+    def load_target(path: str) -> np.ndarray:
+        """
+        Target array from a .npy (2-D, or 3-D stack of frames), .csv, or image
+        file (grayscale, channels averaged; image row 0 is the top row).
+        """
+        ext = os.path.splitext(path)[1].lower()
+        if ext == ".npy":
+            return np.load(path)
+        if ext in (".csv", ".txt"):
+            return np.loadtxt(path, delimiter=",", ndmin=2)
+        import matplotlib.image as mpimg  # only needed for image targets
+        img = np.asarray(mpimg.imread(path), dtype=float)
+        if img.ndim == 3:
+            img = img[..., :3].mean(axis=-1)
+        return img
+
+    def _target_operator(self, shape: Tuple[int, int], radius_px: float,
+                         method: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sparse operator from a (H, W) target onto the grid cells inside
+        ``radius_px``, cached per (shape, N, radius_px, method).
+
+        The operator is separable (row weights ⊗ column weights), stored as
+        fixed-width rows: ``columns`` and ``weights`` of shape (n_sites, K)
+        into the flattened target, so resampling is one gather-and-sum.
+        """
+        key = (tuple(shape), self.N, float(radius_px), method)
+        op = _TARGET_OPERATORS.get(key)
+        if op is not None:
+            return op
+
+        H, W = shape
+        inside = self.r_px <= radius_px
+        iy, ix = np.nonzero(inside)
+        centres = np.arange(self.N) - (self.N - 1) / 2
+        Wy = _axis_weights(H, centres, radius_px, method)[iy]          # (n_sites, H)
+        Wx = _axis_weights(W, centres, radius_px, method)[ix]          # (n_sites, W)
+
+        ky = max(int(np.count_nonzero(Wy, axis=1).max()), 1)
+        kx = max(int(np.count_nonzero(Wx, axis=1).max()), 1)
+        # k largest weights per row (all nonzeros, padded with zero weights)
+        cy = np.argsort(-Wy, axis=1, kind="stable")[:, :ky]
+        cx = np.argsort(-Wx, axis=1, kind="stable")[:, :kx]
+        wy = np.take_along_axis(Wy, cy, axis=1)
+        wx = np.take_along_axis(Wx, cx, axis=1)
+
+        columns = (cy[:, :, None] * W + cx[:, None, :]).reshape(iy.size, ky * kx)
+        weights = (wy[:, :, None] * wx[:, None, :]).reshape(iy.size, ky * kx)
+        op = (columns, weights)
+        _TARGET_OPERATORS[key] = op
+        return op
+
+    def resample_target(self, target: np.ndarray, radius_px: float,
+                        method: str = "area") -> np.ndarray:
+        """
+        Resample a target (H, W) — or a stack (..., H, W), e.g. video frames —
+        onto the grid cells inside ``radius_px``.
+
+        The target spans the square [-radius_px, radius_px]² around the grid
+        centre (row 0 at the top, like the command grids).  Returns
+        (..., N, N) in the target's units, 0 outside the radius.
+        """
+        target = np.asarray(target, dtype=float)
+        if target.ndim < 2:
+            raise ValueError(f"Target must be (H, W) or (..., H, W), got shape {target.shape}")
+        columns, weights = self._target_operator(target.shape[-2:], radius_px, method)
+
+        flat = target.reshape(target.shape[:-2] + (-1,))
+        sites = np.einsum("...sk,sk->...s", flat[..., columns], weights)
+
+        out = np.zeros(target.shape[:-2] + (self.N, self.N))
+        out[..., self.r_px <= radius_px] = sites
+        return out
+
+    def target(self, params: Dict, clip: bool = True) -> np.ndarray:
+        """
+        DM command grid(s) from an arbitrary target surface.
+
+        The input dictionary contains:
+            - "target": array (H, W) or (T, H, W) in waves, or a file path
+              (see load_target)
+            - "radius_px": pupil radius the target spans
+            - "amplitude_lambda" (default 1): scale applied to the target
+            - "offset_lambda" (default 0): added everywhere; cells outside
+              the radius get the offset only (as in column_gradient)
+            - "normalize" (default False): scale the target to peak |1| first
+            - "method" (default "area"): "area" or "bilinear"
+
+        Returns an (N, N) grid, or (T, N, N) for a stack of targets.  The
+        resampling operator is cached, so every further target of the same
+        shape costs one sparse product.
+        """
+        target = params["target"]
+        if isinstance(target, str):
+            target = self.load_target(target)
+        target = np.asarray(target, dtype=float)
+        radius_px = float(params["radius_px"])
+        if radius_px <= 0:
+            raise ValueError("radius_px must be > 0")
+
+        if params.get("normalize", False):
+            peak = np.max(np.abs(target), axis=(-2, -1), keepdims=True)
+            target = target / np.where(peak > 0, peak, 1.0)
+
+        surface_lambda = params.get("amplitude_lambda", 1.0) * self.resample_target(
+            target, radius_px, params.get("method", "area"))
+        surface_lambda = surface_lambda + params.get("offset_lambda", 0.0)
+
+        cmd = self._lambda_to_command(surface_lambda)
+        if clip:
+            cmd = self._check_command_validity(cmd)
+        return cmd
+
+
 
 
 
@@ -0,0 +1,269 @@
+"""
+Batch job runner for the DM.
+
+Runs a whole list of patterns from one job file in a single process: the
+DM is opened once, every frame is generated and range-checked before the
+mirror is touched, frames are sent with their dwell times, and a timing
+summary is written at the end.  The DM is closed even when a job fails.
+
+Job file (JSON, or YAML when PyYAML is installed)::
+
+    {
+        "serial": "25CW012#060",
+        "grid_size": 13,
+        "wavelength_nm": 532,
+        "stroke_um": 1.5,
+        "default_dwell_s": 1.0,
+        "calibration": "calib/dm_calibration.npz",      # optional, DMCalibration
+        "summary": "run_summary.json",                  # optional
+        "jobs": [
+            {"name": "defocus", "type": "zernike", "dwell_s": 2.0,
+             "params": {"n": 2, "m": 0, "amplitude_lambda": 0.3,
+                        "offset_lambda": 1.1, "radius_px": 6.5}},
+            {"type": "sup_zernike", "params": {"general": {...},
+                                               "zernike_amplitudes": {...}}},
+            {"type": "column_gradient", "params": {...}},
+            {"type": "profile", "path": "output_shapes/dm_gradient_k6.csv"},
+            {"type": "target", "params": {"target": "targets/potential.npy",
+                                          "radius_px": 6.5, "offset_lambda": 1.0}},
+            {"type": "flat"},                           # needs "calibration"
+        ]
+    }
+
+Every job may set ``"repeat"`` (default 1).  ``profile`` files are either
+137-value vectors (DMShape.unwrap_and_save) or N×N grids with masked cells
+at -1 (DMClass.save_pattern_data).
+
+Frames are converted to hardware commands (calibration applied) and
+quantised to DAC codes (dac_frames.DACFrames) before the DM is opened;
+identical frames are stored once.
+
+Usage::
+
+    python run_jobs.py jobs.json
+    python run_jobs.py jobs.json --dry-run      # generate and validate only
+    python run_jobs.py jobs.json --simulate     # SimulatedBmcDm, no hardware
+    python run_jobs.py jobs.json --dry-run --save-frames seq.npz   # archive the DAC sequence
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from calibration import DMCalibration
+from dac_frames import DACFrames
+from dm_wrapper import DMClass
+from patterns import PatternGenerator
+from sim_backend import SimulatedBmcDm
+
+try:
+    import yaml
+except ImportError:  # JSON job files only
+    yaml = None
+
+
+def load_job_file(path):
+    """Parse a JSON or YAML job file."""
+    with open(path) as fh:
+        if os.path.splitext(path)[1].lower() in (".yaml", ".yml"):
+            if yaml is None:
+                raise RuntimeError("PyYAML is not installed — use a JSON job file")
+            return yaml.safe_load(fh)
+        return json.load(fh)
+
+
+def _load_profile(path, dm):
+    """Grid (N×N) or actuator vector from a saved profile CSV."""
+    data = np.loadtxt(path, delimiter=",", ndmin=1)
+    N = dm.grid_size
+    if data.shape == (N, N):
+        return "grid", data
+    n_act = int(np.count_nonzero(dm._apply_circular_mask(np.zeros((N, N))) >= 0))
+    if data.size == n_act:
+        return "vector", data.ravel()
+    raise ValueError("{}: expected {}x{} grid or {} values, got shape {}".format(
+        path, N, N, n_act, data.shape))
+
+
+def build_frame(job, patterns, dm):
+    """
+    Generate one job's frame without clipping.
+
+    Returns ``(kind, data)`` with kind ``"grid"``, ``"vector"`` or ``"flat"``;
+    raises ValueError when the frame is outside [0, 1].
+    """
+    kind = job["type"]
+    if kind == "flat":
+        if dm.calibration is None:
+            raise ValueError("'flat' job needs a calibration in the job file")
+        return "flat", dm.calibration.flat_map
+    if kind == "profile":
+        shape, data = _load_profile(job["path"], dm)
+    elif kind == "zernike":
+        shape, data = "grid", patterns.zernike(job["params"], Check_ampl=False)
+    elif kind == "sup_zernike":
+        shape, data = "grid", patterns.sup_zernike(job["params"], clip=False)
+    elif kind == "column_gradient":
+        shape, data = "grid", patterns.column_gradient(job["params"], clip=False)
+    elif kind == "target":
+        shape, data = "grid", patterns.target(job["params"], clip=False)
+        if data.ndim != 2:
+            raise ValueError("'target' jobs take a single (H, W) target, got a stack")
+    else:
+        raise ValueError("Unknown job type {!r}".format(kind))
+
+    values = data[dm._apply_circular_mask(data) >= 0] if shape == "grid" else data
+    PatternGenerator._check_command_validity(values, clip=False)
+    return shape, data
+
+
+def hardware_vector(kind, data, dm):
+    """Actuator vector as sent to the driver (masked, calibration applied)."""
+    if kind == "grid":
+        data = data[dm._apply_circular_mask(data) >= 0]
+    if dm.calibration is not None and kind != "flat":
+        data = dm.calibration.apply(data)
+    return np.asarray(data, dtype=float)
+
+
+def prepare(job_file, dm):
+    """
+    Generate and validate every frame; raises before the DM is opened.
+
+    Returns ``(frames, codes)``: the playback list (name, repeat, dwell and
+    ``index`` into ``codes``) and the distinct frames as DACFrames.
+    """
+    patterns = PatternGenerator(
+        N=job_file.get("grid_size", 13),
+        wavelength_nm=job_file.get("wavelength_nm", 632.8),
+        stroke_um=job_file.get("stroke_um", 1.5),
+    )
+    default_dwell = float(job_file.get("default_dwell_s", 1.0))
+
+    frames, vectors, errors = [], [], []
+    for i, job in enumerate(job_file["jobs"]):
+        name = job.get("name", "{:03d}_{}".format(i, job.get("type")))
+        try:
+            kind, data = build_frame(job, patterns, dm)
+        except (ValueError, KeyError, OSError) as e:
+            errors.append("{}: {}".format(name, e))
+            continue
+        dwell = float(job.get("dwell_s", default_dwell))
+        for r in range(int(job.get("repeat", 1))):
+            frames.append({"name": name, "repeat": r, "index": len(vectors), "dwell_s": dwell})
+        vectors.append(hardware_vector(kind, data, dm))
+
+    if errors:
+        raise ValueError("{} invalid job(s):\n  {}".format(len(errors), "\n  ".join(errors)))
+    if not vectors:
+        return frames, None
+
+    codes, inverse = DACFrames.from_float(np.stack(vectors)).deduplicate()
+    for frame in frames:
+        frame["index"] = int(inverse[frame["index"]])
+    return frames, codes
+
+
+def execute(frames, codes, dm):
+    """Send every frame and wait its dwell; returns per-frame timings."""
+    timings = []
+    t0 = time.perf_counter()
+    for k, frame in enumerate(frames):
+        t_start = time.perf_counter()
+        dm.send_dac(codes, frame["index"])
+        t_sent = time.perf_counter()
+        print("[INFO] {}/{} {} (send {:.2f} ms)".format(
+            k + 1, len(frames), frame["name"], 1e3 * (t_sent - t_start)))
+
+        remaining = frame["dwell_s"] - (time.perf_counter() - t_start)
+        if remaining > 0:
+            time.sleep(remaining)
+        t_end = time.perf_counter()
+
+        timings.append({
+            "index": k,
+            "name": frame["name"],
+            "repeat": frame["repeat"],
+            "t_start_s": t_start - t0,
+            "send_s": t_sent - t_start,
+            "dwell_s": t_end - t_sent,
+        })
+    return timings
+
+
+def run(job_file, backend=None, dry_run=False, save_frames=None):
+    """
+    Prepare and execute a parsed job file.
+
+    ``save_frames`` (path) archives the full playback sequence as DACFrames
+    (.npz).  Returns the summary dict (also written to
+    ``job_file["summary"]`` if set).
+    """
+    t_begin = time.perf_counter()
+    grid_size = job_file.get("grid_size", 13)
+    if dry_run and backend is None:  # the DM is never opened
+        backend = SimulatedBmcDm(grid_size)
+    dm = DMClass(serial=job_file["serial"], grid_size=grid_size, backend=backend)
+    if job_file.get("calibration"):
+        dm.set_calibration(DMCalibration.load(job_file["calibration"]))
+
+    frames, codes = prepare(job_file, dm)
+    t_prepared = time.perf_counter()
+    n_distinct = 0 if codes is None else len(codes)
+    print("[INFO] {} frames ({} distinct on the DAC) generated and validated in {:.3f} s".format(
+        len(frames), n_distinct, t_prepared - t_begin))
+    if save_frames and codes is not None:
+        codes[[f["index"] for f in frames]].save(save_frames)
+
+    summary = {
+        "serial": job_file["serial"],
+        "n_frames": len(frames),
+        "n_distinct_frames": n_distinct,
+        "prepare_s": t_prepared - t_begin,
+        "dry_run": dry_run,
+    }
+    if not dry_run:
+        dm.open()
+        t_opened = time.perf_counter()
+        try:
+            timings = execute(frames, codes, dm)
+        finally:
+            dm.close()
+        send = np.array([t["send_s"] for t in timings])
+        summary.update({
+            "open_s": t_opened - t_prepared,
+            "run_s": time.perf_counter() - t_opened,
+            "send_mean_ms": 1e3 * float(send.mean()) if send.size else None,
+            "send_max_ms": 1e3 * float(send.max()) if send.size else None,
+            "frames": timings,
+        })
+        print("[INFO] Ran {} frames in {:.2f} s (send mean {:.2f} ms, max {:.2f} ms)".format(
+            len(frames), summary["run_s"], summary["send_mean_ms"] or 0.0,
+            summary["send_max_ms"] or 0.0))
+
+    if job_file.get("summary"):
+        with open(job_file["summary"], "w") as fh:
+            json.dump(summary, fh, indent=2)
+        print("[INFO] Summary written to {}".format(job_file["summary"]))
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a batch of DM patterns from a job file")
+    parser.add_argument("job_file")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="generate and validate frames without opening the DM")
+    parser.add_argument("--simulate", action="store_true",
+                        help="use SimulatedBmcDm instead of the hardware")
+    parser.add_argument("--summary", default=None, help="override the summary path")
+    parser.add_argument("--save-frames", default=None,
+                        help="archive the playback sequence as DAC frames (.npz)")
+    args = parser.parse_args()
+
+    jobs = load_job_file(args.job_file)
+    if args.summary:
+        jobs["summary"] = args.summary
+    backend = SimulatedBmcDm(jobs.get("grid_size", 13)) if args.simulate else None
+    run(jobs, backend=backend, dry_run=args.dry_run, save_frames=args.save_frames)
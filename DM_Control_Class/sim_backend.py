@@ -0,0 +1,53 @@
+# sim_backend.py
+import numpy as np
+
+
+class SimulatedBmcDm:
+    """
+    Software stand-in for ``bmc.BmcDm``.
+
+    Implements the subset of the BMC SDK interface used by DMClass
+    (open_dm, num_actuators, send_data, close_dm, error_string) so that
+    the send path can be exercised in venv_main, in benchmarks and in
+    offline tooling without the hardware or the Python 3.6 SDK.
+
+    Parameters
+    ----------
+    grid_size : int
+        Side length of the square actuator grid.  The actuator count is the
+        number of grid sites inside the circular aperture used by DMClass.
+    """
+
+    def __init__(self, grid_size=13):
+        N = int(grid_size)
+        y, x = np.indices((N, N))
+        c = (N - 1) / 2
+        self._n_act = int(np.count_nonzero((x - c)**2 + (y - c)**2 <= (N / 2)**2))
+
+        self.serial = None
+        self.is_open = False
+        self.n_sends = 0
+        self.last_command = np.zeros(self._n_act)
+
+    def open_dm(self, serial):
+        self.serial = serial
+        self.is_open = True
+        return 0
+
+    def num_actuators(self):
+        return self._n_act
+
+    def send_data(self, data):
+        if not self.is_open:
+            return 1
+        self.last_command[:] = data
+        self.n_sends += 1
+        return 0
+
+    def close_dm(self):
+        self.is_open = False
+        return 0
+
+    @staticmethod
+    def error_string(err):
+        return "Simulated DM error {}".format(err)
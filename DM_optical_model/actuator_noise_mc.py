@@ -0,0 +1,218 @@
+import numpy as np
+
+from forward_model import DMForwardModel
+
+# Actuator noise model (command units; 1 command unit = full stroke)
+DEFAULT_NOISE = {
+    "white_cmd_per_rtHz": 1e-6,    # white level of every actuator
+    "corner_Hz": 0.0,              # 1/f^alpha corner (0: white only)
+    "alpha": 1.0,
+    "common_fraction": 0.0,        # share of the noise power common to all actuators
+    "gain": 1.0,                   # scalar or per-actuator (n_act,) noise scale
+    "dac_bits": 14,                # None: no quantisation
+}
+
+
+def noise_psd(freq_Hz, noise: dict) -> np.ndarray:
+    """
+    One-sided command-noise PSD (command units²/Hz) of one actuator:
+    ``white² · (1 + (corner / f)^alpha)``, zero at DC.
+    """
+    noise = {**DEFAULT_NOISE, **noise}
+    f = np.asarray(freq_Hz, dtype=float)
+    S = np.zeros_like(f)
+    pos = f > 0
+    S[pos] = noise["white_cmd_per_rtHz"] ** 2 * (1 + (noise["corner_Hz"] / f[pos]) ** noise["alpha"])
+    return S
+
+
+def actuator_noise(n_samples: int, n_act: int, sample_rate_Hz: float, noise: dict,
+                   rng: np.random.Generator) -> np.ndarray:
+    """
+    Coloured command noise ``(n_samples, n_act)`` with the PSD of noise_psd,
+    by shaping white Gaussian noise in the frequency domain (all actuators
+    in one rfft / irfft).
+    """
+    noise = {**DEFAULT_NOISE, **noise}
+    f = np.fft.rfftfreq(n_samples, 1.0 / sample_rate_Hz)
+    # unit-variance white noise has a one-sided PSD of 2 / fs
+    shape = np.sqrt(noise_psd(f, noise) * sample_rate_Hz / 2)
+
+    c = float(noise["common_fraction"])
+    white = rng.standard_normal((n_act, n_samples)) * np.sqrt(1 - c)
+    if c > 0:
+        white += rng.standard_normal(n_samples) * np.sqrt(c)
+    x = np.fft.irfft(np.fft.rfft(white, axis=-1) * shape, n=n_samples, axis=-1)
+    x *= np.reshape(np.asarray(noise["gain"], dtype=float), (-1, 1))
+    return x.T
+
+
+def quantise(commands, dac_bits: int | None) -> np.ndarray:
+    """Commands rounded to the ``dac_bits`` DAC grid over [0, 1] (clipped)."""
+    cmd = np.clip(commands, 0.0, 1.0)
+    if dac_bits is None:
+        return cmd
+    levels = 2 ** int(dac_bits) - 1
+    return np.rint(cmd * levels) / levels
+
+
+def one_sided_psd(x, sample_rate_Hz: float):
+    """
+    Hann-windowed one-sided PSD (units²/Hz) along the last axis, averaged
+    over all leading axes; the density scaling of RIN_analysis.tdms_welch.
+    """
+    x = np.asarray(x, dtype=float)
+    n = x.shape[-1]
+    window = np.hanning(n)
+    X = np.fft.rfft(x * window, axis=-1)
+    S = np.abs(X) ** 2 / (sample_rate_Hz * np.sum(window ** 2))
+    S[..., 1:(n + 1) // 2] *= 2
+    S = S.reshape(-1, S.shape[-1]).mean(axis=0)
+    return np.fft.rfftfreq(n, 1.0 / sample_rate_Hz), S
+
+
+class ActuatorNoiseMC:
+    """
+    Monte Carlo prediction of the intensity noise caused by actuator noise.
+
+    A static command (e.g. from PatternGenerator) is perturbed by coloured
+    per-actuator noise, quantised to the DAC grid, and every time sample is
+    propagated through the DMForwardModel; the power reaching the detector
+    gives a relative-intensity time series whose PSD is returned in dBc/Hz,
+    on the same scale as ``calculate_rin_dBc_per_Hz`` (one-sided density of
+    δP / P̄).
+
+    Configuration dictionary::
+
+        {
+            "sample_rate_Hz": 100e3,
+            "n_samples": 2048,          # per realisation (sets the resolution)
+            "n_realisations": 4,        # PSDs averaged
+            "noise": {...},             # see DEFAULT_NOISE
+            "detector": {"type": "pinhole", "radius_lambda_D": 1.0},
+                     #  or {"type": "overlap"}: power coupled into the
+                     #  noise-free field (single-mode fibre / mode overlap)
+            "seed": 0,
+        }
+
+    Parameters
+    ----------
+    model : DMForwardModel
+        Sets the optics; its ``chunk_size`` bounds the FFT batch.
+    config : dict
+    """
+
+    def __init__(self, model: DMForwardModel, config: dict | None = None):
+        config = config or {}
+        self.model = model
+        self.sample_rate_Hz = float(config.get("sample_rate_Hz", 100e3))
+        self.n_samples = int(config.get("n_samples", 2048))
+        self.n_realisations = int(config.get("n_realisations", 4))
+        self.noise = {**DEFAULT_NOISE, **config.get("noise", {})}
+        self.detector = {"type": "pinhole", "radius_lambda_D": 1.0, **config.get("detector", {})}
+        self.seed = config.get("seed", 0)
+
+        if self.detector["type"] == "pinhole":
+            r = model.focal_coords()
+            centred = r[:, None] ** 2 + r[None, :] ** 2 <= self.detector["radius_lambda_D"] ** 2
+            self._pinhole = np.fft.ifftshift(centred)  # unshifted FFT layout
+        elif self.detector["type"] != "overlap":
+            raise ValueError(f"Unknown detector type {self.detector['type']!r} "
+                             f"(use 'pinhole' or 'overlap')")
+
+    def __repr__(self):
+        return (f"ActuatorNoiseMC({self.n_realisations} x {self.n_samples} samples "
+                f"at {self.sample_rate_Hz:g} Hz, {self.detector['type']})")
+
+    # ----------------------------------------------------------------------
+    def detected_power(self, commands, reference=None) -> np.ndarray:
+        """
+        Detected power ``(...)`` of command vectors/grids ``(..., n_act)``,
+        as a fraction of the power reflected by the aperture.
+
+        ``reference`` (command) is the field the ``"overlap"`` detector
+        projects on.
+        """
+        model = self.model
+        vec = model.to_vector(commands)
+        out = np.empty(int(np.prod(vec.shape[:-1])))
+
+        if self.detector["type"] == "overlap":
+            if reference is None:
+                raise ValueError("The 'overlap' detector needs a reference command")
+            # Parseval: the focal-plane overlap equals the pupil overlap
+            ref = model.aperture * np.exp(1j * model.pupil_phase(reference))
+            ref /= np.sqrt(np.sum(np.abs(ref) ** 2))
+            norm = 1.0 / np.sqrt(model.aperture.sum())
+            for start, phase in model._chunks(vec):
+                E = model.aperture * np.exp(1j * phase)
+                out[start:start + len(phase)] = \
+                    np.abs(np.einsum("nij,ij->n", E, ref.conj()) * norm) ** 2
+        else:
+            for start, phase in model._chunks(vec):
+                I = np.abs(model._propagate(phase)) ** 2
+                out[start:start + len(phase)] = I[:, self._pinhole].sum(axis=-1) * model._norm
+        return out.reshape(vec.shape[:-1])
+
+    def sensitivity(self, command, step: float = 1e-3) -> np.ndarray:
+        """
+        Relative power change per command unit of every actuator,
+        ``d(P / P0) / d cmd_i`` (central differences, one batched
+        evaluation) — which actuators' noise matters most.  For white
+        noise the linear RIN is ``S(f) · Σ g_i²``; with the ``"overlap"``
+        detector the slopes vanish at the reference (the response is
+        quadratic), so only the Monte Carlo is meaningful there.
+        """
+        base = self.model.to_vector(command)
+        n = base.size
+        probes = np.concatenate([base + step * np.eye(n), base - step * np.eye(n)])
+        P = self.detected_power(probes, reference=base)
+        P0 = self.detected_power(base, reference=base)
+        return (P[:n] - P[n:]) / (2 * step * P0)
+
+    def run(self, command, label: str = "Monte Carlo") -> dict:
+        """
+        Predicted RIN of a static command under actuator noise.
+
+        Parameters
+        ----------
+        command : np.ndarray
+            ``(N, N)`` grid or ``(n_act,)`` vector.
+
+        Returns
+        -------
+        dict
+            ``"label"``, ``"freq_Hz"``, ``"RIN_dBc_per_Hz"`` (the layout of
+            load_RIN_campaign results, DC bin dropped) plus ``"P0"``
+            (noise-free detected power), ``"rms_rin"`` (relative RMS over
+            the simulated band) and ``"quantisation_offset"`` (relative
+            power change from quantising the static command alone).
+        """
+        model = self.model
+        base = model.to_vector(command).astype(float)
+        rng = np.random.default_rng(self.seed)
+        bits = self.noise.get("dac_bits")
+
+        P0 = float(self.detected_power(base, reference=base))
+        P_quant = float(self.detected_power(quantise(base, bits), reference=base))
+
+        rel = np.empty((self.n_realisations, self.n_samples))
+        for r in range(self.n_realisations):
+            noisy = quantise(base + actuator_noise(self.n_samples, model.n_act,
+                                                   self.sample_rate_Hz, self.noise, rng), bits)
+            P = self.detected_power(noisy, reference=base)
+            rel[r] = P / P.mean() - 1.0
+
+        freq, S = one_sided_psd(rel, self.sample_rate_Hz)
+        with np.errstate(divide="ignore"):
+            rin = 10 * np.log10(S[1:])
+        print(f"[INFO] {label}: P0={P0:.4f}, RMS RIN {rel.std():.2e} "
+              f"over {self.n_realisations * self.n_samples} samples")
+        return {
+            "label": label,
+            "freq_Hz": freq[1:],
+            "RIN_dBc_per_Hz": rin,
+            "P0": P0,
+            "rms_rin": float(rel.std()),
+            "quantisation_offset": P_quant / P0 - 1.0,
+        }
@@ -0,0 +1,324 @@
+import numpy as np
+
+# Reflection doubles the optical path: phase = 4π · surface / λ
+REFLECTION_FACTOR = 2.0
+
+
+def actuator_mask(N: int) -> np.ndarray:
+    """Circular actuator mask of DMClass._apply_circular_mask (r² <= (N/2)²)."""
+    y, x = np.indices((N, N))
+    c = (N - 1) / 2
+    return (x - c) ** 2 + (y - c) ** 2 <= (N / 2) ** 2
+
+
+def bilinear_upsampling_matrix(N: int, samples_per_actuator: int) -> np.ndarray:
+    """
+    (P, N) matrix interpolating N actuator values onto P = N·s pupil samples.
+
+    Sample centres are at ``(p + 0.5) / s - 0.5`` in actuator units, values
+    beyond the outer actuators are held constant.  A 2-D map upsamples as
+    ``U @ grid @ U.T``.
+    """
+    s = int(samples_per_actuator)
+    u = np.clip((np.arange(N * s) + 0.5) / s - 0.5, 0.0, N - 1.0)
+    i0 = np.minimum(np.floor(u).astype(int), N - 2)
+    t = u - i0
+    U = np.zeros((N * s, N))
+    rows = np.arange(N * s)
+    U[rows, i0] = 1.0 - t
+    U[rows, i0 + 1] = t
+    return U
+
+
+class DMForwardModel:
+    """
+    Batched optical forward model: DM command → pupil phase → focal-plane
+    intensity.
+
+    The command grid (13×13, values in [0, 1], masked cells -1) is upsampled
+    bilinearly to a pupil of ``N · samples_per_actuator`` samples, converted
+    to phase with ``φ = 4π · cmd · stroke / λ``, cut by the circular aperture
+    and zero-padded by ``pad_factor`` before a 2-D FFT, so one focal-plane
+    pixel is ``λ / (pad_factor · D)``.
+
+    Configuration dictionary::
+
+        {
+            "N": 13,                        # actuator grid side
+            "wavelength_nm": 632.8,
+            "stroke_um": 1.5,
+            "samples_per_actuator": 8,      # optional
+            "pad_factor": 2,                # optional
+            "aperture_radius_act": 6.5,     # optional, actuator pitches (default N/2)
+            "chunk_size": 64,               # optional, patterns per FFT batch
+        }
+
+    Commands may be given as grids ``(..., N, N)`` or actuator vectors
+    ``(..., n_act)`` in the DMClass.send order (row-major over the mask).
+    Upsampling operators, the aperture and the padded complex buffers are
+    built once per model and reused for every chunk; numpy's FFT has no
+    explicit plans, but its twiddle factors are cached per transform size,
+    so fixing the padded size per model gets the same effect.
+    """
+
+    def __init__(self, config: dict):
+        self.N = int(config.get("N", 13))
+        self.wavelength_um = float(config.get("wavelength_nm", 632.8)) * 1e-3
+        self.stroke_um = float(config.get("stroke_um", 1.5))
+        self.samples_per_actuator = int(config.get("samples_per_actuator", 8))
+        self.pad_factor = int(config.get("pad_factor", 2))
+        self.aperture_radius_act = float(config.get("aperture_radius_act", self.N / 2))
+        self.chunk_size = int(config.get("chunk_size", 64))
+
+        # radians of pupil phase per unit command
+        self.rad_per_command = (2 * np.pi * REFLECTION_FACTOR
+                                * self.stroke_um / self.wavelength_um)
+
+        self.mask = actuator_mask(self.N)
+        self.n_act = int(np.count_nonzero(self.mask))
+        self._fill_index = self._nearest_actuator_index()
+        # (N², n_act) one-hot: adjoint of the fill, folds grid cells onto actuators
+        self._fold = np.zeros((self.N * self.N, self.n_act))
+        self._fold[np.arange(self.N * self.N), self._fill_index.ravel()] = 1.0
+
+        self.U = bilinear_upsampling_matrix(self.N, self.samples_per_actuator)
+        self.P = self.U.shape[0]
+        self.P_pad = self.P * self.pad_factor
+
+        s = self.samples_per_actuator
+        u = (np.arange(self.P) + 0.5) / s - 0.5 - (self.N - 1) / 2
+        self.aperture = (u[:, None] ** 2 + u[None, :] ** 2
+                         <= self.aperture_radius_act ** 2).astype(float)
+        # Parseval: Σ|FFT|² = P_pad² · Σ|pupil|² -> total focal power of 1
+        self._norm = 1.0 / (self.P_pad ** 2 * self.aperture.sum())
+
+        self._buffers = {}
+        self._phase_fit = None
+
+    def __repr__(self):
+        return (f"DMForwardModel(N={self.N}, pupil={self.P}px, padded={self.P_pad}px, "
+                f"{self.rad_per_command:.2f} rad/command)")
+
+    # ─────────────────────────────────────────────
+    # Command handling
+    # ─────────────────────────────────────────────
+    def _nearest_actuator_index(self) -> np.ndarray:
+        """
+        For every grid cell, the actuator (vector index) whose value it takes:
+        itself inside the mask, the nearest actuator outside, so masked cells
+        do not pull the edge of the pupil towards an arbitrary value.
+        """
+        y, x = np.indices((self.N, self.N))
+        ay, ax = y[self.mask], x[self.mask]
+        d2 = (y.ravel()[:, None] - ay) ** 2 + (x.ravel()[:, None] - ax) ** 2
+        return np.argmin(d2, axis=1).reshape(self.N, self.N)
+
+    def to_vector(self, commands) -> np.ndarray:
+        """Actuator vectors ``(..., n_act)`` from grids or vectors."""
+        cmd = np.asarray(commands, dtype=float)
+        if cmd.shape[-2:] == (self.N, self.N):
+            return cmd[..., self.mask]
+        if cmd.shape[-1] == self.n_act:
+            return cmd
+        raise ValueError(f"Expected (..., {self.N}, {self.N}) grids or "
+                         f"(..., {self.n_act}) vectors, got shape {cmd.shape}")
+
+    def to_grid(self, vectors) -> np.ndarray:
+        """DMClass-style grids ``(..., N, N)`` with masked cells set to -1."""
+        vec = np.asarray(vectors, dtype=float)
+        grid = np.full(vec.shape[:-1] + (self.N, self.N), -1.0)
+        grid[..., self.mask] = vec
+        return grid
+
+    def pupil_phase(self, commands) -> np.ndarray:
+        """Pupil phase in radians, shape ``(..., P, P)`` (zero outside the aperture)."""
+        filled = self.to_vector(commands)[..., self._fill_index]
+        surface = self.U @ filled @ self.U.T
+        return surface * (self.rad_per_command * self.aperture)
+
+    # ─────────────────────────────────────────────
+    # Propagation
+    # ─────────────────────────────────────────────
+    def _buffer(self, n: int) -> np.ndarray:
+        buf = self._buffers.get(n)
+        if buf is None:
+            buf = np.zeros((n, self.P_pad, self.P_pad), dtype=complex)
+            self._buffers[n] = buf
+        return buf
+
+    def _propagate(self, phase: np.ndarray) -> np.ndarray:
+        """Unshifted focal-plane field of a (n, P, P) phase chunk."""
+        buf = self._buffer(phase.shape[0])
+        P = self.P
+        np.exp(1j * phase, out=buf[:, :P, :P])
+        buf[:, :P, :P] *= self.aperture
+        return np.fft.fft2(buf)
+
+    def _focal_intensity(self, phase: np.ndarray) -> np.ndarray:
+        """Centred, power-normalised intensity of a (n, P, P) phase chunk."""
+        I = np.abs(self._propagate(phase)) ** 2
+        I *= self._norm
+        return np.fft.fftshift(I, axes=(-2, -1))
+
+    def _chunks(self, commands):
+        flat = self.to_vector(commands).reshape(-1, self.n_act)
+        for start in range(0, len(flat), self.chunk_size):
+            yield start, self.pupil_phase(flat[start:start + self.chunk_size])
+
+    def intensity(self, commands, crop: int | None = None) -> np.ndarray:
+        """
+        Focal-plane intensity, normalised to a total power of 1.
+
+        Parameters
+        ----------
+        commands : np.ndarray
+            ``(..., N, N)`` grids or ``(..., n_act)`` vectors.
+        crop : int or None
+            Return only the central ``crop × crop`` pixels (saves memory for
+            large batches).
+
+        Returns
+        -------
+        np.ndarray, shape ``(..., P_pad, P_pad)`` or ``(..., crop, crop)``
+            Centred (zero frequency at ``P_pad // 2``).
+        """
+        vec = self.to_vector(commands)
+        side = self.P_pad if crop is None else int(crop)
+        lo = self.P_pad // 2 - side // 2
+        out = np.empty((int(np.prod(vec.shape[:-1])), side, side))
+
+        for start, phase in self._chunks(vec):
+            I = self._focal_intensity(phase)
+            out[start:start + len(phase)] = I[:, lo:lo + side, lo:lo + side]
+        return out.reshape(vec.shape[:-1] + (side, side))
+
+    def evaluate(self, commands, score) -> np.ndarray:
+        """
+        Apply ``score(intensity_chunk) -> (n, ...)`` to every chunk of
+        centred intensities and concatenate the results, so thousands of
+        candidates can be ranked without keeping their images.
+        """
+        vec = self.to_vector(commands)
+        scores = [score(self._focal_intensity(phase)) for _, phase in self._chunks(vec)]
+        out = np.concatenate(scores)
+        return out.reshape(vec.shape[:-1] + out.shape[1:])
+
+    def focal_coords(self) -> np.ndarray:
+        """Focal-plane pixel coordinates in units of λ/D (centred)."""
+        return (np.arange(self.P_pad) - self.P_pad // 2) / self.pad_factor
+
+    # ─────────────────────────────────────────────
+    # Phase retrieval
+    # ─────────────────────────────────────────────
+    def _phase_fit_operator(self) -> np.ndarray:
+        """
+        (n_act, n_aperture_pixels) least-squares inverse of the command →
+        pupil-phase map over the aperture, built on first use.
+        """
+        if self._phase_fit is None:
+            # row-major vec(U @ grid @ U.T) = kron(U, U) @ vec(grid)
+            A = np.kron(self.U, self.U) @ self._fold * self.rad_per_command
+            self._phase_fit = np.linalg.pinv(A[self.aperture.ravel() > 0])
+        return self._phase_fit
+
+    def _fold_into_range(self, vec: np.ndarray) -> np.ndarray:
+        """Move commands outside [0, 1] by whole 2π phase steps back into range."""
+        span = 2 * np.pi / self.rad_per_command
+        vec = np.where(vec > 1.0, vec - span * np.ceil((vec - 1.0) / span), vec)
+        return np.where(vec < 0.0, vec + span * np.ceil(-vec / span), vec)
+
+    def _project_to_command(self, pupil_field: np.ndarray, vec: np.ndarray,
+                            offset: float | None) -> np.ndarray:
+        """
+        DM command closest to a complex pupil field, continuing from the
+        current command ``vec``.
+
+        The field phase is unwrapped against the current pupil phase (each
+        pixel moves by less than π) and fitted to the actuators by least
+        squares through the bilinear upsampling, so a command that already
+        produces the field is returned unchanged.  With ``offset``, the
+        global piston (which does not change the intensity) is set so the
+        lowest command equals ``offset``.
+        """
+        current = self.pupil_phase(vec)
+        phase = current + np.angle(pupil_field * np.exp(-1j * current))
+        pixels = phase.reshape(phase.shape[:-2] + (-1,))[..., self.aperture.ravel() > 0]
+        new = pixels @ self._phase_fit_operator().T
+        if offset is not None:
+            new = new - new.min(axis=-1, keepdims=True) + offset
+        return self._fold_into_range(new)
+
+    def retrieve_command(self, target_intensity, n_iter: int = 100,
+                         offset: float | None = None, init=None, seed: int = 0) -> dict:
+        """
+        Gerchberg–Saxton retrieval of a DM command for a target intensity.
+
+        Each iteration imposes the target amplitude in the focal plane and
+        then the DM constraint in the pupil (uniform amplitude over the
+        aperture, phase fitted to the actuators, see _project_to_command).
+        The iterate with the lowest intensity error is returned.
+
+        Parameters
+        ----------
+        target_intensity : np.ndarray
+            Centred ``(P_pad, P_pad)`` target (or a stack ``(..., P_pad, P_pad)``),
+            any normalisation.
+        n_iter : int
+        offset : float or None
+            Lowest command of every iterate (piston is free); None keeps the
+            piston of the fit.  Commands leaving [0, 1] are moved back by
+            whole waves of phase.
+        init : np.ndarray or None
+            Starting command (grids or vectors); random phase if None.
+
+        Returns
+        -------
+        dict
+            ``{"vector", "grid", "intensity", "error"}``: the best command as
+            actuator vectors and DMClass grids, its predicted intensity, and
+            the normalised RMS intensity error per iteration.
+        """
+        span = 2 * np.pi / self.rad_per_command
+        if offset is not None and (offset < 0 or offset + span > 1):
+            raise ValueError(f"Command range [{offset}, {offset + span:.3f}] of one wave "
+                             f"is outside [0, 1]")
+
+        target = np.asarray(target_intensity, dtype=float)
+        if target.shape[-2:] != (self.P_pad, self.P_pad):
+            raise ValueError(f"Target must be (..., {self.P_pad}, {self.P_pad})")
+        target = np.fft.ifftshift(target / target.sum(axis=(-2, -1), keepdims=True),
+                                  axes=(-2, -1))
+        amp = np.sqrt(target / self._norm)
+
+        if init is None:
+            rng = np.random.default_rng(seed)
+            low = 0.5 - span / 2 if offset is None else offset
+            vec = low + span * rng.random(target.shape[:-2] + (self.n_act,))
+        else:
+            vec = np.broadcast_to(self.to_vector(init), target.shape[:-2] + (self.n_act,))
+
+        P = self.P
+        error = np.empty((n_iter,) + target.shape[:-2])
+        best = np.array(vec, dtype=float)
+        best_error = np.full(target.shape[:-2], np.inf)
+        for k in range(n_iter):
+            pupil = np.zeros(target.shape, dtype=complex)
+            pupil[..., :P, :P] = self.aperture * np.exp(1j * self.pupil_phase(vec))
+            F = np.fft.fft2(pupil)
+            I = np.abs(F) ** 2 * self._norm
+            error[k] = np.sqrt(np.mean((I - target) ** 2, axis=(-2, -1))
+                               / np.mean(target ** 2, axis=(-2, -1)))
+            better = error[k] < best_error
+            best = np.where(better[..., None], vec, best)
+            best_error = np.where(better, error[k], best_error)
+
+            F = amp * np.exp(1j * np.angle(F))
+            vec = self._project_to_command(np.fft.ifft2(F)[..., :P, :P], vec, offset)
+        vec = best
+
+        return {
+            "vector": vec,
+            "grid": self.to_grid(vec),
+            "intensity": self.intensity(vec),
+            "error": error,
+        }
@@ -0,0 +1,42 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))  # bare sibling imports under pytest
+
+from forward_model import DMForwardModel
+
+
+def _astigmatism(model: DMForwardModel, amplitude_lambda: float = 0.3,
+                 offset: float = 0.5) -> np.ndarray:
+    """0.3λ astigmatism command vector around ``offset``."""
+    y, x = np.indices((model.N, model.N)) - (model.N - 1) / 2
+    r = model.N / 2
+    surface_um = amplitude_lambda * model.wavelength_um * (x ** 2 - y ** 2) / r ** 2
+    return model.to_vector(offset + surface_um / model.stroke_um)
+
+
+def test_retrieval_is_stable_at_the_true_command():
+    model = DMForwardModel({"N": 13, "samples_per_actuator": 4})
+    true = _astigmatism(model)
+    result = model.retrieve_command(model.intensity(true), n_iter=20, init=true)
+    assert result["error"].max() < 1e-10
+    np.testing.assert_allclose(result["vector"], true, atol=1e-10)
+
+
+def test_retrieval_converges_from_a_nearby_command():
+    model = DMForwardModel({"N": 13, "samples_per_actuator": 4})
+    true = _astigmatism(model)
+    start = true + 0.01 * np.random.default_rng(0).normal(size=true.size)
+    result = model.retrieve_command(model.intensity(true), n_iter=100, init=start)
+    assert result["error"][-1] < 1e-3
+    assert result["error"].min() <= result["error"][0]
+    np.testing.assert_allclose(model.intensity(result["vector"]), model.intensity(true),
+                               atol=1e-6)
+
+
+if __name__ == "__main__":
+    test_retrieval_is_stable_at_the_true_command()
+    test_retrieval_converges_from_a_nearby_command()
+    print("[INFO] forward model retrieval tests passed")
@@ -5,45 +5,119 @@ import matplotlib.pyplot as plt
 import numpy as np
 from pathlib import Path
 
-def readTdms(path, slot="Oscilloscope (PXI1Slot7)", channel="0"):
-    tdms_file = TdmsFile.read(path)
-    group = tdms_file["Oscilloscope - Waveform Data"]
+from campaign_pool import map_ordered
+from log_binning import DEFAULT_POINTS_PER_DECADE, semilogx_rin
+from rin_metrics import DEFAULT_BANDS, print_band_table, rin_band_table
+from spectrum_cache import SpectrumCache
+from tdms_welch import welch_psd_tdms
+
+
+SCOPE_DATA_GROUP = "Oscilloscope - Waveform Data"
+PANEL_CONFIG_GROUP = "Panel Configurations"
+
+
+def _print_timing(timing):
+    print(
+        f"bManual_sample_rate: {timing['bManual_sample_rate']}\n"
+        f"bManual_record_length: {timing['bManual_record_length']}\n"
+        f"sample_rate: {timing['sample_rate']}\n"
+        f"sample_pts: {timing['sample_pts']}\n"
+    )
+
+
+def read_scope_timing(tdms_file, slot="Oscilloscope (PXI1Slot7)"):
+    """
+    Parse the scope timing settings from the 'Panel Configurations' group of
+    an open TdmsFile (read or streaming mode); only that one string channel
+    is read from disk.
+    """
     try:
-        config_channel = tdms_file["Panel Configurations"][slot]
+        config_channel = tdms_file[PANEL_CONFIG_GROUP][slot]
     except KeyError as e:
-        print(tdms_file["Panel Configurations"].as_dataframe())
-        print(tdms_file["Panel Configurations"].channels())
-        print(tdms_file["Panel Configurations"].properties)
+        print(tdms_file[PANEL_CONFIG_GROUP].channels())
+        print(tdms_file[PANEL_CONFIG_GROUP].properties)
         raise KeyError(e)
-    config = json.loads(config_channel.data[0])
-    sample_rate = config["Instrument"]["Instrument Configuration"]["Timing"][
-        "Manual Sample Rate"
-    ]
-    sample_pts = config["Instrument"]["Instrument Configuration"]["Timing"][
-        "Manual Record Length"
-    ]
-    bManual_sample_rate = config["Instrument"]["Instrument Configuration"]["Timing"][
-        "Manual Timing Settings"
-    ]["Use Manual Sample Rate"]
-    bManual_record_length = config["Instrument"]["Instrument Configuration"]["Timing"][
-        "Manual Timing Settings"
-    ]["Use Manual Record Length"]
-    fft_data = group[
-        f"FFT 1 (Channel {channel}) V/√Hz"
-    ].data[
-        1:
-    ]  # somehow the fft data size is always 1 size larger than the sample_size/2, maunally ignoring the first points
-    fft_freq = np.fft.fftfreq(n=sample_pts, d=1 / sample_rate)[: fft_data.shape[0]]
-    print(
-        f"bManual_sample_rate: {bManual_sample_rate}\n"
-        f"bManual_record_length: {bManual_record_length}\n"
-        f"sample_rate: {sample_rate}\n"
-        f"sample_pts: {sample_pts}\n"
-    )
+    config = json.loads(config_channel[0])
+    timing_cfg = config["Instrument"]["Instrument Configuration"]["Timing"]
+    return {
+        "bManual_sample_rate": timing_cfg["Manual Timing Settings"]["Use Manual Sample Rate"],
+        "bManual_record_length": timing_cfg["Manual Timing Settings"]["Use Manual Record Length"],
+        "sample_rate": timing_cfg["Manual Sample Rate"],
+        "sample_pts": timing_cfg["Manual Record Length"],
+    }
+
+
+def scope_fft_freq(n_bins, sample_rate, sample_pts):
+    """
+    First *n_bins* entries of ``np.fft.fftfreq(sample_pts, 1 / sample_rate)``
+    computed directly (same arithmetic, bit-identical), without building the
+    full-record frequency array.
+    """
+    return np.arange(n_bins) * (1.0 / (sample_pts * (1 / sample_rate)))
+
+
+def readTdms(path, slot="Oscilloscope (PXI1Slot7)", channel="0", verbose=True):
+    """
+    Read the scope FFT channel (V/√Hz) and its frequency axis from a TDMS file.
+
+    The file is opened in streaming mode and only the panel configuration and
+    the requested FFT channel are read, so raw waveforms and other channels
+    never reach RAM.  This read is not cached: loading a cache entry of the
+    same size is no faster (see readTdms_welch for the cached Welch path).
+    ``verbose=False`` suppresses the timing report.
+    """
+    with TdmsFile.open(path) as tdms_file:
+        timing = read_scope_timing(tdms_file, slot)
+        # somehow the fft data size is always 1 size larger than the sample_size/2,
+        # manually ignoring the first point
+        fft_data = tdms_file[SCOPE_DATA_GROUP][f"FFT 1 (Channel {channel}) V/√Hz"].read_data(offset=1)
+    fft_freq = scope_fft_freq(fft_data.shape[0], timing["sample_rate"], timing["sample_pts"])
+
+    if verbose:
+        _print_timing(timing)
     return_dict = {"freq": fft_freq, "VHz": fft_data}
     return pd.DataFrame(return_dict), return_dict
 
 
+def readTdms_welch(path, slot="Oscilloscope (PXI1Slot7)", channel="0", welch=None,
+                   cache=None, verbose=True, workers=None):
+    """
+    Like readTdms, but V/√Hz is computed from the raw waveform channel
+    ``"Channel {channel}"`` by Welch's method (tdms_welch.welch_psd_tdms)
+    instead of taken from the scope's precomputed FFT channel.
+
+    Resolution and averaging are then chosen here, not on the instrument.
+    ``welch`` holds welch_psd_tdms keywords (nperseg, overlap, window,
+    average, n_averages) and optionally ``waveform_channel`` to override the
+    channel name.  The DC bin is dropped, as in readTdms.
+    """
+    welch = dict(welch or {})
+    waveform_channel = welch.pop("waveform_channel", f"Channel {channel}")
+    settings = {"slot": slot, "channel": waveform_channel, "welch": welch}
+
+    cached = cache.load(path, "scope_tdms_welch", settings) if cache is not None else None
+    if cached is not None:
+        arrays, timing = cached
+        if verbose:
+            _print_timing(timing)
+        return_dict = {"freq": arrays["freq"], "VHz": arrays["VHz"]}
+        return pd.DataFrame(return_dict), return_dict
+
+    with TdmsFile.open(path) as tdms_file:
+        timing = read_scope_timing(tdms_file, slot)
+    freq, psd, n_seg = welch_psd_tdms(path, waveform_channel, timing["sample_rate"],
+                                      group=SCOPE_DATA_GROUP, workers=workers, **welch)
+    timing["welch_segments"] = n_seg
+
+    if verbose:
+        _print_timing(timing)
+        print(f"welch_segments: {n_seg}\n")
+    return_dict = {"freq": freq[1:], "VHz": np.sqrt(psd[1:])}
+    if cache is not None:
+        cache.store(path, "scope_tdms_welch", settings, return_dict, timing)
+    return pd.DataFrame(return_dict), return_dict
+
+
 def calculate_rin_dBc_per_Hz(VHz, V_mean_V):
     """Calculate Relative Intensity Noise (RIN) from V/√Hz data.
     Parameters:
@@ -59,29 +133,95 @@ def calculate_rin_dBc_per_Hz(VHz, V_mean_V):
     return rin_dBc_per_Hz
 
 
-def plot_RIN_campaign_tdms(campaign: dict):
-    base = Path(campaign["base_folder"])
-    slot = campaign["tdms_settings"].get("slot")
-    channel = campaign["tdms_settings"].get("channel")
+def campaign_job(campaign: dict, meas: dict, cache: SpectrumCache | None = None):
+    """Picklable load job of one TDMS campaign measurement (see load_measurement_rin)."""
+    settings = campaign["tdms_settings"]
+    return (Path(campaign["base_folder"]) / meas["file"], settings.get("slot"),
+            settings.get("channel"), meas["V_mean_V"], settings.get("welch"), cache)
+
+
+def campaign_label(meas: dict) -> str:
+    return f'{meas["label"]} ({meas["V_mean_V"]:.3f} V)'
+
+
+def load_measurement_rin(job):
+    """Process-pool worker: read one TDMS capture and compute its RIN."""
+    tdms_path, slot, channel, V_mean_V, welch, cache = job
+    if welch is None:
+        df, raw = readTdms(tdms_path, slot=slot, channel=channel, verbose=False)
+    else:
+        # files are already spread over the pool: one process per file
+        df, raw = readTdms_welch(tdms_path, slot=slot, channel=channel, welch=welch,
+                                 cache=cache, verbose=False, workers=1)
+    return raw["freq"], calculate_rin_dBc_per_Hz(raw["VHz"], V_mean_V)
+
 
-    plt.figure(figsize=(9, 5))
+def load_RIN_campaign_tdms(campaign: dict, workers: int | None = None) -> list[dict]:
+    """
+    Load every TDMS measurement of a campaign and compute its RIN.
+
+    Files are read in parallel across ``workers`` processes (default: the
+    campaign's ``"workers"`` entry, else one per core; 1 loads serially).
+    A ``"welch"`` dict in ``tdms_settings`` switches from the scope FFT
+    channel to a Welch PSD of the raw waveform (see readTdms_welch).
+
+    Returns
+    -------
+    list of dict
+        One entry per measurement, in campaign order:
+        ``{"label", "freq_Hz", "RIN_dBc_per_Hz", "meas"}``.
+    """
+    cache = SpectrumCache.from_setting(campaign.get("cache"))
+    if workers is None:
+        workers = campaign.get("workers")
+
+    jobs = [campaign_job(campaign, meas, cache) for meas in campaign["measurements"]]
+
+    results = []
+    for meas, (freq, rin_dBc) in zip(campaign["measurements"],
+                                     map_ordered(load_measurement_rin, jobs, workers)):
+        results.append({
+            "label": campaign_label(meas),
+            "freq_Hz": freq,
+            "RIN_dBc_per_Hz": rin_dBc,
+            "meas": meas,
+        })
+    print(f"[INFO] Loaded {len(results)} measurements from {campaign['base_folder']}")
+    return results
 
-    for meas in campaign["measurements"]:
-        tdms_path = base / meas["file"]
-        V_mean_V = meas["V_mean_V"]
-        label = f'{meas["label"]} ({V_mean_V:.3f} V)'
-        df, raw = readTdms(tdms_path, slot=slot, channel=channel)
 
-        freq = df["freq"].to_numpy()
-        VHz = df["VHz"].to_numpy()
+def plot_RIN_campaign_tdms(campaign: dict, workers: int | None = None):
+    """
+    Plot the RIN of every campaign measurement.
+
+    Spectra are log-binned to the campaign's ``"points_per_decade"``
+    (default 200, None = full resolution); ``"envelope": True`` shades the
+    per-bin min/max.
+
+    Also prints and returns the band-integrated RMS RIN table for the
+    campaign's ``"bands"`` (default rin_metrics.DEFAULT_BANDS, None = skip).
+    """
+    results = load_RIN_campaign_tdms(campaign, workers=workers)
+    ppd = campaign.get("points_per_decade", DEFAULT_POINTS_PER_DECADE)
+    envelope = campaign.get("envelope", False)
 
-        rin_dBc = calculate_rin_dBc_per_Hz(VHz, V_mean_V)
+    fig, ax = plt.subplots(figsize=(9, 5))
 
-        plt.semilogx(freq, rin_dBc, label=label, alpha=0.7, linewidth=1.0)
+    for res in results:
+        semilogx_rin(ax, res["freq_Hz"], res["RIN_dBc_per_Hz"], ppd, envelope,
+                     label=res["label"], alpha=0.7, linewidth=1.0)
 
     plt.xlabel("Frequency (Hz)")
     plt.ylabel("RIN (dBc/Hz)")
     plt.grid(True, which="both")
     plt.legend()
     plt.tight_layout()
-    plt.show()
\ No newline at end of file
+
+    table = None
+    bands = campaign.get("bands", DEFAULT_BANDS)
+    if bands:
+        table = rin_band_table(results, bands)
+        print_band_table(table)
+
+    plt.show()
+    return table
@@ -1,8 +1,98 @@
+import warnings
 from pathlib import Path
 
 import numpy as np
 import matplotlib.pyplot as plt
 
+from campaign_pool import map_ordered
+from log_binning import DEFAULT_POINTS_PER_DECADE, log_bin_rin_dB, semilogx_rin
+from rin_metrics import DEFAULT_BANDS, print_band_table, rin_band_table
+from spectrum_cache import SpectrumCache
+
+# First characters of a numeric "freq,power" row in a DSA trace block
+_NUMERIC_START = frozenset("0123456789+-.")
+
+
+def _trace_rows(f, pending: list):
+    """
+    Yield the rows of one "Trace Data" block from the open file *f*.
+
+    Stops at the first line that is not numeric (next "Trace Name", blank
+    line, EOF) and stores it in *pending* so the header scan can resume there.
+    """
+    for line in f:
+        if line[:1] in _NUMERIC_START:
+            yield line
+        else:
+            pending.append(line)
+            return
+
+
+def read_dsa_csv(filepath):
+    """
+    Parse a DSA (SSA3021X) CSV export in a single streaming pass.
+
+    Header lines are split in Python once; every "Trace Data" block is handed
+    to numpy's C text reader, so per-row cost stays out of the interpreter and
+    only the parsed arrays are held in memory.
+
+    Returns
+    -------
+    params : dict
+        Metadata, ``{key: [values, ...]}`` for every header line with a value.
+    traces : dict
+        ``{trace_name: {"freq_Hz": ndarray, "power_dBm": ndarray}}``.
+    """
+    params = {}
+    traces = {}
+    current_trace = None
+    pending = []
+
+    with open(filepath, "r") as f:
+        while True:
+            line = pending.pop() if pending else f.readline()
+            if not line:
+                break
+            parts = line.strip().split(",")
+
+            if parts[0] == "Trace Name":
+                current_trace = parts[1]
+                traces[current_trace] = {"freq_Hz": np.empty(0), "power_dBm": np.empty(0)}
+                continue
+
+            if parts[0] == "Trace Data":
+                with warnings.catch_warnings():
+                    # empty blocks are legal (blank traces), don't warn on them
+                    warnings.simplefilter("ignore", UserWarning)
+                    block = np.loadtxt(_trace_rows(f, pending), delimiter=",",
+                                       usecols=(0, 1), ndmin=2)
+                traces[current_trace]["freq_Hz"] = block[:, 0].copy()
+                traces[current_trace]["power_dBm"] = block[:, 1].copy()
+                continue
+
+            # Metadata
+            if len(parts) > 1:
+                params[parts[0]] = parts[1:]
+
+    return params, traces
+
+
+def _pack_traces(params: dict, traces: dict):
+    """Flatten params/traces into SpectrumCache ``(arrays, meta)``."""
+    arrays = {}
+    for i, tr in enumerate(traces.values()):
+        arrays[f"freq_Hz_{i}"] = tr["freq_Hz"]
+        arrays[f"power_dBm_{i}"] = tr["power_dBm"]
+    return arrays, {"params": params, "traces": list(traces)}
+
+
+def _unpack_traces(arrays: dict, meta: dict):
+    traces = {
+        name: {"freq_Hz": arrays[f"freq_Hz_{i}"], "power_dBm": arrays[f"power_dBm_{i}"]}
+        for i, name in enumerate(meta["traces"])
+    }
+    return meta["params"], traces
+
 
 class SpectrumRIN:
     """
@@ -22,10 +112,17 @@ class SpectrumRIN:
             G_eff = G_nominal / 2
 
         because voltage is halved by output/input matching.
+
+    An optional SpectrumCache skips re-parsing files that have not changed;
+    ``verbose=False`` silences the per-file load report (campaign workers).
+    Traces acquired without a file (e.g. over SCPI) use ``from_traces``.
     """
 
-    def __init__(self, filepath: str, config: dict):
+    def __init__(self, filepath: str | None, config: dict, cache: SpectrumCache | None = None,
+                 verbose: bool = True):
         self.filepath = filepath
+        self.cache = cache
+        self.verbose = verbose
 
         # Required config entries
         self.R_A_per_W = config["responsivity_A_per_W"]
@@ -39,60 +136,38 @@ class SpectrumRIN:
         self.params = {}
         self.traces = {}
 
-        self._load_csv()
+        if filepath is not None:
+            self._load_csv()
+
+    @classmethod
+    def from_traces(cls, traces: dict, config: dict, params: dict | None = None):
+        """
+        Build from already parsed traces (``{name: {"freq_Hz", "power_dBm"}}``),
+        the layout produced by read_dsa_csv.
+        """
+        rin = cls(None, config, verbose=False)
+        rin.params = dict(params or {})
+        rin.traces = traces
+        return rin
 
     # ----------------------------------------------------------------------
     def _load_csv(self):
-        with open(self.filepath, "r") as f:
-            lines = [ln.strip() for ln in f.readlines()]
-
-        idx = 0
-        current_trace = None
-
-        while idx < len(lines):
-            parts = lines[idx].split(",")
-
-            # Metadata
-            if parts[0] not in ["Trace Name", "Trace Data"]:
-                if len(parts) > 1:
-                    self.params[parts[0]] = parts[1:]
-                idx += 1
-                continue
-
-            # New trace
-            if parts[0] == "Trace Name":
-                current_trace = parts[1]
-                self.traces[current_trace] = {"freq_Hz": [], "power_dBm": []}
-                idx += 1
-                continue
-
-            # Read Trace Data
-            if parts[0] == "Trace Data":
-                idx += 1
-                while idx < len(lines):
-                    row = lines[idx].split(",")
-                    if len(row) < 2:
-                        break
-                    try:
-                        f = float(row[0])
-                        p = float(row[1])
-                        self.traces[current_trace]["freq_Hz"].append(f)
-                        self.traces[current_trace]["power_dBm"].append(p)
-                        idx += 1
-                    except ValueError:
-                        break
-                continue
-
-            idx += 1
-
-        # Convert to numpy
-        for name, tr in self.traces.items():
-            tr["freq_Hz"] = np.array(tr["freq_Hz"])
-            tr["power_dBm"] = np.array(tr["power_dBm"])
+        cached = None
+        if self.cache is not None:
+            cached = self.cache.load(self.filepath, "dsa_csv")
+
+        if cached is None:
+            self.params, self.traces = read_dsa_csv(self.filepath)
+            if self.cache is not None:
+                self.cache.store(self.filepath, "dsa_csv", None,
+                                 *_pack_traces(self.params, self.traces))
+        else:
+            self.params, self.traces = _unpack_traces(*cached)
 
-        print(f"[INFO] Loaded {len(self.traces)} traces.")
-        for t in self.traces:
-            print(f"   - {t}: {len(self.traces[t]['freq_Hz'])} points")
+        if self.verbose:
+            print(f"[INFO] Loaded {len(self.traces)} traces.")
+            for t in self.traces:
+                print(f"   - {t}: {len(self.traces[t]['freq_Hz'])} points")
 
     # ----------------------------------------------------------------------
     def compute_RIN_dBc_per_Hz(self, trace_name: str):
@@ -125,8 +200,15 @@ class SpectrumRIN:
 
         return freq_Hz, RIN_dBc_per_Hz
 
-    def get_RIN(self, trace_name: str):
+    def get_RIN(self, trace_name: str, points_per_decade: float | None = None):
+        """
+        RIN of a trace; with ``points_per_decade`` it is log-binned
+        (linear-power mean per bin, see log_binning.log_bin_rin_dB).
+        """
         freq, rin = self.compute_RIN_dBc_per_Hz(trace_name)
+        if points_per_decade:
+            binned = log_bin_rin_dB(freq, rin, points_per_decade, envelope=False)
+            return binned["freq_Hz"], binned["mean"]
         return freq, rin
 
     # ----------------------------------------------------------------------
@@ -218,31 +300,91 @@ class SpectrumRIN:
         plt.tight_layout()
         # plt.show()
 
-def plot_RIN_campaign(campaign: dict):
-    base = Path(campaign["base_folder"])
-    global_cfg = campaign["global"]
+def campaign_job(campaign: dict, meas: dict, cache: SpectrumCache | None = None):
+    """Picklable load job of one DSA campaign measurement (see load_measurement_rin)."""
+    cfg = {
+        **campaign["global"],
+        "optical_power_W": meas["optical_power_W"],
+        "PD_voltage_mV": meas["PD_voltage_mV"],
+    }
+    return Path(campaign["base_folder"]) / meas["csv"], cfg, meas["trace"], cache
 
-    plt.figure(figsize=(9, 5))
 
-    for meas in campaign["measurements"]:
-        csv_path = base / meas["csv"]
+def campaign_label(meas: dict) -> str:
+    return f'{meas["label"]} ({meas["PD_voltage_mV"]:.0f} mV)'
 
-        cfg = {
-            **global_cfg,
-            "optical_power_W": meas["optical_power_W"],
-            "PD_voltage_mV": meas["PD_voltage_mV"],
-        }
 
-        rin = SpectrumRIN(csv_path, cfg)
-        freq, rin_dBc = rin.get_RIN(meas["trace"])
+def load_measurement_rin(job):
+    """Process-pool worker: parse one DSA CSV and compute its RIN."""
+    csv_path, cfg, trace, cache = job
+    rin = SpectrumRIN(csv_path, cfg, cache=cache, verbose=False)
+    return rin.get_RIN(trace)
+
 
-        label = f'{meas["label"]} ({meas["PD_voltage_mV"]:.0f} mV)'
+def load_RIN_campaign(campaign: dict, workers: int | None = None) -> list[dict]:
+    """
+    Load every measurement of a DSA campaign and compute its RIN.
+
+    Files are parsed in parallel across ``workers`` processes (default: the
+    campaign's ``"workers"`` entry, else one per core; 1 loads serially).
 
-        plt.semilogx(freq, rin_dBc, label=label)
+    Returns
+    -------
+    list of dict
+        One entry per measurement, in campaign order:
+        ``{"label", "freq_Hz", "RIN_dBc_per_Hz", "meas"}``.
+    """
+    cache = SpectrumCache.from_setting(campaign.get("cache"))
+    if workers is None:
+        workers = campaign.get("workers")
+
+    jobs = [campaign_job(campaign, meas, cache) for meas in campaign["measurements"]]
+
+    results = []
+    for meas, (freq, rin_dBc) in zip(campaign["measurements"],
+                                     map_ordered(load_measurement_rin, jobs, workers)):
+        results.append({
+            "label": campaign_label(meas),
+            "freq_Hz": freq,
+            "RIN_dBc_per_Hz": rin_dBc,
+            "meas": meas,
+        })
+    print(f"[INFO] Loaded {len(results)} measurements from {campaign['base_folder']}")
+    return results
+
+
+def plot_RIN_campaign(campaign: dict, workers: int | None = None):
+    """
+    Plot the RIN of every campaign measurement.
+
+    Spectra are log-binned to the campaign's ``"points_per_decade"``
+    (default 200, None = full resolution); ``"envelope": True`` shades the
+    per-bin min/max.
+
+    Also prints and returns the band-integrated RMS RIN table for the
+    campaign's ``"bands"`` (default rin_metrics.DEFAULT_BANDS, None = skip).
+    """
+    results = load_RIN_campaign(campaign, workers=workers)
+    ppd = campaign.get("points_per_decade", DEFAULT_POINTS_PER_DECADE)
+    envelope = campaign.get("envelope", False)
+
+    fig, ax = plt.subplots(figsize=(9, 5))
+
+    for res in results:
+        semilogx_rin(ax, res["freq_Hz"], res["RIN_dBc_per_Hz"], ppd, envelope,
+                     label=res["label"])
 
     plt.xlabel("Frequency (Hz)")
     plt.ylabel("RIN (dBc/Hz)")
     plt.grid(True, which="both")
     plt.legend()
     plt.tight_layout()
-    plt.show()
\ No newline at end of file
+
+    table = None
+    bands = campaign.get("bands", DEFAULT_BANDS)
+    if bands:
+        table = rin_band_table(results, bands)
+        print_band_table(table)
+
+    plt.show()
+    return table
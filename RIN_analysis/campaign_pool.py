@@ -0,0 +1,30 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def resolve_workers(workers: int | None, n_jobs: int) -> int:
+    """
+    Number of loader processes for *n_jobs* files.
+
+    ``None`` uses every core; the count is never larger than the number of
+    jobs, and 0/1 means "load serially in this process".
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    return max(1, min(int(workers), n_jobs))
+
+
+def map_ordered(fn, jobs: list, workers: int | None = None) -> list:
+    """
+    Apply *fn* to every job across a process pool, results in job order.
+
+    *fn* must be a module-level function and jobs must be picklable.  With a
+    single worker the jobs run in-process, which avoids the pool start-up
+    cost for small campaigns and keeps tracebacks simple while debugging.
+    """
+    workers = resolve_workers(workers, len(jobs))
+    if workers == 1:
+        return [fn(job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, jobs))
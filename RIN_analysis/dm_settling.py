@@ -0,0 +1,240 @@
+import numpy as np
+import pandas as pd
+from nptdms import TdmsFile
+
+from RIN_analysis_Kaizhao import SCOPE_DATA_GROUP
+
+
+def load_waveform(path, channel_name: str, group: str = SCOPE_DATA_GROUP,
+                  sample_rate: float | None = None):
+    """
+    Raw waveform of one TDMS channel.
+
+    Returns
+    -------
+    y : np.ndarray
+    sample_rate : float
+        From ``sample_rate`` or the channel's ``wf_increment`` property.
+    t0_s : float or None
+        Start of the record as POSIX seconds (``wf_start_time``), if stored.
+    """
+    with TdmsFile.open(path) as tdms_file:
+        ch = tdms_file[group][channel_name]
+        y = ch.read_data()
+        props = ch.properties
+    if sample_rate is None:
+        if "wf_increment" not in props:
+            raise ValueError(f"{channel_name}: no wf_increment property, pass sample_rate")
+        sample_rate = 1.0 / float(props["wf_increment"])
+    t0 = props.get("wf_start_time")
+    t0_s = None if t0 is None else float(np.datetime64(t0, "ns").astype(np.int64)) * 1e-9
+    return np.asarray(y, dtype=float), float(sample_rate), t0_s
+
+
+# ----------------------------------------------------------------------
+# Step times
+# ----------------------------------------------------------------------
+def trigger_edges(trigger, threshold: float | None = None, min_separation: int = 1,
+                  edge: str = "rising") -> np.ndarray:
+    """
+    Sample indices where a trigger channel crosses ``threshold`` (default:
+    midway between its extremes).  Crossings closer than ``min_separation``
+    samples to the previous one are dropped (contact bounce, noise).
+    """
+    trigger = np.asarray(trigger, dtype=float)
+    if threshold is None:
+        threshold = 0.5 * (trigger.min() + trigger.max())
+    high = trigger > threshold
+    change = np.flatnonzero(high[1:] != high[:-1]) + 1
+    if edge == "rising":
+        change = change[high[change]]
+    elif edge == "falling":
+        change = change[~high[change]]
+    if min_separation <= 1:
+        return change
+    kept, last = [], -min_separation
+    for c in change:  # few edges: a plain loop keeps the spacing rule exact
+        if c - last >= min_separation:
+            kept.append(c)
+            last = c
+    return np.array(kept, dtype=np.int64)
+
+
+def send_log_edges(send_log, sample_rate: float, t0_s: float,
+                   clock_offset_s: float = 0.0) -> np.ndarray:
+    """
+    Sample indices of DMClass send-log entries (``start_send_log``) in a
+    record starting at POSIX time ``t0_s``.  ``clock_offset_s`` is the scope
+    clock minus the PC clock.
+    """
+    t = np.array([entry[0] for entry in send_log]) + clock_offset_s
+    return np.rint((t - t0_s) * sample_rate).astype(np.int64)
+
+
+def step_types(send_log, resolution: float = 0.05) -> list[str]:
+    """
+    Transition type of every send-log entry from the mean command change
+    to the previous frame: ``"rise 0.10"``, ``"fall 0.05"``, ... (size
+    rounded to ``resolution``).  The first entry is ``"initial"``.
+    """
+    vectors = np.array([entry[1] for entry in send_log])
+    delta = np.diff(vectors, axis=0).mean(axis=1)
+    size = np.round(np.abs(delta) / resolution) * resolution
+    types = ["initial"]
+    for d, s in zip(delta, size):
+        types.append(f"{'rise' if d >= 0 else 'fall'} {s:.2f}")
+    return types
+
+
+# ----------------------------------------------------------------------
+# Step responses
+# ----------------------------------------------------------------------
+def extract_epochs(signal, edges, pre: int, post: int):
+    """
+    Windows ``signal[e - pre : e + post]`` around every edge, as one gather.
+
+    Edges whose window does not fit in the record are dropped.
+
+    Returns
+    -------
+    epochs : np.ndarray, shape (n_kept, pre + post)
+    kept : np.ndarray of bool, shape (len(edges),)
+    """
+    signal = np.asarray(signal)
+    edges = np.asarray(edges, dtype=np.int64)
+    kept = (edges - pre >= 0) & (edges + post <= signal.size)
+    idx = edges[kept, None] + np.arange(-pre, post)
+    return signal[idx], kept
+
+
+def step_metrics(epochs, sample_rate: float, pre: int, tolerance: float = 0.02,
+                 final_fraction: float = 0.2, smooth: int = 1,
+                 noise_sigma: float = 5.0) -> dict:
+    """
+    Settling of the average of aligned step epochs.
+
+    The averaged response is normalised to its pre-step level (0) and its
+    final level (1, mean of the last ``final_fraction`` of the window).
+    ``smooth`` > 1 applies a centred moving average of that many samples
+    first, so detector noise does not count as ringing.  The settling band
+    is ±``tolerance`` of the step, widened to ``noise_sigma`` times the
+    standard deviation of the (smoothed) pre-step response when the
+    residual noise is larger, so a noisy average does not look unsettled
+    until the end of the window.
+
+    Returns
+    -------
+    dict
+        ``n_steps``, ``step_size`` (signal units), ``band`` (settling band
+        used, fraction of the step), ``settling_time_s`` (last excursion
+        beyond ±``band``, relative to the edge), ``overshoot`` (fraction of
+        the step), ``ringing_Hz`` (dominant frequency of the residual after
+        the peak, NaN when the residual stays within the band) and
+        ``response`` (normalised mean).
+    """
+    epochs = np.atleast_2d(epochs)
+    mean = epochs.mean(axis=0)
+    if smooth > 1:
+        mean = np.convolve(np.pad(mean, smooth // 2, mode="edge"),
+                           np.ones(smooth) / smooth, mode="valid")[:mean.size]
+    n_final = max(int(final_fraction * (mean.size - pre)), 1)
+    y0 = mean[:pre].mean()
+    y1 = mean[-n_final:].mean()
+    step = y1 - y0
+    nan = float("nan")
+    if step == 0:
+        return {"n_steps": len(epochs), "step_size": 0.0, "band": nan,
+                "settling_time_s": nan, "overshoot": nan, "ringing_Hz": nan,
+                "response": mean * nan}
+
+    s = (mean - y0) / step
+    band = tolerance
+    if pre > 1:
+        band = max(tolerance, noise_sigma * float(s[:pre].std()))
+    after = s[pre:]
+    outside = np.flatnonzero(np.abs(after - 1.0) > band)
+    settle = 0 if outside.size == 0 else outside[-1] + 1
+
+    peak = int(np.argmax(after))
+    residual = after[peak:] - 1.0
+    ringing = nan
+    if residual.size > 4 and np.max(np.abs(residual)) > band:
+        spec = np.abs(np.fft.rfft(residual - residual.mean(), n=4 * residual.size))
+        ringing = np.argmax(spec[1:]) + 1
+        ringing = ringing * sample_rate / (4 * residual.size)
+
+    return {
+        "n_steps": len(epochs),
+        "step_size": float(step),
+        "band": band,
+        "settling_time_s": settle / sample_rate,
+        "overshoot": float(max(after.max() - 1.0, 0.0)),
+        "ringing_Hz": float(ringing),
+        "response": s,
+    }
+
+
+def analyse_settling(signal, edges, sample_rate: float, types=None,
+                     pre_s: float = 1e-3, post_s: float = 20e-3,
+                     tolerance: float = 0.02, smooth_s: float = 50e-6,
+                     noise_sigma: float = 5.0) -> pd.DataFrame:
+    """
+    Settling per transition type.
+
+    Parameters
+    ----------
+    signal : np.ndarray
+        Photodiode waveform.
+    edges : np.ndarray
+        Step sample indices (trigger_edges or send_log_edges).
+    types : list of str or None
+        Transition type per edge (e.g. step_types); all ``"step"`` if None.
+        Falling steps are handled like rising ones (normalised response).
+    pre_s, post_s : float
+        Window before / after every edge.
+    tolerance : float
+        Settling band as a fraction of the step.
+    smooth_s : float
+        Moving-average length applied to the averaged response (0: none);
+        keep it well below the expected ringing period (the 50 µs default
+        passes ringing up to a few kHz).
+    noise_sigma : float
+        Minimum band in units of the pre-step noise (see step_metrics).
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per type: n_steps, step_size, band, settling_time_s,
+        overshoot, ringing_Hz.
+    """
+    pre = int(round(pre_s * sample_rate))
+    post = int(round(post_s * sample_rate))
+    smooth = max(int(round(smooth_s * sample_rate)), 1)
+    edges = np.asarray(edges, dtype=np.int64)
+    types = np.array(["step"] * edges.size if types is None else list(types))
+    if types.size != edges.size:
+        raise ValueError(f"{types.size} types for {edges.size} edges")
+
+    epochs, kept = extract_epochs(signal, edges, pre, post)
+    if not kept.all():
+        print(f"[WARNING] {np.count_nonzero(~kept)} step(s) too close to the record "
+              f"edges, skipped")
+    types = types[kept]
+
+    rows = {}
+    for name in pd.unique(types):
+        metrics = step_metrics(epochs[types == name], sample_rate, pre, tolerance,
+                               smooth=smooth, noise_sigma=noise_sigma)
+        metrics.pop("response")
+        rows[name] = metrics
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+def minimum_dwell_s(table: pd.DataFrame, margin: float = 1.2,
+                    exclude=("initial",)) -> float:
+    """
+    Shortest safe dwell per step: the slowest settling time of all
+    transition types (except ``exclude``) times ``margin``.
+    """
+    times = table.loc[~table.index.isin(exclude), "settling_time_s"]
+    return float(margin * times.max())
@@ -0,0 +1,92 @@
+import numpy as np
+
+# Default resolution of campaign plots; far finer than a log axis can show
+DEFAULT_POINTS_PER_DECADE = 200
+
+
+def log_bin_spectrum(freq_Hz, values, points_per_decade=DEFAULT_POINTS_PER_DECADE,
+                     envelope=True):
+    """
+    Average a (linear) spectrum into logarithmically spaced frequency bins.
+
+    Bins are ``1 / points_per_decade`` decades wide; empty bins are dropped,
+    so at low frequency, where bins are narrower than the FFT resolution,
+    every original point survives unchanged.  Bins with f <= 0 are ignored
+    (they cannot be drawn on a log axis).
+
+    Parameters
+    ----------
+    freq_Hz : np.ndarray, shape (F,)
+        Ascending frequency axis.
+    values : np.ndarray, shape (F,) or (M, F)
+        Linear quantity to average (power, PSD, linear RIN) — not dB.
+        2-D input bins every row on the shared axis at once.
+    points_per_decade : float
+        Bin density.
+    envelope : bool
+        Also return the per-bin min / max.
+
+    Returns
+    -------
+    dict
+        ``"freq_Hz"`` mean frequency per bin, ``"mean"``, ``"count"`` and,
+        with ``envelope``, ``"min"`` / ``"max"``.
+    """
+    freq_Hz = np.asarray(freq_Hz, dtype=float)
+    values = np.asarray(values, dtype=float)
+
+    pos = freq_Hz > 0
+    f = freq_Hz[pos]
+    v = values[..., pos]
+    if f.size == 0:
+        raise ValueError("Spectrum has no positive frequencies to bin")
+
+    # integer log-bin index per point; sorted freq -> bins are contiguous runs
+    b = np.floor(np.log10(f) * points_per_decade).astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, b[1:] != b[:-1]])
+    count = np.diff(np.r_[starts, f.size])
+
+    out = {
+        "freq_Hz": np.add.reduceat(f, starts) / count,
+        "mean": np.add.reduceat(v, starts, axis=-1) / count,
+        "count": count,
+    }
+    if envelope:
+        out["min"] = np.minimum.reduceat(v, starts, axis=-1)
+        out["max"] = np.maximum.reduceat(v, starts, axis=-1)
+    return out
+
+
+def log_bin_rin_dB(freq_Hz, rin_dBc_per_Hz, points_per_decade=DEFAULT_POINTS_PER_DECADE,
+                   envelope=True):
+    """
+    Log-bin a RIN spectrum given in dBc/Hz.
+
+    Averaging is done in linear power (10^(dB/10)) and converted back, so a
+    bin's mean is the true mean noise power, not the mean of dB values.
+    Returns the same keys as log_bin_spectrum with mean/min/max in dBc/Hz.
+    """
+    lin = 10 ** (np.asarray(rin_dBc_per_Hz, dtype=float) / 10)
+    out = log_bin_spectrum(freq_Hz, lin, points_per_decade, envelope)
+    for key in ("mean", "min", "max"):
+        if key in out:
+            out[key] = 10 * np.log10(out[key])
+    return out
+
+
+def semilogx_rin(ax, freq_Hz, rin_dBc_per_Hz, points_per_decade=DEFAULT_POINTS_PER_DECADE,
+                 envelope=False, **plot_kwargs):
+    """
+    Draw a RIN spectrum on *ax*, log-binned unless ``points_per_decade`` is None.
+
+    With ``envelope`` the per-bin min/max are shaded behind the mean.
+    """
+    if not points_per_decade:
+        return ax.semilogx(freq_Hz, rin_dBc_per_Hz, **plot_kwargs)
+
+    binned = log_bin_rin_dB(freq_Hz, rin_dBc_per_Hz, points_per_decade, envelope)
+    lines = ax.semilogx(binned["freq_Hz"], binned["mean"], **plot_kwargs)
+    if envelope:
+        ax.fill_between(binned["freq_Hz"], binned["min"], binned["max"],
+                        color=lines[0].get_color(), alpha=0.2, linewidth=0)
+    return lines
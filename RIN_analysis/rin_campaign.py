@@ -0,0 +1,257 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+
+import RIN_analysis_Kaizhao as scope_tdms
+import Spectrum_RIN_class as dsa_csv
+from campaign_pool import map_ordered
+from log_binning import DEFAULT_POINTS_PER_DECADE
+from rin_metrics import DEFAULT_BANDS, band_rms_rin
+from spectrum_cache import SpectrumCache
+
+# Source type -> module providing campaign_job / campaign_label / load_measurement_rin
+SOURCES = {"dsa_csv": dsa_csv, "scope_tdms": scope_tdms}
+
+# (source grid digest, target grid digest) -> resampling operator
+_RESAMPLERS: "OrderedDict[tuple, tuple]" = OrderedDict()
+_MAX_RESAMPLERS = 32
+
+
+def measurement_source(meas: dict) -> str:
+    """Source type of a measurement entry: explicit ``"source"``, else by key."""
+    if "source" in meas:
+        return meas["source"]
+    if "csv" in meas:
+        return "dsa_csv"
+    if "file" in meas:
+        return "scope_tdms"
+    raise ValueError(f"Cannot tell the source type of measurement {meas.get('label')!r}")
+
+
+def load_any(job):
+    """Process-pool worker dispatching to the loader of the job's source type."""
+    source, inner = job
+    return SOURCES[source].load_measurement_rin(inner)
+
+
+def log_grid(f_min, f_max, points_per_decade=DEFAULT_POINTS_PER_DECADE):
+    """Log-spaced frequency grid from f_min to f_max (inclusive)."""
+    n = int(np.ceil(np.log10(f_max / f_min) * points_per_decade)) + 1
+    return np.geomspace(f_min, f_max, n)
+
+
+def grid_digest(a: np.ndarray) -> str:
+    """SHA-1 of a frequency grid's float64 values (equal grids, equal digests)."""
+    return hashlib.sha1(np.ascontiguousarray(a, dtype=float).tobytes()).hexdigest()
+
+
+def resampling_operator(src_freq, dst_freq):
+    """
+    Sparse (CSR) operator resampling a linear spectrum from *src_freq* to *dst_freq*.
+
+    Each target point averages every source bin inside its log cell (edges at
+    the geometric midpoints between target points, *dst_freq* must be
+    log-spaced-like with at least two points), so dense spectra are
+    averaged rather than decimated; cells holding no source bin fall back to
+    linear interpolation between the two neighbours.  Targets outside the
+    source range get NaN.  Operators are cached per (source, target) grid.
+
+    Returns
+    -------
+    indptr, indices, weights : np.ndarray
+        Row ``k`` is ``weights[indptr[k]:indptr[k+1]]`` applied to
+        ``src[indices[indptr[k]:indptr[k+1]]]``.
+    """
+    key = (grid_digest(src_freq), grid_digest(dst_freq))
+    op = _RESAMPLERS.get(key)
+    if op is not None:
+        _RESAMPLERS.move_to_end(key)
+        return op
+
+    src = np.asarray(src_freq, dtype=float)
+    dst = np.asarray(dst_freq, dtype=float)
+    edges = np.sqrt(dst[1:] * dst[:-1])
+    edges = np.r_[dst[0] ** 2 / edges[0], edges, dst[-1] ** 2 / edges[-1]]
+    lo = np.searchsorted(src, edges[:-1], side="left")
+    hi = np.searchsorted(src, edges[1:], side="left")
+    count = hi - lo
+
+    # interpolation neighbours for empty cells
+    j = np.clip(np.searchsorted(src, dst, side="right") - 1, 0, len(src) - 2)
+    t = (dst - src[j]) / (src[j + 1] - src[j])
+    inside = (dst >= src[0]) & (dst <= src[-1])
+
+    nnz = np.where(count > 0, count, 2)
+    indptr = np.r_[0, np.cumsum(nnz)]
+    indices = np.empty(indptr[-1], dtype=np.int64)
+    weights = np.empty(indptr[-1])
+
+    avg = count > 0
+    # averaged rows: consecutive source indices lo..hi-1, weight 1/count
+    row = np.repeat(np.flatnonzero(avg), count[avg])
+    pos = np.arange(row.size) - np.repeat(np.cumsum(count[avg]) - count[avg], count[avg])
+    indices[indptr[row] + pos] = lo[row] + pos
+    weights[indptr[row] + pos] = 1.0 / count[row]
+    # interpolated rows
+    k = np.flatnonzero(~avg)
+    indices[indptr[k]] = j[k]
+    indices[indptr[k] + 1] = j[k] + 1
+    weights[indptr[k]] = 1.0 - t[k]
+    weights[indptr[k] + 1] = t[k]
+
+    weights[np.repeat(~inside, nnz)] = np.nan
+
+    op = (indptr, indices, weights)
+    _RESAMPLERS[key] = op
+    if len(_RESAMPLERS) > _MAX_RESAMPLERS:
+        _RESAMPLERS.popitem(last=False)
+    return op
+
+
+def resample(src_freq, values, dst_freq):
+    """Apply resampling_operator to (F,) or stacked (M, F) linear spectra."""
+    indptr, indices, weights = resampling_operator(src_freq, dst_freq)
+    return np.add.reduceat(np.asarray(values)[..., indices] * weights, indptr[:-1], axis=-1)
+
+
+class RINCampaign:
+    """
+    A campaign on a common frequency grid.
+
+    Attributes
+    ----------
+    freq_Hz : np.ndarray, shape (F,)
+    rin_dBc : np.ndarray, shape (M, F)
+        C-contiguous RIN in dBc/Hz, one row per measurement.
+    meta : pd.DataFrame
+        One row per measurement: the measurement dict entries plus
+        ``source`` and ``display_label``.
+
+    Comparisons are array operations on ``rin_dBc``; averaging is done in
+    linear power.
+    """
+
+    def __init__(self, freq_Hz, rin_dBc, meta: pd.DataFrame):
+        self.freq_Hz = np.asarray(freq_Hz, dtype=float)
+        self.rin_dBc = np.ascontiguousarray(rin_dBc, dtype=float)
+        self.meta = meta.reset_index(drop=True)
+
+    def __len__(self):
+        return self.rin_dBc.shape[0]
+
+    def __repr__(self):
+        return f"RINCampaign({len(self)} measurements x {self.freq_Hz.size} frequencies)"
+
+    @property
+    def rin_lin(self):
+        return 10 ** (self.rin_dBc / 10)
+
+    # ----------------------------------------------------------------------
+    def rows(self, which) -> np.ndarray:
+        """
+        Row indices for *which*: a label, an int, a list of those, a boolean
+        mask, or a pandas query string on ``meta`` (e.g. ``"V_mean_V > 1"``).
+        """
+        if isinstance(which, str):
+            hits = np.flatnonzero(self.meta["label"].to_numpy() == which)
+            if hits.size:
+                return hits
+            return self.meta.query(which).index.to_numpy()
+        which = np.atleast_1d(which)
+        if which.dtype == bool:
+            return np.flatnonzero(which)
+        if which.dtype.kind in "iu":
+            return which
+        return np.concatenate([self.rows(w) for w in which])
+
+    def select(self, which) -> "RINCampaign":
+        idx = self.rows(which)
+        return RINCampaign(self.freq_Hz, self.rin_dBc[idx], self.meta.iloc[idx])
+
+    def mean(self, which=None) -> np.ndarray:
+        """Linear-power mean RIN (dBc/Hz) of the selected rows (default: all)."""
+        rin = self.rin_dBc if which is None else self.rin_dBc[self.rows(which)]
+        return 10 * np.log10(np.mean(10 ** (rin / 10), axis=0))
+
+    def difference(self, a, b) -> np.ndarray:
+        """
+        RIN of *a* minus RIN of *b* in dB, e.g. ``difference("DM ON", "DM OFF")``.
+
+        Selections of several rows are averaged (linear power) first.
+        """
+        return self.mean(a) - self.mean(b)
+
+    def band_table(self, bands: dict | None = None) -> pd.DataFrame:
+        """Band-integrated RMS RIN of every row (see rin_metrics.band_rms_rin)."""
+        bands = DEFAULT_BANDS if bands is None else bands
+        rms = band_rms_rin(self.freq_Hz, np.nan_to_num(self.rin_lin), bands)
+        return pd.DataFrame(rms, index=self.meta["display_label"], columns=list(bands))
+
+    def plot(self, ax=None, **plot_kwargs):
+        if ax is None:
+            fig, ax = plt.subplots(figsize=(9, 5))
+        for row, label in zip(self.rin_dBc, self.meta["display_label"]):
+            ax.semilogx(self.freq_Hz, row, label=label, **plot_kwargs)
+        ax.set_xlabel("Frequency (Hz)")
+        ax.set_ylabel("RIN (dBc/Hz)")
+        ax.grid(True, which="both")
+        ax.legend()
+        return ax
+
+
+def common_grid(spectra, grid: dict | None = None) -> np.ndarray:
+    """
+    Target grid for a campaign: log-spaced over the frequency range shared by
+    all spectra, or as given by ``grid`` = ``{"f_min", "f_max",
+    "points_per_decade"}`` (any key may be omitted).
+    """
+    grid = grid or {}
+    f_min = grid.get("f_min") or max(f[f > 0][0] for f in spectra)
+    f_max = grid.get("f_max") or min(f[-1] for f in spectra)
+    if f_max <= f_min:
+        raise ValueError(f"Spectra share no frequency range ({f_min:g} Hz >= {f_max:g} Hz)")
+    return log_grid(f_min, f_max, grid.get("points_per_decade", DEFAULT_POINTS_PER_DECADE))
+
+
+def load_campaign(campaign: dict, workers: int | None = None) -> RINCampaign:
+    """
+    Load a campaign of DSA CSV and/or scope TDMS measurements onto one grid.
+
+    Measurement entries follow the schema of plot_RIN_campaign (``"csv"``,
+    ``"trace"``, ``"PD_voltage_mV"``, ``"optical_power_W"``; uses
+    ``campaign["global"]``) or plot_RIN_campaign_tdms (``"file"``,
+    ``"V_mean_V"``; uses ``campaign["tdms_settings"]``), freely mixed.  All
+    files are loaded through one process pool; spectra are resampled in
+    linear power onto the common grid (``campaign["grid"]``, see
+    common_grid), rows sharing a source grid in a single sparse product.
+    """
+    cache = SpectrumCache.from_setting(campaign.get("cache"))
+    if workers is None:
+        workers = campaign.get("workers")
+
+    measurements = campaign["measurements"]
+    sources = [measurement_source(meas) for meas in measurements]
+    jobs = [(src, SOURCES[src].campaign_job(campaign, meas, cache))
+            for src, meas in zip(sources, measurements)]
+    spectra = map_ordered(load_any, jobs, workers)
+
+    freq = common_grid([f for f, _ in spectra], campaign.get("grid"))
+    rin = np.empty((len(spectra), freq.size))
+
+    groups = {}
+    for i, (f, _) in enumerate(spectra):
+        groups.setdefault(grid_digest(f), []).append(i)
+    for idx in groups.values():
+        src_freq = spectra[idx[0]][0]
+        lin = 10 ** (np.array([spectra[i][1] for i in idx]) / 10)
+        rin[idx] = 10 * np.log10(resample(src_freq, lin, freq))
+
+    meta = pd.DataFrame(measurements)
+    meta["source"] = sources
+    meta["display_label"] = [SOURCES[src].campaign_label(meas)
+                             for src, meas in zip(sources, measurements)]
+    print(f"[INFO] Loaded {len(spectra)} measurements onto {freq.size} frequencies")
+    return RINCampaign(freq, rin, meta)
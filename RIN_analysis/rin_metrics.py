@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+
+# Integration bands reported by default (edit per campaign via "bands")
+DEFAULT_BANDS = {
+    "10 Hz-1 kHz": (10.0, 1e3),
+    "1-100 kHz": (1e3, 1e5),
+}
+
+
+def stack_spectra(freqs, rins_dBc_per_Hz):
+    """
+    Stack spectra of possibly different grids into (M, F) arrays.
+
+    Shorter rows are padded with their last frequency and zero linear RIN,
+    i.e. zero-width intervals that add nothing to an integral, so every
+    measurement can be processed in one 2-D operation.
+
+    Returns
+    -------
+    freq_Hz : np.ndarray, shape (M, F)
+    rin_lin : np.ndarray, shape (M, F)
+        Linear RIN PSD (1/Hz).
+    """
+    F = max(len(f) for f in freqs)
+    freq = np.empty((len(freqs), F))
+    rin_lin = np.zeros((len(freqs), F))
+    for i, (f, r) in enumerate(zip(freqs, rins_dBc_per_Hz)):
+        n = len(f)
+        freq[i, :n] = f
+        freq[i, n:] = f[-1]
+        np.exp(np.asarray(r, dtype=float) * (np.log(10) / 10), out=rin_lin[i, :n])
+    return freq, rin_lin
+
+
+def cumulative_integrated_rin(freq_Hz, rin_lin):
+    """
+    Cumulative trapezoidal integral of the linear RIN PSD along the last axis.
+
+    ``freq_Hz`` is (F,) or (M, F), non-uniform grids allowed.  The result has
+    the shape of ``rin_lin`` and starts at 0; sqrt of a difference of two
+    entries is the RMS RIN between those frequencies.
+    """
+    freq_Hz = np.broadcast_to(freq_Hz, np.shape(rin_lin))
+    seg = 0.5 * np.diff(freq_Hz, axis=-1) * (rin_lin[..., 1:] + rin_lin[..., :-1])
+    C = np.zeros_like(rin_lin, dtype=float)
+    np.cumsum(seg, axis=-1, out=C[..., 1:])
+    return C
+
+
+def _cumulative_at(freq, S, C, edges):
+    """
+    Exact trapezoidal cumulative integral at arbitrary edges, every row at once.
+
+    freq, S, C: (M, F); edges: (E,).  Edges are clamped to each row's range.
+    """
+    M, F = freq.shape
+    e = np.clip(edges[None, :], freq[:, :1], freq[:, -1:])                 # (M, E)
+
+    # One searchsorted for all rows: map row m onto [2m, 2m + 1] so the
+    # flattened grid stays globally sorted.
+    lo = freq[:, :1]
+    span = freq[:, -1:] - lo
+    span = np.where(span > 0, span, 1.0)
+    shift = 2.0 * np.arange(M)[:, None]
+    keys = ((freq - lo) / span + shift).ravel()
+    n_below = np.searchsorted(keys, ((e - lo) / span + shift).ravel(), side="left")
+    i = np.clip(n_below.reshape(M, -1) - F * np.arange(M)[:, None] - 1, 0, F - 2)
+    f0 = np.take_along_axis(freq, i, axis=1)
+    f1 = np.take_along_axis(freq, i + 1, axis=1)
+    S0 = np.take_along_axis(S, i, axis=1)
+    S1 = np.take_along_axis(S, i + 1, axis=1)
+    df = f1 - f0
+    t = np.divide(e - f0, df, out=np.zeros_like(df), where=df > 0)
+    Se = S0 + t * (S1 - S0)
+    return np.take_along_axis(C, i, axis=1) + 0.5 * (e - f0) * (S0 + Se)
+
+
+def band_rms_rin(freq_Hz, rin_lin, bands):
+    """
+    RMS RIN (fractional) in every band for every measurement.
+
+    Parameters
+    ----------
+    freq_Hz : np.ndarray, shape (F,) or (M, F)
+    rin_lin : np.ndarray, shape (M, F)
+        Linear RIN PSD (1/Hz).
+    bands : dict
+        ``{name: (f_low_Hz, f_high_Hz)}``.
+
+    Returns
+    -------
+    np.ndarray, shape (M, len(bands))
+        sqrt(∫ RIN df) over each band; NaN where a band does not overlap a
+        measurement's frequency range.
+    """
+    rin_lin = np.atleast_2d(rin_lin)
+    freq = np.broadcast_to(freq_Hz, rin_lin.shape)
+    lims = np.asarray(list(bands.values()), dtype=float)                    # (B, 2)
+
+    C = cumulative_integrated_rin(freq, rin_lin)
+    Ce = _cumulative_at(freq, rin_lin, C, lims.ravel()).reshape(len(rin_lin), -1, 2)
+    rms = np.sqrt(np.maximum(Ce[..., 1] - Ce[..., 0], 0.0))
+
+    outside = (lims[None, :, 1] <= freq[:, :1]) | (lims[None, :, 0] >= freq[:, -1:])
+    rms[outside] = np.nan
+    return rms
+
+
+def rin_band_table(results: list, bands: dict | None = None) -> pd.DataFrame:
+    """
+    Band-integrated RMS RIN table for loaded campaign results.
+
+    *results* is the list returned by load_RIN_campaign / load_RIN_campaign_tdms.
+    All spectra are integrated together as one (measurements × frequency)
+    array.  Values are fractional RMS RIN; columns are the band names.
+    """
+    bands = DEFAULT_BANDS if bands is None else bands
+    freq, rin_lin = stack_spectra([r["freq_Hz"] for r in results],
+                                  [r["RIN_dBc_per_Hz"] for r in results])
+    rms = band_rms_rin(freq, rin_lin, bands)
+    return pd.DataFrame(rms, index=[r["label"] for r in results], columns=list(bands))
+
+
+def print_band_table(table: pd.DataFrame):
+    print("[INFO] Integrated RMS RIN per band:")
+    print(table.to_string(float_format=lambda v: f"{v:.3e}"))
@@ -0,0 +1,227 @@
+import argparse
+import fnmatch
+import os
+import struct
+import time
+from pathlib import Path
+
+import matplotlib.pyplot as plt
+
+from log_binning import DEFAULT_POINTS_PER_DECADE, log_bin_rin_dB
+from rin_campaign import SOURCES
+from rin_metrics import rin_band_table
+from spectrum_cache import SpectrumCache
+
+SOURCE_BY_PATTERN = {"*.tdms": "scope_tdms", "*.csv": "dsa_csv"}
+
+# Measurement values each source cannot compute a RIN without
+REQUIRED_KEYS = {"scope_tdms": ("V_mean_V",), "dsa_csv": ("PD_voltage_mV",)}
+
+# Errors of a file that is still being written (or is corrupt); retried
+READ_ERRORS = (OSError, EOFError, KeyError, ValueError, struct.error)
+
+
+class RINMonitor:
+    """
+    Watch a campaign folder and add the RIN of every newly saved file to a
+    live plot.
+
+    The configuration is a campaign dict without ``"measurements"``:
+
+        {
+            "base_folder": ...,                  # folder to watch
+            "global": {...},                     # DSA settings (CSV files)
+            "tdms_settings": {...},              # scope settings (TDMS files)
+            "defaults": {"V_mean_V": ..., "PD_voltage_mV": ...,
+                         "optical_power_W": None, "trace": "Trace A"},
+            "files": {"name.tdms": {"V_mean_V": ..., "label": ...}},  # optional
+            "cache": True,                       # optional, see SpectrumCache
+            "poll_interval_s": 0.2,              # optional
+            "points_per_decade": 200,            # optional
+        }
+
+    A file is processed once its size and mtime are unchanged between two
+    polls (i.e. the scope has finished writing it).  Each file is parsed
+    exactly once, in-process, through the cached/streaming readers; files
+    present before start-up are processed on the first poll unless
+    ``skip_existing`` is set.
+
+    TDMS files need ``V_mean_V`` and CSV files ``PD_voltage_mV``, from
+    ``"defaults"`` or the file's ``"files"`` entry; a file without it is
+    skipped with a warning.  Read errors (OSError, parse errors) are retried
+    up to ``max_attempts`` polls; other exceptions propagate.
+    """
+
+    def __init__(self, config: dict, skip_existing: bool = False):
+        self.config = config
+        self.folder = Path(config["base_folder"])
+        self.cache = SpectrumCache.from_setting(config.get("cache"))
+        self.poll_interval_s = config.get("poll_interval_s", 0.2)
+        self.ppd = config.get("points_per_decade", DEFAULT_POINTS_PER_DECADE)
+        self.max_attempts = config.get("max_attempts", 3)
+
+        self.results = []       # same layout as load_RIN_campaign results
+        self._done = set()      # processed (or given-up) file names
+        self._pending = {}      # name -> (size, mtime_ns) seen on the last poll
+        self._failures = {}
+
+        self.fig = None
+        self.ax = None
+
+        defaults = config.get("defaults", {})
+        for source, keys in REQUIRED_KEYS.items():
+            missing = [k for k in keys if defaults.get(k) is None]
+            if missing:
+                print(f"[WARNING] Monitor: no default {', '.join(missing)}; {source} files "
+                      f"without a 'files' entry setting it will be skipped")
+
+        if skip_existing:
+            self._done.update(name for name, _ in self._candidates())
+
+    # ----------------------------------------------------------------------
+    def _candidates(self):
+        with os.scandir(self.folder) as it:
+            for entry in it:
+                if not entry.is_file() or entry.name in self._done:
+                    continue
+                for pattern, source in SOURCE_BY_PATTERN.items():
+                    if fnmatch.fnmatch(entry.name.lower(), pattern):
+                        yield entry.name, (source, entry.stat())
+                        break
+
+    def _measurement(self, name: str, source: str) -> dict:
+        meas = {**self.config.get("defaults", {}), **self.config.get("files", {}).get(name, {})}
+        meas.setdefault("label", Path(name).stem)
+        meas["csv" if source == "dsa_csv" else "file"] = name
+        return meas
+
+    def _load(self, name: str, source: str):
+        meas = self._measurement(name, source)
+        module = SOURCES[source]
+        freq, rin_dBc = module.load_measurement_rin(module.campaign_job(self.config, meas, self.cache))
+        result = {
+            "label": module.campaign_label(meas),
+            "freq_Hz": freq,
+            "RIN_dBc_per_Hz": rin_dBc,
+            "meas": meas,
+        }
+        self.results.append(result)
+        return result
+
+    def poll(self) -> list:
+        """
+        Scan the folder once and load every file that has finished writing.
+
+        Returns the list of new results (possibly empty).
+        """
+        new = []
+        seen = {}
+        for name, (source, st) in self._candidates():
+            stamp = (st.st_size, st.st_mtime_ns)
+            if st.st_size == 0 or self._pending.get(name) != stamp:
+                seen[name] = stamp          # new or still growing
+                continue
+            missing = [k for k in REQUIRED_KEYS[source]
+                       if self._measurement(name, source).get(k) is None]
+            if missing:
+                print(f"[WARNING] Monitor: skipped {name}, no {', '.join(missing)} set")
+                self._done.add(name)
+                continue
+            try:
+                new.append(self._load(name, source))
+                self._done.add(name)
+                print(f"[INFO] Monitor: added {name}")
+            except READ_ERRORS as e:        # half-written file, retry next poll
+                n = self._failures[name] = self._failures.get(name, 0) + 1
+                print(f"[WARNING] Monitor: could not read {name} ({e}), attempt {n}")
+                if n >= self.max_attempts:
+                    self._done.add(name)
+                else:
+                    seen[name] = stamp
+        self._pending = seen
+        return new
+
+    # ----------------------------------------------------------------------
+    def _ensure_figure(self):
+        if self.fig is None or not plt.fignum_exists(self.fig.number):
+            plt.ion()
+            self.fig, self.ax = plt.subplots(figsize=(9, 5))
+            self.ax.set_xscale("log")
+            self.ax.set_xlabel("Frequency (Hz)")
+            self.ax.set_ylabel("RIN (dBc/Hz)")
+            self.ax.set_title(f"RIN monitor — {self.folder.name}")
+            self.ax.grid(True, which="both")
+
+    def update_plot(self, new_results: list):
+        """Add lines for *new_results* to the persistent figure, in place."""
+        self._ensure_figure()
+        for res in new_results:
+            if self.ppd:
+                binned = log_bin_rin_dB(res["freq_Hz"], res["RIN_dBc_per_Hz"], self.ppd,
+                                        envelope=False)
+                self.ax.plot(binned["freq_Hz"], binned["mean"], label=res["label"], linewidth=1.0)
+            else:
+                self.ax.plot(res["freq_Hz"], res["RIN_dBc_per_Hz"], label=res["label"],
+                             linewidth=1.0)
+        self.ax.relim()
+        self.ax.autoscale_view()
+        self.ax.legend(fontsize=8)
+        self.fig.canvas.draw_idle()
+
+    def table(self, bands: dict | None = None):
+        """Band-integrated RMS RIN of everything collected so far."""
+        return rin_band_table(self.results, bands)
+
+    def run(self, duration_s: float | None = None):
+        """
+        Poll until the figure is closed, Ctrl+C, or ``duration_s`` elapses.
+        """
+        print(f"[INFO] Monitoring {self.folder} (Ctrl+C to stop)")
+        self._ensure_figure()
+        t_end = None if duration_s is None else time.monotonic() + duration_s
+        try:
+            while t_end is None or time.monotonic() < t_end:
+                new = self.poll()
+                if new:
+                    self.update_plot(new)
+                if not plt.fignum_exists(self.fig.number):
+                    break
+                plt.pause(self.poll_interval_s)
+        except KeyboardInterrupt:
+            pass
+        print(f"[INFO] Monitor stopped, {len(self.results)} measurements collected")
+        return self.results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Live RIN plot of a campaign folder")
+    parser.add_argument("folder")
+    parser.add_argument("--V_mean_V", type=float, default=None,
+                        help="mean PD voltage for TDMS files")
+    parser.add_argument("--PD_voltage_mV", type=float, default=None,
+                        help="DC PD voltage for DSA CSV files")
+    parser.add_argument("--RBW_Hz", type=float, default=300.0)
+    parser.add_argument("--trace", default="Trace A")
+    parser.add_argument("--slot", default="Oscilloscope (PXI1Slot7)")
+    parser.add_argument("--channel", default="0")
+    parser.add_argument("--skip-existing", action="store_true")
+    args = parser.parse_args()
+    if args.V_mean_V is None and args.PD_voltage_mV is None:
+        parser.error("give --V_mean_V (TDMS files) and/or --PD_voltage_mV (CSV files)")
+
+    RINMonitor({
+        "base_folder": args.folder,
+        "global": {
+            "responsivity_A_per_W": None,
+            "transimpedance_V_per_A": None,
+            "res_bandwidth_Hz": args.RBW_Hz,
+        },
+        "tdms_settings": {"slot": args.slot, "channel": args.channel},
+        "defaults": {
+            "V_mean_V": args.V_mean_V,
+            "PD_voltage_mV": args.PD_voltage_mV,
+            "optical_power_W": None,
+            "trace": args.trace,
+        },
+        "cache": True,
+    }, skip_existing=args.skip_existing).run()
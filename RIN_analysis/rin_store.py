@@ -0,0 +1,249 @@
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from campaign_pool import map_ordered
+from rin_campaign import (SOURCES, RINCampaign, common_grid, grid_digest, load_any,
+                          measurement_source, resample)
+from spectrum_cache import SpectrumCache
+
+STORE_VERSION = 1
+
+
+def _jsonable(value):
+    """Metadata value as a JSON scalar (numpy scalars, paths, ... -> str/float)."""
+    if isinstance(value, (str, bool, int, float)) or value is None:
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+class RINStore:
+    """
+    Columnar store of RIN spectra with a metadata index.
+
+    Layout of the store directory::
+
+        index.json              one record per spectrum: metadata + location
+        grid_<digest>.npy       frequency axes, one per distinct grid
+        chunk_<n>.npy           (rows, F) float32 RIN in dBc/Hz, all rows of
+                                a chunk share one grid
+
+    Every ``ingest`` call appends one chunk per frequency grid.  Queries run
+    on the metadata table (a pandas query string, e.g.
+    ``"offset_lambda == 1 and pinhole"``) and read only the matching rows,
+    through memory-mapped chunk files, so comparing across months of data
+    never re-parses instrument files nor loads unrelated spectra.
+
+    Parameters
+    ----------
+    directory : str or path-like
+        Store directory (created if missing).
+    """
+
+    INDEX = "index.json"
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        index_path = self.directory / self.INDEX
+        if index_path.exists():
+            with open(index_path) as fh:
+                self._index = json.load(fh)
+            if self._index.get("version") != STORE_VERSION:
+                raise ValueError(f"{index_path}: unsupported store version "
+                                 f"{self._index.get('version')}")
+        else:
+            self._index = {"version": STORE_VERSION, "chunks": [], "rows": []}
+        self._meta = None
+
+    def __len__(self):
+        return len(self._index["rows"])
+
+    def __repr__(self):
+        return (f"RINStore({self.directory}: {len(self)} spectra in "
+                f"{len(self._index['chunks'])} chunks)")
+
+    @property
+    def meta(self) -> pd.DataFrame:
+        """Metadata table, one row per stored spectrum (row label = spectrum id)."""
+        if self._meta is None:
+            self._meta = pd.DataFrame(self._index["rows"])
+        return self._meta
+
+    # ----------------------------------------------------------------------
+    def _write_index(self):
+        path = self.directory / self.INDEX
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w") as fh:
+            json.dump(self._index, fh)
+        os.replace(tmp, path)  # readers never see a half-written index
+        self._meta = None
+
+    def _save_npy(self, name: str, array: np.ndarray):
+        path = self.directory / name
+        tmp = path.with_name(path.stem + ".tmp.npy")
+        np.save(tmp, array)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def file_identity(path) -> str:
+        """Path, size and mtime of a measurement file (re-saved files re-ingest)."""
+        path = Path(path).resolve()
+        st = path.stat()
+        return f"{path}|{st.st_size}|{st.st_mtime_ns}"
+
+    @classmethod
+    def measurement_identity(cls, source: str, job: tuple) -> str:
+        """
+        File identity plus the source and every parser setting of a
+        ``campaign_job`` tuple (all but the trailing cache): trace, channel,
+        welch settings, V_mean_V / PD_voltage_mV, ...
+        """
+        settings = json.dumps([source, *job[1:-1]], sort_keys=True, default=str)
+        return f"{cls.file_identity(job[0])}|{settings}"
+
+    # ----------------------------------------------------------------------
+    def ingest(self, campaign: dict, metadata: dict | None = None,
+               workers: int | None = None) -> int:
+        """
+        Add every measurement of a campaign (schema of rin_campaign.load_campaign).
+
+        Metadata of each row is ``campaign["metadata"]``, then ``metadata``,
+        then the measurement dict (later entries win), plus ``source``,
+        ``display_label``, ``path`` and ``ingested``.  Measurements already
+        in the store (same file path, size and mtime, and same parser
+        settings, see measurement_identity) are skipped, so several traces
+        or channels of one file are separate rows.
+
+        Returns the number of spectra added.
+        """
+        cache = SpectrumCache.from_setting(campaign.get("cache"))
+        if workers is None:
+            workers = campaign.get("workers")
+        known = {row["identity"] for row in self._index["rows"]}
+
+        jobs, records = [], []
+        for meas in campaign["measurements"]:
+            src = measurement_source(meas)
+            job = SOURCES[src].campaign_job(campaign, meas, cache)
+            identity = self.measurement_identity(src, job)
+            if identity in known:
+                continue
+            known.add(identity)
+            record = {**campaign.get("metadata", {}), **(metadata or {}), **meas,
+                      "source": src,
+                      "display_label": SOURCES[src].campaign_label(meas),
+                      "path": str(Path(job[0]).resolve()),
+                      "file_identity": self.file_identity(job[0]),
+                      "identity": identity,
+                      "ingested": time.strftime("%Y-%m-%dT%H:%M:%S")}
+            jobs.append((src, job))
+            records.append({k: _jsonable(v) for k, v in record.items()})
+
+        if not jobs:
+            print("[INFO] Store: nothing new to ingest")
+            return 0
+
+        spectra = map_ordered(load_any, jobs, workers)
+
+        groups = {}
+        for i, (freq, _) in enumerate(spectra):
+            groups.setdefault(grid_digest(freq), []).append(i)
+
+        for digest, idx in groups.items():
+            grid_name = f"grid_{digest[:16]}.npy"
+            if not (self.directory / grid_name).exists():
+                self._save_npy(grid_name, np.asarray(spectra[idx[0]][0], dtype=float))
+
+            chunk_id = len(self._index["chunks"])
+            chunk_name = f"chunk_{chunk_id:05d}.npy"
+            self._save_npy(chunk_name, np.array([spectra[i][1] for i in idx], dtype=np.float32))
+            self._index["chunks"].append({"file": chunk_name, "grid": grid_name,
+                                          "rows": len(idx)})
+            for row, i in enumerate(idx):
+                self._index["rows"].append({**records[i], "id": len(self._index["rows"]),
+                                            "chunk": chunk_id, "row": row})
+
+        self._write_index()
+        print(f"[INFO] Store: ingested {len(jobs)} spectra into {len(groups)} chunk(s)")
+        return len(jobs)
+
+    # ----------------------------------------------------------------------
+    def query(self, where: str | None = None) -> pd.DataFrame:
+        """Metadata rows matching a pandas query string (all rows if None)."""
+        if not len(self):
+            return self.meta
+        return self.meta if where is None else self.meta.query(where)
+
+    def load(self, where: str | None = None) -> list[dict]:
+        """
+        Spectra matching *where*, in the layout of load_RIN_campaign results
+        (``{"label", "freq_Hz", "RIN_dBc_per_Hz", "meas"}``), in store order.
+
+        Only the matching rows of each chunk are read (memory-mapped).
+        """
+        rows = self.query(where)
+        if rows.empty:
+            return []
+        results = {}
+        for chunk_id, group in rows.groupby("chunk"):
+            chunk = self._index["chunks"][chunk_id]
+            freq = np.load(self.directory / chunk["grid"])
+            data = np.load(self.directory / chunk["file"], mmap_mode="r")
+            rin = np.asarray(data[group["row"].to_numpy()], dtype=float)
+            for k, (sid, meta) in enumerate(group.iterrows()):
+                results[sid] = {
+                    "label": meta["display_label"],
+                    "freq_Hz": freq,
+                    "RIN_dBc_per_Hz": rin[k],
+                    "meas": meta.dropna().to_dict(),
+                }
+        return [results[sid] for sid in rows.index]
+
+    def campaign(self, where: str | None = None, grid: dict | None = None) -> RINCampaign:
+        """
+        Matching spectra as a RINCampaign on a common grid (see
+        rin_campaign.common_grid); rows of one chunk are resampled together.
+        """
+        rows = self.query(where)
+        if rows.empty:
+            raise ValueError(f"No stored spectrum matches {where!r}")
+        grids = {cid: np.load(self.directory / self._index["chunks"][cid]["grid"])
+                 for cid in rows["chunk"].unique()}
+        freq = common_grid(list(grids.values()), grid)
+
+        rin = np.empty((len(rows), freq.size))
+        pos = pd.Series(np.arange(len(rows)), index=rows.index)
+        for chunk_id, group in rows.groupby("chunk"):
+            data = np.load(self.directory / self._index["chunks"][chunk_id]["file"],
+                           mmap_mode="r")
+            lin = 10 ** (np.asarray(data[group["row"].to_numpy()], dtype=float) / 10)
+            rin[pos[group.index].to_numpy()] = 10 * np.log10(resample(grids[chunk_id], lin, freq))
+        return RINCampaign(freq, rin, rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Columnar RIN measurement store")
+    parser.add_argument("store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_ingest = sub.add_parser("ingest", help="ingest a campaign JSON file")
+    p_ingest.add_argument("campaign_json")
+    p_ingest.add_argument("--workers", type=int, default=None)
+    p_query = sub.add_parser("query", help="list spectra matching a pandas query")
+    p_query.add_argument("where", nargs="?", default=None)
+    args = parser.parse_args()
+
+    store = RINStore(args.store)
+    if args.command == "ingest":
+        with open(args.campaign_json) as fh:
+            store.ingest(json.load(fh), workers=args.workers)
+    else:
+        cols = [c for c in ("id", "display_label", "source", "path") if c in store.meta]
+        print(store.query(args.where)[cols].to_string(index=False))
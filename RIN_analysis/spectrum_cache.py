@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+# Bump when a parser changes its output so stale entries are never served
+CACHE_VERSION = 1
+
+
+class SpectrumCache:
+    """
+    On-disk cache of parsed spectra (DSA CSV, scope TDMS).
+
+    Each entry is one uncompressed ``.npz`` file in a central cache directory
+    holding the parsed arrays plus a JSON metadata blob.  Entries are keyed on
+
+        resolved file path, file size, mtime, parser name, parser settings
+
+    so editing or re-saving a measurement file invalidates its entry
+    automatically.  The directory is bounded to ``max_bytes``; the least
+    recently used entries are evicted first (a hit refreshes the entry's
+    mtime).
+
+    Parameters
+    ----------
+    directory : str or path-like or None
+        Cache directory, default ``~/.cache/DM_Control/spectra``.
+    max_bytes : int
+        Size bound of the cache directory in bytes (default 1 GiB).
+    """
+
+    SUFFIX = ".npz"
+    TMP_TAG = ".tmp"
+
+    def __init__(self, directory=None, max_bytes: int = 2**30):
+        if directory is None:
+            directory = Path.home() / ".cache" / "DM_Control" / "spectra"
+        self.directory = Path(directory)
+        self.max_bytes = int(max_bytes)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_setting(cls, setting):
+        """
+        Build a cache from a campaign ``"cache"`` entry.
+
+        Accepts ``None``/``False`` (no cache), ``True`` (default cache),
+        a dict of constructor keywords, or an existing SpectrumCache.
+        """
+        if setting is None or setting is False:
+            return None
+        if isinstance(setting, cls):
+            return setting
+        if setting is True:
+            return cls()
+        return cls(**setting)
+
+    # ----------------------------------------------------------------------
+    def key(self, filepath, parser: str, settings: dict | None = None) -> str:
+        path = Path(filepath).resolve()
+        st = path.stat()
+        ident = json.dumps(
+            [CACHE_VERSION, str(path), st.st_size, st.st_mtime_ns, parser, settings or {}],
+            sort_keys=True, default=str,
+        )
+        return hashlib.sha1(ident.encode("utf-8")).hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.directory / (key + self.SUFFIX)
+
+    # ----------------------------------------------------------------------
+    def load(self, filepath, parser: str, settings: dict | None = None):
+        """
+        Return ``(arrays, meta)`` for a cached file, or None on a miss.
+        """
+        entry = self._entry(self.key(filepath, parser, settings))
+        try:
+            with np.load(entry, allow_pickle=False) as npz:
+                meta = json.loads(str(npz["__meta__"]))
+                arrays = {k: npz[k] for k in npz.files if k != "__meta__"}
+            os.utime(entry)  # LRU bookkeeping
+        except (OSError, KeyError, ValueError):  # missing, evicted meanwhile or corrupt
+            return None
+        return arrays, meta
+
+    def store(self, filepath, parser: str, settings: dict | None, arrays: dict, meta: dict):
+        """
+        Write an entry, then evict least recently used entries over the size bound.
+        """
+        entry = self._entry(self.key(filepath, parser, settings))
+        tmp = entry.with_name(entry.stem + self.TMP_TAG + self.SUFFIX)
+        np.savez(tmp, __meta__=np.array(json.dumps(meta)), **arrays)
+        os.replace(tmp, entry)  # atomic: concurrent readers never see half an entry
+        self._evict()
+
+    def _entries(self):
+        """Completed entries (not the temporary files of in-flight stores)."""
+        for entry in self.directory.glob("*" + self.SUFFIX):
+            if not entry.name.endswith(self.TMP_TAG + self.SUFFIX):
+                yield entry
+
+    def clear(self):
+        for entry in self._entries():
+            entry.unlink(missing_ok=True)
+
+    def _evict(self):
+        entries = []
+        for entry in self._entries():
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime_ns, st.st_size, entry))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total -= size
@@ -0,0 +1,209 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from rin_campaign import RINCampaign
+
+# Known spur families: name -> fundamental (Hz).  Edit per setup (e.g. add
+# the DM driver switching frequency once measured).
+DEFAULT_FAMILIES = {
+    "mains 50 Hz": 50.0,
+    "mains 60 Hz": 60.0,
+}
+
+# Rows of (rows, F, window) median-filter views processed per step
+FLOOR_CHUNK_ELEMENTS = 2 ** 24
+
+
+# ----------------------------------------------------------------------
+# Noise floor and peaks
+# ----------------------------------------------------------------------
+def noise_floor(rin_dBc, window: int = 31) -> np.ndarray:
+    """
+    Running-median noise floor along the frequency axis of ``(M, F)`` spectra.
+
+    The median over ``window`` points (odd) ignores narrow spurs; edges are
+    padded with the first / last value.  Rows are processed in chunks so the
+    ``(rows, F, window)`` window view stays bounded.
+    """
+    rin = np.atleast_2d(np.asarray(rin_dBc, dtype=float))
+    window = int(window) | 1
+    half = window // 2
+    padded = np.pad(rin, ((0, 0), (half, half)), mode="edge")
+    floor = np.empty_like(rin)
+    step = max(FLOOR_CHUNK_ELEMENTS // (rin.shape[1] * window), 1)
+    for start in range(0, rin.shape[0], step):
+        view = sliding_window_view(padded[start:start + step], window, axis=1)
+        floor[start:start + step] = np.median(view, axis=-1)
+    return floor
+
+
+def find_peaks(freq_Hz, rin_dBc, window: int = 31, prominence_dB: float = 6.0):
+    """
+    Spurs of every row of ``(M, F)`` spectra: local maxima standing at least
+    ``prominence_dB`` above the running-median floor.
+
+    Peak frequencies are refined by a parabola through the three points
+    around the maximum (in log frequency, as campaign grids are log-spaced).
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per spur: ``row``, ``freq_Hz``, ``rin_dBc``, ``floor_dBc``,
+        ``prominence_dB``.
+    """
+    freq = np.asarray(freq_Hz, dtype=float)
+    rin = np.atleast_2d(np.asarray(rin_dBc, dtype=float))
+    excess = rin - noise_floor(rin, window)
+
+    inner = rin[:, 1:-1]
+    is_peak = (inner > rin[:, :-2]) & (inner >= rin[:, 2:]) & (excess[:, 1:-1] >= prominence_dB)
+    row, k = np.nonzero(is_peak)
+    k = k + 1
+
+    y0, y1, y2 = rin[row, k - 1], rin[row, k], rin[row, k + 1]
+    denom = y0 - 2 * y1 + y2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shift = np.where(denom < 0, 0.5 * (y0 - y2) / denom, 0.0)
+    logf = np.log(np.where(freq > 0, freq, np.nan))
+    dlog = np.where(shift >= 0, logf[k + 1] - logf[k],
+                    logf[k] - logf[k - 1])
+    f_peak = np.exp(logf[k] + shift * dlog)
+
+    return pd.DataFrame({
+        "row": row,
+        "freq_Hz": np.where(np.isfinite(f_peak), f_peak, freq[k]),
+        "rin_dBc": y1,
+        "floor_dBc": y1 - excess[row, k],
+        "prominence_dB": excess[row, k],
+    })
+
+
+# ----------------------------------------------------------------------
+# Grouping
+# ----------------------------------------------------------------------
+def assign_families(freq_Hz, families: dict | None = None, rel_tol: float = 0.01,
+                    max_harmonic: int = 50, auto: bool = True):
+    """
+    Harmonic family of every spur frequency.
+
+    A spur belongs to a known family (``families``, default DEFAULT_FAMILIES)
+    when it lies within ``rel_tol`` of an integer multiple (<= max_harmonic)
+    of its fundamental.  With ``auto``, spurs left over are grouped into new
+    families, lowest frequency first: each one becomes a fundamental
+    (``"auto <f> Hz"``) for the remaining spurs at its multiples, provided
+    its 2nd or 3rd harmonic is among them (so an unrelated low line does
+    not claim a family as a far subharmonic).
+
+    Returns
+    -------
+    family : np.ndarray of object
+        Family name per spur (None when unassigned).
+    harmonic : np.ndarray of int
+        Harmonic number (0 when unassigned).
+    """
+    f = np.asarray(freq_Hz, dtype=float)
+    family = np.full(f.size, None, dtype=object)
+    harmonic = np.zeros(f.size, dtype=int)
+    families = dict(DEFAULT_FAMILIES if families is None else families)
+
+    def _match(f0, candidates):
+        n = np.rint(f[candidates] / f0)
+        ok = (n >= 1) & (n <= max_harmonic) & (np.abs(f[candidates] / (n * f0) - 1) <= rel_tol)
+        return candidates[ok], n[ok].astype(int)
+
+    free = np.arange(f.size)
+    for name, f0 in families.items():
+        hits, n = _match(float(f0), free)
+        family[hits], harmonic[hits] = name, n
+        free = free[family[free] == None]  # noqa: E711 (object array)
+
+    while auto and free.size:
+        f0 = f[free].min()
+        hits, n = _match(f0, free)
+        if not np.any((n == 2) | (n == 3)):
+            free = free[f[free] > f0]
+            continue
+        family[hits], harmonic[hits] = f"auto {f0:.4g} Hz", n
+        free = free[family[free] == None]  # noqa: E711
+    return family, harmonic
+
+
+def assign_tracks(freq_Hz, rel_tol: float = 0.005) -> np.ndarray:
+    """
+    Track id per spur: spurs of all measurements sorted by frequency and cut
+    wherever neighbours differ by more than ``rel_tol`` (relative), so the
+    same line found in several measurements shares an id.  Ids increase with
+    frequency.
+    """
+    f = np.asarray(freq_Hz, dtype=float)
+    if f.size == 0:
+        return np.zeros(0, dtype=int)
+    order = np.argsort(f, kind="stable")
+    gaps = np.diff(np.log(f[order])) > np.log1p(rel_tol)
+    track = np.empty(f.size, dtype=int)
+    track[order] = np.concatenate(([0], np.cumsum(gaps)))
+    return track
+
+
+# ----------------------------------------------------------------------
+# Campaign level
+# ----------------------------------------------------------------------
+def detect_spurs(campaign: RINCampaign, window: int = 31, prominence_dB: float = 6.0,
+                 families: dict | None = None, family_tol: float = 0.01,
+                 track_tol: float = 0.005, auto_families: bool = True) -> pd.DataFrame:
+    """
+    Spurs of every measurement of a campaign in one pass.
+
+    Parameters
+    ----------
+    campaign : RINCampaign
+    window : int
+        Running-median length (grid points) of the noise floor.
+    prominence_dB : float
+        Minimum height above the floor.
+    families, family_tol, auto_families :
+        See assign_families.
+    track_tol : float
+        Relative frequency tolerance for matching spurs across measurements.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per spur and measurement: ``display_label``, ``freq_Hz``,
+        ``rin_dBc``, ``floor_dBc``, ``prominence_dB``, ``track``,
+        ``track_freq_Hz`` (median over the track), ``family``, ``harmonic``.
+        ``row`` is the campaign row.
+    """
+    spurs = find_peaks(campaign.freq_Hz, campaign.rin_dBc, window, prominence_dB)
+    spurs.insert(1, "display_label", campaign.meta["display_label"].to_numpy()[spurs["row"]])
+
+    spurs["track"] = assign_tracks(spurs["freq_Hz"], track_tol)
+    spurs["track_freq_Hz"] = spurs.groupby("track")["freq_Hz"].transform("median")
+
+    # Families on track frequencies, so every occurrence of a line agrees
+    tracks = spurs.drop_duplicates("track").sort_values("track")
+    family, harmonic = assign_families(tracks["track_freq_Hz"], families, family_tol,
+                                       auto=auto_families)
+    by_track = pd.DataFrame({"family": family, "harmonic": harmonic},
+                            index=tracks["track"].to_numpy())
+    spurs = spurs.join(by_track, on="track")
+
+    print(f"[INFO] {len(spurs)} spurs in {len(campaign)} measurements "
+          f"({spurs['track'].nunique()} tracks)")
+    return spurs.sort_values(["track", "row"]).reset_index(drop=True)
+
+
+def spur_table(spurs: pd.DataFrame, campaign: RINCampaign,
+               value: str = "prominence_dB") -> pd.DataFrame:
+    """
+    Tracks × measurements table of ``value`` (NaN where a measurement has
+    no spur on that track), indexed by track frequency and family — e.g.
+    DM ON vs OFF columns side by side.
+    """
+    table = spurs.pivot_table(index="track", columns="row", values=value, aggfunc="max")
+    table = table.reindex(columns=range(len(campaign)))
+    table.columns = campaign.meta["display_label"].to_numpy()
+    info = spurs.drop_duplicates("track").set_index("track")[["track_freq_Hz", "family",
+                                                               "harmonic"]]
+    return info.join(table).set_index(["track_freq_Hz", "family", "harmonic"])
@@ -0,0 +1,322 @@
+"""
+SCPI/TCP acquisition from the Siglent SSA3021X Plus spectrum analyser.
+
+Replaces the USB CSV export: traces are pulled over the LAN (raw SCPI socket,
+port 5025) in binary transfer mode and returned in the ``traces`` layout of
+``Spectrum_RIN_class.read_dsa_csv``, so everything downstream of
+``SpectrumRIN`` is unchanged.
+
+Binary mode returns each trace as an IEEE 488.2 definite-length block
+(``#<n><length><float32 x points>``); compared with ASCII this is 4 bytes per
+point and no text parsing.  Command strings are class attributes of
+SSA3021XClient so they can be adapted to other firmware revisions.
+
+``SSA3021XSimulator`` serves the same commands from a local socket with
+synthetic traces, for testing without the instrument.
+"""
+import queue
+import socket
+import socketserver
+import threading
+import time
+
+import numpy as np
+
+from Spectrum_RIN_class import SpectrumRIN
+
+TRACE_NAMES = {1: "Trace A", 2: "Trace B", 3: "Trace C", 4: "Trace D"}
+
+
+class SSA3021XClient:
+    """
+    Minimal SCPI client for the SSA3021X over a raw TCP socket.
+
+    Parameters
+    ----------
+    host : str
+        Instrument IP address / hostname.
+    port : int
+        SCPI raw socket port (5025 on Siglent analysers).
+    timeout_s : float
+        Socket timeout.
+    byteorder : str
+        Byte order of binary trace data, ``"<"`` (little endian) or ``">"``.
+    """
+
+    CMD_IDN = "*IDN?"
+    CMD_FORMAT_BINARY = ":FORMat:TRACe:DATA REAL"
+    CMD_FORMAT_ASCII = ":FORMat:TRACe:DATA ASCii"
+    CMD_START = ":SENSe:FREQuency:STARt?"
+    CMD_STOP = ":SENSe:FREQuency:STOP?"
+    CMD_POINTS = ":SENSe:SWEep:POINts?"
+    CMD_RBW = ":SENSe:BWIDth:RESolution?"
+    CMD_TRACE = ":TRACe:DATA? {n}"
+    CMD_SINGLE = ":INITiate:IMMediate"
+    CMD_OPC = "*OPC?"
+
+    def __init__(self, host: str, port: int = 5025, timeout_s: float = 5.0, byteorder: str = "<"):
+        self.host = host
+        self.port = port
+        self.timeout_s = timeout_s
+        self.dtype = np.dtype(byteorder + "f4")
+        self._sock = None
+        self._rfile = None
+        self._freq_cache = None
+
+    # ----------------------------------------------------------------------
+    def open(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout_s)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._rfile = self._sock.makefile("rb")
+        self.write(self.CMD_FORMAT_BINARY)
+        print(f"[INFO] Connected to {self.query(self.CMD_IDN)} at {self.host}:{self.port}")
+        return self
+
+    def close(self):
+        if self._sock is not None:
+            self._rfile.close()
+            self._sock.close()
+            self._sock = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ----------------------------------------------------------------------
+    def write(self, cmd: str):
+        self._sock.sendall(cmd.encode("ascii") + b"\n")
+
+    def query(self, cmd: str) -> str:
+        self.write(cmd)
+        return self._rfile.readline().decode("ascii").strip()
+
+    def query_block(self, cmd: str) -> bytes:
+        """Send *cmd* and read one definite-length block response."""
+        self.write(cmd)
+        head = self._rfile.read(2)
+        if head[:1] != b"#":
+            raise ValueError(f"Expected binary block, got {head + self._rfile.readline()!r}")
+        n = int(head[1:2])
+        length = int(self._rfile.read(n))
+        payload = self._rfile.read(length)
+        self._rfile.readline()  # terminator
+        return payload
+
+    # ----------------------------------------------------------------------
+    def sweep_settings(self) -> dict:
+        """Frequency axis and RBW of the current sweep."""
+        return {
+            "start_Hz": float(self.query(self.CMD_START)),
+            "stop_Hz": float(self.query(self.CMD_STOP)),
+            "points": int(float(self.query(self.CMD_POINTS))),
+            "RBW_Hz": float(self.query(self.CMD_RBW)),
+        }
+
+    def frequency_axis(self, settings: dict | None = None) -> np.ndarray:
+        settings = settings or self.sweep_settings()
+        key = (settings["start_Hz"], settings["stop_Hz"], settings["points"])
+        if self._freq_cache is None or self._freq_cache[0] != key:
+            self._freq_cache = (key, np.linspace(*key))
+        return self._freq_cache[1]
+
+    def single_sweep(self):
+        """Trigger one sweep and block until it has completed."""
+        self.write(self.CMD_SINGLE)
+        self.query(self.CMD_OPC)
+
+    def read_trace(self, n: int = 1) -> np.ndarray:
+        """Power of trace *n* (1..4) in dBm, binary transfer."""
+        payload = self.query_block(self.CMD_TRACE.format(n=n))
+        return np.frombuffer(payload, dtype=self.dtype).astype(float)
+
+    def read_traces(self, traces=(1,), settings: dict | None = None):
+        """
+        Read traces into the read_dsa_csv layout.
+
+        Returns
+        -------
+        params : dict
+            ``{"Start Frequency": [...], "Stop Frequency": [...],
+            "Number of Points": [...], "RBW": [...]}`` (string lists, as in CSV).
+        traces : dict
+            ``{"Trace A": {"freq_Hz": ndarray, "power_dBm": ndarray}, ...}``.
+        """
+        settings = settings or self.sweep_settings()
+        freq = self.frequency_axis(settings)
+        params = {
+            "Start Frequency": [repr(settings["start_Hz"])],
+            "Stop Frequency": [repr(settings["stop_Hz"])],
+            "Number of Points": [str(settings["points"])],
+            "RBW": [repr(settings["RBW_Hz"]), "Manual"],
+        }
+        out = {TRACE_NAMES[n]: {"freq_Hz": freq, "power_dBm": self.read_trace(n)} for n in traces}
+        return params, out
+
+
+def acquire_RIN_stream(client: SSA3021XClient, config: dict, n_sweeps: int | None = None,
+                       trace: int = 1, single: bool = False):
+    """
+    Generator of RIN spectra acquired continuously from the analyser.
+
+    Acquisition runs in a background thread, one sweep ahead of the RIN
+    computation, so socket transfer and processing overlap.  ``config`` is a
+    SpectrumRIN config; its ``res_bandwidth_Hz`` defaults to the instrument
+    RBW.  With ``single`` every sweep is triggered and awaited
+    (``:INIT`` + ``*OPC?``), otherwise the current trace is read as fast as
+    possible.
+
+    Yields
+    ------
+    dict
+        ``{"freq_Hz", "RIN_dBc_per_Hz", "traces", "params", "t_acquired"}``.
+    """
+    settings = client.sweep_settings()
+    config = {"res_bandwidth_Hz": settings["RBW_Hz"], **config}
+    name = TRACE_NAMES[trace]
+
+    buf = queue.Queue(maxsize=2)
+    stop = threading.Event()
+
+    def acquire():
+        i = 0
+        try:
+            while not stop.is_set() and (n_sweeps is None or i < n_sweeps):
+                if single:
+                    client.single_sweep()
+                buf.put((time.time(),) + client.read_traces((trace,), settings))
+                i += 1
+        except Exception as e:  # surface socket errors in the consumer
+            buf.put(e)
+        buf.put(None)
+
+    worker = threading.Thread(target=acquire, daemon=True)
+    worker.start()
+    try:
+        while True:
+            item = buf.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            t_acq, params, traces = item
+            freq, rin_dBc = SpectrumRIN.from_traces(traces, config, params).get_RIN(name)
+            yield {"freq_Hz": freq, "RIN_dBc_per_Hz": rin_dBc, "traces": traces,
+                   "params": params, "t_acquired": t_acq}
+    finally:
+        stop.set()
+        while worker.is_alive():  # unblock a producer waiting on a full queue
+            try:
+                buf.get_nowait()
+            except queue.Empty:
+                pass
+            worker.join(0.05)
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Local simulator
+# ──────────────────────────────────────────────────────────────────────────
+class _SCPIHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        sim = self.server.sim
+        for line in self.rfile:
+            cmd = line.decode("ascii").strip()
+            if not cmd:
+                continue
+            reply = sim.respond(cmd)
+            if reply is not None:
+                self.wfile.write(reply + b"\n")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class SSA3021XSimulator:
+    """
+    Local TCP server answering the SSA3021XClient command set with synthetic
+    traces (1/f noise floor, a few spurs, fresh noise on every read).
+
+    Usage::
+
+        with SSA3021XSimulator() as sim:
+            with SSA3021XClient(*sim.address) as dsa:
+                params, traces = dsa.read_traces()
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, n_points: int = 751,
+                 start_Hz: float = 0.0, stop_Hz: float = 1e6, RBW_Hz: float = 300.0,
+                 sweep_time_s: float = 0.0, seed: int = 0):
+        self.n_points = n_points
+        self.start_Hz = start_Hz
+        self.stop_Hz = stop_Hz
+        self.RBW_Hz = RBW_Hz
+        self.sweep_time_s = sweep_time_s
+        self.binary = False
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+
+        k = np.arange(n_points)
+        self._floor = -60.0 - 10.0 * np.log10(1.0 + k / max(n_points / 100, 1))
+        self._floor[(np.array([0.05, 0.1, 0.15]) * n_points).astype(int)] += 25.0
+        self._floor[0] = 2.6  # DC
+
+        self._server = _Server((host, port), _SCPIHandler)
+        self._server.sim = self
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ----------------------------------------------------------------------
+    def trace_dBm(self) -> np.ndarray:
+        with self._lock:
+            return self._floor + self._rng.normal(0.0, 1.5, self.n_points)
+
+    def respond(self, cmd: str):
+        key = cmd.upper()
+        if key == "*IDN?":
+            return b"Siglent Technologies,SSA3021X Plus,SIMULATOR,3.2.2.6.2R10"
+        if key.startswith(":FORMAT:TRACE:DATA "):
+            self.binary = key.split()[-1].startswith("REAL")
+            return None
+        if key == ":SENSE:FREQUENCY:START?":
+            return repr(self.start_Hz).encode()
+        if key == ":SENSE:FREQUENCY:STOP?":
+            return repr(self.stop_Hz).encode()
+        if key == ":SENSE:SWEEP:POINTS?":
+            return str(self.n_points).encode()
+        if key == ":SENSE:BWIDTH:RESOLUTION?":
+            return repr(self.RBW_Hz).encode()
+        if key == ":INITIATE:IMMEDIATE":
+            time.sleep(self.sweep_time_s)
+            return None
+        if key == "*OPC?":
+            return b"1"
+        if key.startswith(":TRACE:DATA?"):
+            data = self.trace_dBm()
+            if not self.binary:
+                return ",".join(f"{v:.2f}" for v in data).encode()
+            payload = data.astype("<f4").tobytes()
+            size = str(len(payload)).encode()
+            return b"#" + str(len(size)).encode() + size + payload
+        return None
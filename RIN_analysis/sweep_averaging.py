@@ -0,0 +1,186 @@
+from statistics import NormalDist
+
+import numpy as np
+
+from campaign_pool import map_ordered, resolve_workers
+from rin_campaign import SOURCES, measurement_source
+from spectrum_cache import SpectrumCache
+
+
+def dB_to_linear(rin_dBc_per_Hz):
+    return 10 ** (np.asarray(rin_dBc_per_Hz, dtype=float) / 10)
+
+
+class SweepAccumulator:
+    """
+    Streaming per-bin mean and variance of repeated RIN sweeps (Welford).
+
+    Sweeps are accumulated in the linear RIN domain (1/Hz), so the mean is
+    the mean noise power and not the mean of dB values.  Memory is three
+    arrays of the spectrum length, independent of the number of sweeps, and
+    partial accumulators (e.g. one per worker process) combine exactly with
+    ``merge`` (Chan et al. pairwise update).
+
+    Parameters
+    ----------
+    freq_Hz : np.ndarray or None
+        Frequency axis; taken from the first ``update_dB`` / ``update`` call
+        that passes one if omitted.
+    """
+
+    def __init__(self, freq_Hz=None):
+        self.freq_Hz = None if freq_Hz is None else np.asarray(freq_Hz, dtype=float)
+        self.n = 0
+        self.mean = None
+        self.M2 = None
+
+    def __repr__(self):
+        size = 0 if self.mean is None else self.mean.size
+        return f"SweepAccumulator(n={self.n}, bins={size})"
+
+    def _check_axis(self, freq_Hz, size):
+        if freq_Hz is not None:
+            if self.freq_Hz is None:
+                self.freq_Hz = np.asarray(freq_Hz, dtype=float)
+            elif (len(freq_Hz) != len(self.freq_Hz) or freq_Hz[0] != self.freq_Hz[0]
+                  or freq_Hz[-1] != self.freq_Hz[-1]):
+                raise ValueError("Sweep frequency axis differs from the accumulated one")
+        if self.mean is not None and size != self.mean.size:
+            raise ValueError(f"Expected {self.mean.size} bins, got {size}")
+
+    # ----------------------------------------------------------------------
+    def update(self, rin_lin, freq_Hz=None):
+        """
+        Add one sweep (shape (F,)) or a block of sweeps (shape (k, F)) of
+        linear RIN.
+        """
+        x = np.asarray(rin_lin, dtype=float)
+        self._check_axis(freq_Hz, x.shape[-1])
+
+        if x.ndim == 1:
+            if self.mean is None:
+                self.n, self.mean, self.M2 = 1, x.copy(), np.zeros_like(x)
+                return self
+            self.n += 1
+            delta = x - self.mean
+            self.mean += delta / self.n
+            self.M2 += delta * (x - self.mean)
+            return self
+
+        block = SweepAccumulator()
+        block.n = x.shape[0]
+        block.mean = x.mean(axis=0)
+        block.M2 = ((x - block.mean) ** 2).sum(axis=0)
+        return self.merge(block)
+
+    def update_dB(self, freq_Hz, rin_dBc_per_Hz):
+        """Add one sweep given in dBc/Hz (e.g. from SpectrumRIN.get_RIN)."""
+        return self.update(dB_to_linear(rin_dBc_per_Hz), freq_Hz)
+
+    def merge(self, other: "SweepAccumulator"):
+        """Fold *other* (accumulated independently) into this accumulator."""
+        if other.n == 0:
+            return self
+        self._check_axis(other.freq_Hz, other.mean.size)
+        if self.n == 0:
+            self.n, self.mean, self.M2 = other.n, other.mean.copy(), other.M2.copy()
+            return self
+
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * (other.n / n)
+        self.M2 += other.M2 + delta**2 * (self.n * other.n / n)
+        self.n = n
+        return self
+
+    # ----------------------------------------------------------------------
+    @property
+    def variance(self) -> np.ndarray:
+        """Unbiased per-bin variance of the sweeps (linear RIN²)."""
+        if self.n < 2:
+            return np.full_like(self.mean, np.nan)
+        return self.M2 / (self.n - 1)
+
+    @property
+    def std_error(self) -> np.ndarray:
+        """Standard error of the per-bin mean (linear RIN)."""
+        return np.sqrt(self.variance / self.n)
+
+    def confidence_band(self, level: float = 0.95):
+        """
+        Per-bin two-sided confidence interval of the mean (linear RIN),
+        normal approximation — valid once a few tens of sweeps are averaged.
+        """
+        z = NormalDist().inv_cdf(0.5 + level / 2)
+        half = z * self.std_error
+        return self.mean - half, self.mean + half
+
+    def result_dB(self, level: float = 0.95) -> dict:
+        """
+        Mean RIN and confidence band in dBc/Hz.
+
+        A lower bound at or below zero (too few sweeps for that bin) is
+        reported as -inf.
+        """
+        lo, hi = self.confidence_band(level)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return {
+                "freq_Hz": self.freq_Hz,
+                "RIN_dBc_per_Hz": 10 * np.log10(self.mean),
+                "lower_dBc_per_Hz": 10 * np.log10(np.where(lo > 0, lo, 0.0)),
+                "upper_dBc_per_Hz": 10 * np.log10(hi),
+                "std_error_lin": self.std_error,
+                "n_sweeps": self.n,
+            }
+
+
+def accumulate_sweeps(sweeps, acc: SweepAccumulator | None = None) -> SweepAccumulator:
+    """
+    Consume an iterable of sweeps into an accumulator.
+
+    Items are ``(freq_Hz, RIN_dBc_per_Hz)`` tuples or result dicts with those
+    keys, as yielded by ssa3021x.acquire_RIN_stream or returned by the
+    campaign loaders.
+    """
+    acc = SweepAccumulator() if acc is None else acc
+    for sweep in sweeps:
+        if isinstance(sweep, dict):
+            acc.update_dB(sweep["freq_Hz"], sweep["RIN_dBc_per_Hz"])
+        else:
+            acc.update_dB(*sweep)
+    return acc
+
+
+def _accumulate_jobs(jobs):
+    """Process-pool worker: one partial accumulator over a slice of files."""
+    acc = SweepAccumulator()
+    for source, job in jobs:
+        acc.update_dB(*SOURCES[source].load_measurement_rin(job))
+    return acc
+
+
+def accumulate_campaign(campaign: dict, workers: int | None = None) -> SweepAccumulator:
+    """
+    Average every measurement of a campaign (repeated sweeps of one state).
+
+    Files are split into contiguous slices, each slice is reduced to a
+    partial accumulator in its own process, and the partials are merged, so
+    no process ever holds more than one spectrum plus its accumulator.
+    """
+    cache = SpectrumCache.from_setting(campaign.get("cache"))
+    if workers is None:
+        workers = campaign.get("workers")
+
+    jobs = []
+    for meas in campaign["measurements"]:
+        src = measurement_source(meas)
+        jobs.append((src, SOURCES[src].campaign_job(campaign, meas, cache)))
+
+    n_slices = resolve_workers(workers, len(jobs))
+    bounds = np.linspace(0, len(jobs), n_slices + 1).astype(int)
+    slices = [jobs[a:b] for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+    acc = SweepAccumulator()
+    for part in map_ordered(_accumulate_jobs, slices, workers):
+        acc.merge(part)
+    return acc
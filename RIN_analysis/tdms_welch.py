@@ -0,0 +1,149 @@
+import numpy as np
+from nptdms import TdmsFile
+from numpy.lib.stride_tricks import sliding_window_view
+
+from campaign_pool import map_ordered, resolve_workers
+
+WINDOWS = {
+    "hann": np.hanning,
+    "hamming": np.hamming,
+    "blackman": np.blackman,
+    "boxcar": np.ones,
+}
+
+
+def get_window(name: str, nperseg: int) -> np.ndarray:
+    """Periodic (DFT-even) window of length *nperseg*, as used for spectral analysis."""
+    try:
+        fn = WINDOWS[name]
+    except KeyError:
+        raise ValueError(f"Unknown window '{name}', choose from {sorted(WINDOWS)}")
+    return fn(nperseg + 1)[:-1]
+
+
+def _segment_power(x, nperseg, step, window, average):
+    """
+    |FFT|² of every windowed, mean-removed segment of *x*, reduced over segments.
+
+    Returns ``(reduced_power, n_segments)``; the segments are strided views of
+    *x*, so only the windowed copy of one block is materialised.
+    """
+    segs = sliding_window_view(x, nperseg)[::step]
+    segs = (segs - segs.mean(axis=1, keepdims=True)) * window
+    X = np.fft.rfft(segs, axis=1)
+    P = X.real**2 + X.imag**2
+    if average == "max":
+        return P.max(axis=0), P.shape[0]
+    return P.sum(axis=0), P.shape[0]
+
+
+def _welch_worker(job):
+    """
+    Process-pool worker: reduce segments ``[seg_first, seg_first + n_segs)``.
+
+    Each worker opens the TDMS file itself and reads its share of the record
+    in blocks of ``block_segs`` segments (plus the overlap tail), so memory per
+    worker is bounded by ``block_segs * nperseg`` samples.
+    """
+    (path, group, channel_name, seg_first, n_segs,
+     nperseg, step, window, average, block_segs) = job
+
+    acc = np.zeros(nperseg // 2 + 1)
+    count = 0
+    with TdmsFile.open(path) as tdms_file:
+        ch = tdms_file[group][channel_name]
+        for s0 in range(seg_first, seg_first + n_segs, block_segs):
+            k = min(block_segs, seg_first + n_segs - s0)
+            x = ch.read_data(offset=s0 * step, length=(k - 1) * step + nperseg)
+            P, n = _segment_power(np.asarray(x, dtype=float), nperseg, step, window, average)
+            acc = np.maximum(acc, P) if average == "max" else acc + P
+            count += n
+    return acc, count
+
+
+def welch_psd_tdms(path, channel_name, sample_rate, nperseg=2**16, overlap=0.5,
+                   window="hann", average="mean", n_averages=None,
+                   group="Oscilloscope - Waveform Data", workers=None, block_segs=32):
+    """
+    One-sided voltage PSD of a raw TDMS waveform channel by Welch's method.
+
+    The record is split into ``nperseg``-sample segments overlapping by
+    ``overlap`` (fraction), each mean-removed and windowed; the segment
+    periodograms are averaged (``average="mean"``) or peak-held
+    (``average="max"``).  Segment ranges are reduced in parallel across
+    ``workers`` processes that stream their own part of the file, so records
+    far larger than RAM are handled with ``workers * block_segs * nperseg``
+    samples in memory.
+
+    Parameters
+    ----------
+    path : str or path-like
+        TDMS file.
+    channel_name : str
+        Raw waveform channel inside *group*.
+    sample_rate : float
+        Sample rate in Hz.
+    nperseg : int
+        Segment length (sets the resolution bandwidth ``sample_rate / nperseg``).
+    overlap : float
+        Segment overlap in [0, 1).
+    window : str
+        One of ``WINDOWS``.
+    average : {"mean", "max"}
+        Segment reduction.
+    n_averages : int or None
+        Use only the first *n_averages* segments (default: all).
+    workers : int or None
+        Processes (default one per core, 1 = in-process).
+    block_segs : int
+        Segments read per block by each worker.
+
+    Returns
+    -------
+    freq_Hz : np.ndarray
+    psd_V2_per_Hz : np.ndarray
+    n_segments : int
+    """
+    if average not in ("mean", "max"):
+        raise ValueError("average must be 'mean' or 'max'")
+    if not 0 <= overlap < 1:
+        raise ValueError("overlap must be in [0, 1)")
+
+    nperseg = int(nperseg)
+    if nperseg < 1:
+        raise ValueError(f"Segment length nperseg={nperseg} must be >= 1")
+    if n_averages is not None and int(n_averages) < 1:
+        raise ValueError(f"n_averages={n_averages} must be >= 1 (or None for all segments)")
+    step = max(1, int(round(nperseg * (1 - overlap))))
+    win = get_window(window, nperseg)
+
+    with TdmsFile.open(path) as tdms_file:
+        n_samples = len(tdms_file[group][channel_name])
+    if n_samples < nperseg:
+        raise ValueError(f"{channel_name}: record has {n_samples} samples, shorter than "
+                         f"one segment (nperseg={nperseg})")
+
+    n_total = (n_samples - nperseg) // step + 1
+    if n_averages is not None:
+        n_total = min(n_total, int(n_averages))
+
+    workers = resolve_workers(workers, n_total)
+    bounds = np.linspace(0, n_total, workers + 1).astype(int)
+    jobs = [(path, group, channel_name, int(a), int(b - a), nperseg, step, win, average, block_segs)
+            for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+    parts = map_ordered(_welch_worker, jobs, workers)
+    if average == "max":
+        P = np.max([acc for acc, _ in parts], axis=0)
+    else:
+        P = np.sum([acc for acc, _ in parts], axis=0) / sum(n for _, n in parts)
+
+    # density scaling, one-sided: double everything but DC (and Nyquist for even nperseg)
+    psd = P / (sample_rate * np.sum(win**2))
+    if nperseg % 2:
+        psd[1:] *= 2
+    else:
+        psd[1:-1] *= 2
+
+    freq = np.fft.rfftfreq(nperseg, d=1 / sample_rate)
+    return freq, psd, n_total
@@ -46,6 +46,12 @@ if __name__ == "__main__":
                 /f"{timestamp}")
     campaign_tdms = {
         "base_folder": base_folder,
+        "cache": True,   # re-use parsed spectra from ~/.cache/DM_Control/spectra
+        "workers": None,  # loader processes (None = one per core, 1 = serial)
+        "bands": {        # integrated RMS RIN printed with the plot
+            "10 Hz-1 kHz": (10, 1e3),
+            "1-100 kHz": (1e3, 1e5),
+        },
         "tdms_settings": {
             "slot": "Oscilloscope (PXI1Slot7)",
             "channel": "0",
@@ -0,0 +1,40 @@
+import sys
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE))  # bare sibling imports under pytest
+sys.path.insert(0, str(HERE.parent / "benchmarks"))
+
+from rin_store import RINStore
+from synthetic_data import write_dsa_csv
+
+
+def _campaign(folder: Path, traces) -> dict:
+    return {
+        "base_folder": str(folder),
+        "global": {"responsivity_A_per_W": None, "transimpedance_V_per_A": None,
+                   "res_bandwidth_Hz": 300.0},
+        "measurements": [{"csv": "m.csv", "trace": trace, "label": trace,
+                          "PD_voltage_mV": 1200.0, "optical_power_W": None}
+                         for trace in traces],
+    }
+
+
+def test_two_traces_of_one_csv_are_two_rows(tmp_path):
+    write_dsa_csv(tmp_path / "m.csv")
+    store = RINStore(tmp_path / "store")
+    campaign = _campaign(tmp_path, ["Trace A", "Trace B"])
+
+    assert store.ingest(campaign, workers=1) == 2
+    assert sorted(store.meta["trace"]) == ["Trace A", "Trace B"]
+    # same file and settings again: nothing new
+    assert store.ingest(campaign, workers=1) == 0
+    assert len(RINStore(tmp_path / "store")) == 2
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_two_traces_of_one_csv_are_two_rows(Path(tmp))
+    print("[INFO] RIN store tests passed")
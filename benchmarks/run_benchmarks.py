@@ -0,0 +1,251 @@
+"""
+Benchmark suite for pattern generation, the DM send path and RIN parsing.
+
+Every case is timed with ``timeit`` (auto-ranged loop count, best of
+``--repeat`` runs) and compared with the recorded ``baselines.json``.  A case
+slower than ``threshold x baseline`` is reported as a regression and the
+script exits with status 1, so it can gate a release.
+
+Usage (venv_main, from the repository root):
+
+    python benchmarks/run_benchmarks.py                  # compare to baselines
+    python benchmarks/run_benchmarks.py -k zernike       # subset by substring
+    python benchmarks/run_benchmarks.py --save-baseline  # re-record baselines
+
+Baselines are machine dependent — re-record them on the reference machine
+after an intentional performance change, in an environment installed from
+``requirements.txt`` (the versions used are stored with the baselines).
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+import nptdms
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+for sub in ("DM_Control_Class", "DM_generate_profiles", "RIN_analysis"):
+    sys.path.insert(0, str(ROOT / sub))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from patterns import PatternGenerator
+from dm_wrapper import DMClass
+from sim_backend import SimulatedBmcDm
+from DM_generate_Profile import DMShape
+from Spectrum_RIN_class import SpectrumRIN
+from RIN_analysis_Kaizhao import readTdms
+from tdms_welch import welch_psd_tdms
+from spectrum_cache import SpectrumCache
+from synthetic_data import write_dsa_csv, write_scope_tdms
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines.json"
+DEFAULT_THRESHOLD = 1.5
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register ``setup(tmp_dir) -> callable`` under *name*."""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def _quiet(fn):
+    """Silence the [INFO] prints of the analysis classes while timing."""
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn()
+    return run
+
+
+# ─────────────────────────────────────────────
+# Pattern generation
+# ─────────────────────────────────────────────
+for _N in (13, 64):
+    for _n in (2, 4, 6):
+        @benchmark(f"patterns.zernike[N={_N},n={_n}]")
+        def _setup(tmp, N=_N, n=_n):
+            gen = PatternGenerator(N=N, wavelength_nm=532, stroke_um=1.5)
+            params = {"n": n, "m": n % 2, "amplitude_lambda": 0.2,
+                      "offset_lambda": 1.0, "radius_px": N / 2}
+            return lambda: gen.zernike(params, Check_ampl=False)
+
+    for _n_max in (2, 4, 6):
+        @benchmark(f"patterns.sup_zernike[N={_N},n_max={_n_max}]")
+        def _setup(tmp, N=_N, n_max=_n_max):
+            gen = PatternGenerator(N=N, wavelength_nm=532, stroke_um=1.5)
+            amps = {f"({n},{m})": 0.01
+                    for n in range(n_max + 1) for m in range(-n, n + 1, 2)}
+            amps["(0,0)"] = 1.0
+            params = {"general": {"radius_px": N / 2 - 1, "offset_radius_px": N / 2},
+                      "zernike_amplitudes": amps}
+            return lambda: gen.sup_zernike(params, clip=False)
+
+
+@benchmark("profiles.DMShape.gradient")
+def _setup(tmp):
+    shape = DMShape({"n_actuators": 137, "stroke": 1.5e-6, "wavelength": 514e-9,
+                     "N": 13, "paths": {"directory": str(tmp), "filename": "g.csv"}})
+
+    def run():
+        shape.gradient(6)
+        shape.apply_circular_mask()
+    return run
+
+
+@benchmark("profiles.DMShape.zernike[n=4]")
+def _setup(tmp):
+    shape = DMShape({"n_actuators": 137, "stroke": 1.5e-6, "wavelength": 514e-9,
+                     "N": 13, "paths": {"directory": str(tmp), "filename": "z.csv"}})
+
+    def run():
+        shape.zernike(4, 2, np.pi, radius_actuators=6.5)
+        shape.apply_circular_mask()
+    return run
+
+
+# ─────────────────────────────────────────────
+# DM send path
+# ─────────────────────────────────────────────
+@benchmark("dm.send_grid[sim]")
+def _setup(tmp):
+    dm = DMClass(serial="SIM", grid_size=13, backend=SimulatedBmcDm(13))
+    with contextlib.redirect_stdout(io.StringIO()):
+        dm.open()
+    grid = np.random.default_rng(0).uniform(0, 1, (13, 13))
+    return lambda: dm.send_grid(grid)
+
+
+# ─────────────────────────────────────────────
+# RIN parsing
+# ─────────────────────────────────────────────
+RIN_CONFIG = {"responsivity_A_per_W": None, "transimpedance_V_per_A": None,
+              "res_bandwidth_Hz": 300, "PD_voltage_mV": 1200.0,
+              "optical_power_W": None}
+
+for _n_pts in (751, 100_001):
+    @benchmark(f"rin.SpectrumRIN._load_csv[{_n_pts} pts x 2]")
+    def _setup(tmp, n_pts=_n_pts):
+        path = write_dsa_csv(Path(tmp) / f"dsa_{n_pts}.csv", n_points=n_pts)
+        with contextlib.redirect_stdout(io.StringIO()):
+            rin = SpectrumRIN(path, RIN_CONFIG)
+
+        def run():
+            rin.params, rin.traces = {}, {}
+            rin._load_csv()
+        return _quiet(run)
+
+
+@benchmark("rin.compute_RIN_dBc_per_Hz[1e6 pts]")
+def _setup(tmp):
+    path = write_dsa_csv(Path(tmp) / "dsa_small.csv", n_points=751, traces=("Trace A",))
+    with contextlib.redirect_stdout(io.StringIO()):
+        rin = SpectrumRIN(path, RIN_CONFIG)
+    n = 1_000_000
+    rin.traces["Trace A"] = {"freq_Hz": np.linspace(0, 1e6, n),
+                             "power_dBm": np.random.default_rng(0).normal(-60, 2, n)}
+    return lambda: rin.compute_RIN_dBc_per_Hz("Trace A")
+
+
+for _rec in (2**16, 2**21):
+    @benchmark(f"rin.readTdms[record={_rec}]")
+    def _setup(tmp, rec=_rec):
+        path = write_scope_tdms(Path(tmp) / f"scope_{rec}.tdms", record_length=rec)
+        return _quiet(lambda: readTdms(path))
+
+
+@benchmark("rin.cached.SpectrumRIN[100001 pts x 2]")
+def _setup(tmp):
+    path = write_dsa_csv(Path(tmp) / "dsa_cached.csv", n_points=100_001)
+    cache = SpectrumCache(Path(tmp) / "cache")
+    return _quiet(lambda: SpectrumRIN(path, RIN_CONFIG, cache=cache))
+
+
+@benchmark("rin.welch_psd_tdms[record=2097152,nperseg=65536]")
+def _setup(tmp):
+    path = write_scope_tdms(Path(tmp) / "scope_welch.tdms", record_length=2**21)
+    return lambda: welch_psd_tdms(path, "Channel 0", 1e6, nperseg=2**16, workers=1)
+
+
+# ─────────────────────────────────────────────
+# Runner
+# ─────────────────────────────────────────────
+def time_case(fn, repeat):
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-k", dest="select", default="",
+                        help="only run cases whose name contains this substring")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="allowed slowdown factor vs baseline "
+                             "(default: value stored in baselines.json)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+    threshold = args.threshold or baseline.get("threshold", DEFAULT_THRESHOLD)
+    reference = baseline.get("results", {})
+
+    results = {}
+    regressions = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, setup in BENCHMARKS.items():
+            if args.select not in name:
+                continue
+            t = time_case(setup(tmp), args.repeat)
+            results[name] = t
+
+            ref = reference.get(name)
+            if ref is None:
+                status = "new"
+            else:
+                ratio = t / ref
+                status = f"{ratio:5.2f}x"
+                if ratio > threshold:
+                    status += "  REGRESSION"
+                    regressions.append(name)
+            print(f"{name:<45s} {t * 1e3:12.4f} ms   {status}")
+
+    if args.save_baseline:
+        baseline = {
+            "threshold": threshold,
+            "machine": {
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "pandas": pd.__version__,
+                "npTDMS": nptdms.__version__,
+                "platform": platform.platform(),
+                "processor": platform.processor(),
+            },
+            "results": {**reference, **results},
+        }
+        args.baseline.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"[INFO] Baselines written to {args.baseline}")
+        return 0
+
+    if regressions:
+        print(f"[ERROR] {len(regressions)} benchmark(s) slower than "
+              f"{threshold:.2f}x baseline: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Synthetic instrument files for benchmarks and offline checks.
+
+The CSV writer reproduces the SSA3021X Plus export layout of
+``RIN_data/CSV1.csv``; the TDMS writer reproduces the groups/channels
+read by ``RIN_analysis_Kaizhao.readTdms``.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+from nptdms import TdmsWriter, ChannelObject
+
+
+DSA_HEADER = [
+    ("Machine Module", "SSA3021X Plus", "3.2.2.6.2R10"),
+    ("Y Axis Scale", "LOG"),
+    ("Y Axis Unit", "dBm"),
+    ("Impedance", "50"),
+    ("PreAmp State", "OFF"),
+    ("Ref Level", "+8.000000000E+00"),
+    ("Attenuation", "28.000000", "Auto"),
+    ("Average Type", "Log Pwr"),
+    ("RBW", "300.000000", "Manual"),
+    ("VBW", "300.000000", "Auto"),
+    ("Trace Math", "OFF"),
+]
+
+
+def synthetic_power_dBm(n_points, seed=0):
+    """1/f-like noise floor with a few spurs, in dBm."""
+    rng = np.random.default_rng(seed)
+    k = np.arange(n_points)
+    floor = -60.0 - 10.0 * np.log10(1.0 + k / max(n_points / 100, 1))
+    spurs = np.zeros(n_points)
+    for frac in (0.05, 0.1, 0.15, 0.33):
+        spurs[int(frac * n_points)] = 25.0
+    return floor + spurs + rng.normal(0.0, 1.5, n_points)
+
+
+def write_dsa_csv(path, n_points=751, traces=("Trace A", "Trace B"),
+                  stop_freq_Hz=1e6, seed=0):
+    """Write a DSA CSV export with ``len(traces)`` data blocks."""
+    path = Path(path)
+    freq = np.round(np.linspace(0.0, stop_freq_Hz, n_points))
+
+    with open(path, "w", newline="") as f:
+        for row in DSA_HEADER:
+            f.write(",".join(row) + "\n")
+        f.write(f"Number of Points,{n_points}\n")
+        f.write("Start Frequency,+0.000000000E+00\n")
+        f.write(f"Stop Frequency,{stop_freq_Hz:+.9E}\n")
+
+        for i, name in enumerate(traces):
+            f.write(f"Trace Name,{name}\n")
+            f.write("Trace Type,Clear Write\n")
+            f.write("Trace Detector,Pos Peak\n")
+            f.write("Trace Data\n")
+            block = np.column_stack([freq, synthetic_power_dBm(n_points, seed + i)])
+            np.savetxt(f, block, delimiter=",", fmt=("%d", "%.2f"))
+
+        f.write("Trace Name,Trace D\n")
+        f.write("Trace Type,Blank\n")
+    return path
+
+
+def scope_panel_config(sample_rate, record_length):
+    """Minimal 'Panel Configurations' JSON of the PXI scope soft front panel."""
+    return {
+        "Instrument": {
+            "Instrument Configuration": {
+                "Timing": {
+                    "Manual Sample Rate": sample_rate,
+                    "Manual Record Length": record_length,
+                    "Manual Timing Settings": {
+                        "Use Manual Sample Rate": True,
+                        "Use Manual Record Length": True,
+                    },
+                }
+            }
+        }
+    }
+
+
+def write_scope_tdms(path, record_length=2**16, sample_rate=1e6,
+                     slot="Oscilloscope (PXI1Slot7)", channel="0",
+                     V_mean_V=1.0, waveform=True, seed=0):
+    """
+    Write a scope TDMS capture with an FFT channel and (optionally) the raw
+    waveform channel of ``record_length`` samples.
+    """
+    path = Path(path)
+    rng = np.random.default_rng(seed)
+
+    n_bins = record_length // 2 + 1
+    f = np.arange(n_bins) * (sample_rate / record_length)
+    VHz = 1e-6 * (1.0 + 1e3 / np.maximum(f, 1.0)) * rng.uniform(0.5, 1.5, n_bins)
+
+    data_group = "Oscilloscope - Waveform Data"
+    objects = [
+        ChannelObject("Panel Configurations", slot,
+                      np.array([json.dumps(scope_panel_config(sample_rate, record_length))])),
+        ChannelObject(data_group, f"FFT 1 (Channel {channel}) V/√Hz", VHz),
+    ]
+    if waveform:
+        t = np.arange(record_length) / sample_rate
+        v = V_mean_V * (1.0 + 1e-3 * np.sin(2 * np.pi * 1e3 * t)) \
+            + rng.normal(0.0, 1e-4, record_length)
+        objects.append(ChannelObject(data_group, f"Channel {channel}", v))
+
+    with TdmsWriter(str(path)) as writer:
+        writer.write_segment(objects)
+    return path